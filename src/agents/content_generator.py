@@ -3,13 +3,23 @@
 Content Generator Agent for learn_flow
 Phase 3.2: Generate educational content + 3 comprehension questions per module
 """
+import copy
+import hashlib
 import json
+import math
+import re
+import threading
 import yaml
-import requests
 from pathlib import Path
-from typing import Dict, Any, List, Tuple
-from src.core.llm_engine import call_llm
+from typing import Dict, Any, List, Tuple, Callable, Optional
+from src.core import llm_metrics
+from src.core.llm_engine import call_llm_checked, discard_cached_response, stream_llm
+from src.core.quota import QuotaExceededError
 from src.core import load_agent_config, load_prompts, load_learning_resources, load_thresholds
+from src.core import database
+from src.core.json_extractor import clean_json_string, extract_json  # clean_json_string re-exported
+from src.core.schemas import MODULE_CONTENT_SCHEMA, MODULE_NAMES_SCHEMA, check_schema
+from src.core.url_checker import get_url_checker
 
 
 # =============================================================================
@@ -42,6 +52,150 @@ def determine_user_tier(mastery: int, target_seniority: str) -> int:
     return 2
 
 
+# Golden resources file (relative to project root, consistent with other config loaders)
+GOLDEN_RESOURCES_PATH = Path("config/resources/golden_resources_by_role.yaml")
+
+# Map detected topic category to shared_resources section
+GOLDEN_CATEGORY_SECTIONS = {
+    "linear_algebra": "mathematics",
+    "probability": "mathematics",
+    "statistics": "mathematics",
+    "calculus": "mathematics",
+    "stochastic": "stochastic",
+    "time_series": "mathematics",
+    "machine_learning": "machine_learning",
+    "deep_learning": "machine_learning",
+    "python": "programming",
+    "algorithms": "programming",
+    "derivatives": "stochastic",  # Derivatives need stochastic calculus
+    "risk": "risk",  # Risk has its own section with VaR, stress testing resources
+    "portfolio": "trading",  # Portfolio management uses trading resources
+    "trading": "trading",
+    "finance_theory": "trading",  # EMH, CAPM, asset pricing
+    # Additional categories
+    "fixed_income": "stochastic",  # Yield curves, duration → stochastic/derivatives math
+    "credit": "risk",  # Credit risk, CDS → risk section
+    "fx": "trading",  # FX, currency → trading section
+    "numerical": "stochastic",  # PDEs, finite difference → stochastic math
+    "interview": "mathematics",  # Brainteasers, puzzles → probability/math
+}
+
+# Compiled golden index, rebuilt when the YAML file's mtime/size changes
+_golden_index: Optional[Dict[str, Any]] = None
+_golden_index_lock = threading.Lock()
+
+
+def _keyword_pattern(keywords: List[str]) -> Optional["re.Pattern"]:
+    """Compile substring keywords into one alternation (None if there are no keywords)"""
+    keywords = [str(kw) for kw in keywords if kw]
+    if not keywords:
+        return None
+    return re.compile("|".join(re.escape(kw) for kw in keywords))
+
+
+def _compile_resources(resource_list: List[Dict[str, Any]], require_url: bool = False) -> Tuple[Tuple[str, str], ...]:
+    """
+    Pre-format resources as (text, url) pairs
+
+    Resources without a URL get "#" (paid books). With require_url, entries
+    without a URL are only kept if they have text.
+    """
+    compiled = []
+    for res in resource_list or []:
+        text = f"{res.get('text', '')} {res.get('note', '')}".strip()
+        if require_url:
+            if res.get("url"):
+                compiled.append((text, res["url"]))
+            elif res.get("text"):
+                compiled.append((text, "#"))
+        else:
+            compiled.append((text, res.get("url", "#")))
+    return tuple(compiled)
+
+
+def _compile_golden_index(golden: Dict[str, Any], config_path: Path, stamp: Tuple[int, int]) -> Dict[str, Any]:
+    """Compile parsed golden YAML into matchers and lookup tables"""
+    categories = tuple(
+        (category, pattern)
+        for category, keywords in (golden.get("topic_keywords") or {}).items()
+        for pattern in [_keyword_pattern(keywords or [])]
+        if pattern is not None
+    )
+
+    role_topics = {}
+    role_core = {}
+    for role, role_data in (golden.get("roles") or {}).items():
+        role_data = role_data or {}
+        role_topics[role] = tuple(
+            (pattern, _compile_resources(res_list[:2] if res_list else [], require_url=True))
+            for topic_key, res_list in (role_data.get("topic_resources") or {}).items()
+            for pattern in [_keyword_pattern(topic_key.replace("_", " ").split())]
+            if pattern is not None
+        )
+        role_core[role] = _compile_resources(role_data.get("core_resources", []))
+
+    shared = {
+        section: {tier: _compile_resources(res_list) for tier, res_list in (tiers or {}).items()}
+        for section, tiers in (golden.get("shared_resources") or {}).items()
+    }
+
+    all_resources = list(role_core.values())
+    all_resources += [res for tiers in shared.values() for res in tiers.values()]
+    all_resources += [res for topics in role_topics.values() for _, res in topics]
+    urls = frozenset(url for resources in all_resources for _, url in resources if url and url != "#")
+
+    return {
+        "path": config_path,
+        "stamp": stamp,
+        "categories": categories,
+        "role_topics": role_topics,
+        "role_core": role_core,
+        "shared": shared,
+        "urls": urls
+    }
+
+
+def load_golden_index(config_path: Optional[Path] = None) -> Optional[Dict[str, Any]]:
+    """
+    Get the compiled golden resource index, reloading it if the file changed
+
+    Returns:
+        Index dict (read-only, shared between callers), or None if the file can't be loaded
+    """
+    global _golden_index
+    config_path = config_path or GOLDEN_RESOURCES_PATH
+
+    try:
+        stat = config_path.stat()
+    except OSError as e:
+        print(f"   ⚠️  Could not load golden resources: {e}")
+        return None
+    stamp = (stat.st_mtime_ns, stat.st_size)
+
+    index = _golden_index
+    if index is not None and index["path"] == config_path and index["stamp"] == stamp:
+        return index
+
+    with _golden_index_lock:
+        index = _golden_index
+        if index is not None and index["path"] == config_path and index["stamp"] == stamp:
+            return index
+        try:
+            with open(config_path, 'r') as f:
+                golden = yaml.safe_load(f) or {}
+        except Exception as e:
+            print(f"   ⚠️  Could not load golden resources: {e}")
+            return None
+        _golden_index = _compile_golden_index(golden, config_path, stamp)
+        return _golden_index
+
+
+def is_golden_url(url: str) -> bool:
+    """Check whether a URL is one of the curated golden resources"""
+    index = load_golden_index()
+    return bool(index) and url in index["urls"]
+
+
 def get_golden_resources(target_role: str, module_name: str, user_tier: int = 2) -> List[Dict[str, str]]:
     """
     Select verified resources from golden list based on role, topic, and user tier.
@@ -61,96 +215,48 @@ def get_golden_resources(target_role: str, module_name: str, user_tier: int = 2)
     Returns:
         List of 2-3 verified resources with text and url
     """
-    # Use relative path from project root (consistent with other config loaders)
-    config_path = Path("config/resources/golden_resources_by_role.yaml")
-    
-    try:
-        with open(config_path, 'r') as f:
-            golden = yaml.safe_load(f)
-    except Exception as e:
-        print(f"   ⚠️  Could not load golden resources: {e}")
+    index = load_golden_index()
+    if index is None:
         return []
     
     resources = []
+    seen_urls = set()
     module_lower = module_name.lower()
     tier_name = f"tier_{user_tier}"
+
+    def add_until_two(candidates):
+        for text, url in candidates:
+            if len(resources) >= 2:
+                break
+            if url not in seen_urls:
+                seen_urls.add(url)
+                resources.append({"text": text, "url": url})
     
-    # Detect topic category from module name
-    topic_keywords = golden.get("topic_keywords", {})
-    matched_category = None
-    for category, keywords in topic_keywords.items():
-        if any(kw in module_lower for kw in keywords):
-            matched_category = category
-            break
-    
-    # Map category to shared section
-    category_mapping = {
-        "linear_algebra": "mathematics",
-        "probability": "mathematics",
-        "statistics": "mathematics",
-        "calculus": "mathematics",
-        "stochastic": "stochastic",
-        "time_series": "mathematics",
-        "machine_learning": "machine_learning",
-        "deep_learning": "machine_learning",
-        "python": "programming",
-        "algorithms": "programming",
-        "derivatives": "stochastic",  # Derivatives need stochastic calculus
-        "risk": "risk",  # Risk has its own section with VaR, stress testing resources
-        "portfolio": "trading",  # Portfolio management uses trading resources
-        "trading": "trading",
-        "finance_theory": "trading",  # EMH, CAPM, asset pricing
-        # Additional categories
-        "fixed_income": "stochastic",  # Yield curves, duration → stochastic/derivatives math
-        "credit": "risk",  # Credit risk, CDS → risk section
-        "fx": "trading",  # FX, currency → trading section
-        "numerical": "stochastic",  # PDEs, finite difference → stochastic math
-        "interview": "mathematics",  # Brainteasers, puzzles → probability/math
-    }
-    
-    shared_section = category_mapping.get(matched_category, None)
-    roles = golden.get("roles", {})
-    shared = golden.get("shared_resources", {})
+    # Detect topic category from module name (first category in file order)
+    matched_category = next(
+        (category for category, pattern in index["categories"] if pattern.search(module_lower)),
+        None
+    )
+    shared_section = GOLDEN_CATEGORY_SECTIONS.get(matched_category, None)
+    shared = index["shared"]
     
     # =========================================================================
     # STEP 1: Try to find TOPIC-SPECIFIC resources first (most relevant)
     # =========================================================================
     
     # 1a. Check role's topic_resources
-    if target_role in roles:
-        role_data = roles[target_role]
-        topic_resources = role_data.get("topic_resources", {})
-        
-        for topic_key, topic_res_list in topic_resources.items():
-            topic_words = topic_key.replace("_", " ").split()
-            if any(word in module_lower for word in topic_words):
-                # Found topic match! Add up to 2 topic-specific resources
-                for res in topic_res_list[:2]:
-                    if res.get("url"):
-                        resources.append({
-                            "text": f"{res.get('text', '')} {res.get('note', '')}".strip(),
-                            "url": res["url"]
-                        })
-                    elif res.get("text"):
-                        resources.append({
-                            "text": f"{res.get('text', '')} {res.get('note', '')}".strip(),
-                            "url": "#"
-                        })
-                break
+    for pattern, topic_resources in index["role_topics"].get(target_role, ()):
+        if pattern.search(module_lower):
+            # Found topic match! Add up to 2 topic-specific resources
+            for text, url in topic_resources:
+                seen_urls.add(url)
+                resources.append({"text": text, "url": url})
+            break
     
     # 1b. Check shared resources for topic category
     if len(resources) < 2 and shared_section and shared_section in shared:
-        tier_resources = shared[shared_section].get(tier_name, shared[shared_section].get("tier_2", []))
-        for res in tier_resources:
-            if len(resources) >= 2:
-                break
-            # Include resources WITH or WITHOUT URLs (paid books are valid resources)
-            url = res.get("url", "#")  # Use "#" for paid books without URLs
-            if url not in [r["url"] for r in resources]:
-                resources.append({
-                    "text": f"{res.get('text', '')} {res.get('note', '')}".strip(),
-                    "url": url
-                })
+        section = shared[shared_section]
+        add_until_two(section.get(tier_name, section.get("tier_2", ())))
     
     # =========================================================================
     # STEP 2: If still < 2 resources and NO topic matched, use tier-appropriate
@@ -159,47 +265,20 @@ def get_golden_resources(target_role: str, module_name: str, user_tier: int = 2)
     if len(resources) < 2 and matched_category is None:
         # No topic matched - use general foundational resources based on tier
         # This prevents advanced books like López de Prado appearing for basic topics
-        general_fallback = shared.get("mathematics", {}).get(tier_name, [])
-        for res in general_fallback:
-            if len(resources) >= 2:
-                break
-            url = res.get("url", "#")
-            if url not in [r["url"] for r in resources]:
-                resources.append({
-                    "text": f"{res.get('text', '')} {res.get('note', '')}".strip(),
-                    "url": url
-                })
+        add_until_two(shared.get("mathematics", {}).get(tier_name, ()))
     
     # =========================================================================
     # STEP 3: If still < 2 resources AND topic matched, add role's core resources
     # (Only use core_resources when we have a topic match, ensuring relevance)
     # =========================================================================
-    if len(resources) < 2 and matched_category is not None and target_role in roles:
-        role_data = roles[target_role]
-        for res in role_data.get("core_resources", []):
-            if len(resources) >= 2:
-                break
-            url = res.get("url", "#")
-            if url not in [r["url"] for r in resources]:
-                resources.append({
-                    "text": f"{res.get('text', '')} {res.get('note', '')}".strip(),
-                    "url": url
-                })
+    if len(resources) < 2 and matched_category is not None:
+        add_until_two(index["role_core"].get(target_role, ()))
     
     # =========================================================================
     # STEP 4: Final fallback to mathematics tier resources if still < 2
     # =========================================================================
     if len(resources) < 2:
-        math_tier = shared.get("mathematics", {}).get(tier_name, [])
-        for res in math_tier:
-            if len(resources) >= 2:
-                break
-            url = res.get("url", "#")
-            if url not in [r["url"] for r in resources]:
-                resources.append({
-                    "text": f"{res.get('text', '')} {res.get('note', '')}".strip(),
-                    "url": url
-                })
+        add_until_two(shared.get("mathematics", {}).get(tier_name, ()))
     
     # Remove duplicates and limit to 3
     seen_urls = set()
@@ -231,51 +310,7 @@ def check_url_accessible(url: str, timeout: int = 5) -> Tuple[bool, int]:
     Returns:
         Tuple of (is_accessible, status_code)
     """
-    try:
-        # Special handling for YouTube playlists
-        if 'youtube.com/playlist' in url:
-            response = requests.get(url, timeout=timeout, allow_redirects=True)
-            # YouTube returns 200 even for non-existent playlists
-            # Check page content for error indicators
-            if response.status_code == 200:
-                content = response.text
-                content_lower = content.lower()
-
-                # Check for playlist errors/issues
-                # 1. Check for "0 videos" or empty playlist
-                if ('\"videoCount\":0' in content or
-                    '\"videoCount\":\"0\"' in content or
-                    '0 videos' in content_lower):
-                    print(f"   ⚠️  YouTube playlist is empty (0 videos)")
-                    return (False, 404)
-
-                # 2. Check for explicit error messages
-                if ('playlist does not exist' in content_lower or
-                    'playlist not found' in content_lower or
-                    'this playlist is private' in content_lower or
-                    'playlist is unavailable' in content_lower):
-                    print(f"   ⚠️  YouTube playlist not found or private")
-                    return (False, 404)
-
-                # 3. Check for generic unavailability (be cautious)
-                # Only flag as error if "unavailable" appears with playlist context
-                if 'unavailable' in content_lower and 'playlist' in content_lower[:5000]:
-                    # Check if it's in the title or early in the page
-                    if 'playlist unavailable' in content_lower[:2000]:
-                        print(f"   ⚠️  YouTube playlist unavailable")
-                        return (False, 404)
-
-            return (response.status_code == 200, response.status_code)
-
-        # Standard URL check for non-YouTube
-        response = requests.head(url, timeout=timeout, allow_redirects=True)
-        # Some servers don't support HEAD, try GET if HEAD fails
-        if response.status_code == 405:
-            response = requests.get(url, timeout=timeout, allow_redirects=True, stream=True)
-        return (response.status_code == 200, response.status_code)
-    except requests.exceptions.RequestException as e:
-        print(f"   ⚠️  URL check failed for {url}: {e}")
-        return (False, 0)
+    return get_url_checker().check(url, timeout=timeout)
 
 
 def get_fallback_references(topic_id: str, module_name: str) -> List[Dict[str, str]]:
@@ -312,6 +347,39 @@ def get_fallback_references(topic_id: str, module_name: str) -> List[Dict[str, s
     return default_refs
 
 
+# Paid publishers: references pointing here must not claim to be FREE
+PAID_PUBLISHERS = ['packtpub.com', 'manning.com', 'oreilly.com', 'apress.com', 'amazon.com/dp', 'amazon.com/gp']
+
+
+def _disallowed_reference(url: str, text: str) -> Optional[Tuple[str, str]]:
+    """
+    Check a reference against the source rules (no network access)
+
+    Returns:
+        (problem, action) messages if the reference must be replaced, otherwise None
+    """
+    url_lower = url.lower()
+
+    # YouTube search results (NOT ALLOWED)
+    if 'youtube.com/results?search_query=' in url_lower:
+        return ("YouTube search results not allowed", "Replacing with Coursera or MIT OCW...")
+
+    # Khan Academy (NOT ALLOWED - we don't use Khan Academy anymore)
+    if 'khanacademy.org' in url_lower:
+        return ("Khan Academy not allowed", "Replacing with Coursera or MIT OCW...")
+
+    # YouTube channel homepages like youtube.com/@statquest (need specific videos/playlists)
+    if 'youtube.com/@' in url_lower and '/courses' not in url_lower:
+        return ("YouTube channel homepage not allowed", "Need specific video/playlist. Replacing...")
+
+    # False "FREE" claims (paid publishers)
+    if 'free' in text and any(publisher in url_lower for publisher in PAID_PUBLISHERS):
+        return ("Falsely labeled as FREE but URL is paid publisher",
+                "This is Packt/Manning/O'Reilly/Amazon - NOT FREE! Replacing...")
+
+    return None
+
+
 def validate_and_fix_references(
     references: List[Dict[str, str]],
     topic_id: str,
@@ -320,6 +388,11 @@ def validate_and_fix_references(
     """
     Validate reference URLs and replace broken ones with fallback references
 
+    URLs that pass the source rules are looked up in the url_status table
+    (kept fresh by the offline link audit). URLs never checked before are
+    kept and queued for a background check. With url_validation.live_checks
+    enabled, they are checked together (concurrently) instead.
+
     Args:
         references: List of reference dicts with 'text' and 'url'
         topic_id: Topic identifier for fallback selection
@@ -334,99 +407,43 @@ def validate_and_fix_references(
 
     print(f"   🔍 Validating {len(references)} reference URLs...")
 
-    for i, ref in enumerate(references):
-        url = ref.get('url', '')
-        text = ref.get('text', '').lower()
-
-        # Check for YouTube search results (NOT ALLOWED)
-        if 'youtube.com/results?search_query=' in url.lower():
-            print(f"      ⚠️  Reference {i+1}: YouTube search results not allowed ({url[:60]}...)")
-            print(f"         → Replacing with Coursera or MIT OCW...")
-
-            # Use fallback reference
-            if fallback_index < len(fallback_refs):
-                fallback_ref = fallback_refs[fallback_index]
-                print(f"         → Replaced with: {fallback_ref['url'][:60]}...")
-                validated_refs.append(fallback_ref)
-                fallback_index += 1
-            else:
-                print(f"         → Keeping original (no more fallbacks)")
-                validated_refs.append(ref)
-            continue
-
-        # Check for Khan Academy (NOT ALLOWED - we don't use Khan Academy anymore)
-        if 'khanacademy.org' in url.lower():
-            print(f"      ⚠️  Reference {i+1}: Khan Academy not allowed ({url[:60]}...)")
-            print(f"         → Replacing with Coursera or MIT OCW...")
-
-            # Use fallback reference
-            if fallback_index < len(fallback_refs):
-                fallback_ref = fallback_refs[fallback_index]
-                print(f"         → Replaced with: {fallback_ref['url'][:60]}...")
-                validated_refs.append(fallback_ref)
-                fallback_index += 1
-            else:
-                print(f"         → Keeping original (no more fallbacks)")
-                validated_refs.append(ref)
-            continue
-
-        # Check for YouTube channel homepages (NOT ALLOWED - need specific videos/playlists)
-        if 'youtube.com/@' in url.lower() and '/courses' not in url.lower():
-            # This is a channel homepage like youtube.com/@statquest
-            # We need specific videos or playlists, not channel pages
-            print(f"      ⚠️  Reference {i+1}: YouTube channel homepage not allowed ({url[:60]}...)")
-            print(f"         → Need specific video/playlist. Replacing...")
-
-            # Use fallback reference
-            if fallback_index < len(fallback_refs):
-                fallback_ref = fallback_refs[fallback_index]
-                print(f"         → Replaced with: {fallback_ref['url'][:60]}...")
-                validated_refs.append(fallback_ref)
-                fallback_index += 1
-            else:
-                print(f"         → Keeping original (no more fallbacks)")
-                validated_refs.append(ref)
-            continue
-
-        # Check for false "FREE" claims (paid publishers)
-        paid_publishers = ['packtpub.com', 'manning.com', 'oreilly.com', 'apress.com', 'amazon.com/dp', 'amazon.com/gp']
-        claims_free = 'free' in text
-        is_paid_publisher = any(publisher in url.lower() for publisher in paid_publishers)
-
-        if claims_free and is_paid_publisher:
-            print(f"      ⚠️  Reference {i+1}: Falsely labeled as FREE but URL is paid publisher ({url[:60]}...)")
-            print(f"         → This is Packt/Manning/O'Reilly/Amazon - NOT FREE! Replacing...")
-
-            # Use fallback reference
-            if fallback_index < len(fallback_refs):
-                fallback_ref = fallback_refs[fallback_index]
-                print(f"         → Replaced with truly FREE resource: {fallback_ref['url'][:60]}...")
-                validated_refs.append(fallback_ref)
-                fallback_index += 1
-            else:
-                print(f"         → Keeping original (no more fallbacks)")
-                validated_refs.append(ref)
-            continue
+    problems = [_disallowed_reference(ref.get('url', ''), ref.get('text', '').lower()) for ref in references]
+    urls = [ref.get('url', '') for ref, problem in zip(references, problems) if problem is None]
+    checker = get_url_checker()
+    if checker.settings["live_checks"]:
+        statuses = checker.check_many(urls)
+    else:
+        statuses = checker.cached_statuses(urls, include_stale=True)
+        checker.refresh_in_background([url for url in urls if url not in statuses])
 
-        # Check if URL is accessible
-        is_accessible, status_code = check_url_accessible(url)
+    for i, (ref, problem) in enumerate(zip(references, problems)):
+        url = ref.get('url', '')
 
-        if is_accessible:
-            print(f"      ✅ Reference {i+1}: {url[:60]}... (Status: {status_code})")
+        if problem is not None:
+            print(f"      ⚠️  Reference {i+1}: {problem[0]} ({url[:60]}...)")
+            print(f"         → {problem[1]}")
+        elif url not in statuses:
+            print(f"      ⏳ Reference {i+1}: {url[:60]}... (not checked yet - kept, check queued)")
             validated_refs.append(ref)
+            continue
         else:
+            is_accessible, status_code = statuses[url]
+            if is_accessible:
+                print(f"      ✅ Reference {i+1}: {url[:60]}... (Status: {status_code})")
+                validated_refs.append(ref)
+                continue
             print(f"      ❌ Reference {i+1}: {url[:60]}... (Status: {status_code}) - Using fallback")
 
-            # Use fallback reference
-            if fallback_index < len(fallback_refs):
-                fallback_ref = fallback_refs[fallback_index]
-                print(f"         → Replaced with: {fallback_ref['url'][:60]}...")
-                validated_refs.append(fallback_ref)
-                fallback_index += 1
-            else:
-                # If we run out of fallbacks, keep the original (at least the text is useful)
-                print(f"         → Keeping original (no more fallbacks)")
-                validated_refs.append(ref)
+        # Use fallback reference
+        if fallback_index < len(fallback_refs):
+            fallback_ref = fallback_refs[fallback_index]
+            print(f"         → Replaced with: {fallback_ref['url'][:60]}...")
+            validated_refs.append(fallback_ref)
+            fallback_index += 1
+        else:
+            # If we run out of fallbacks, keep the original (at least the text is useful)
+            print(f"         → Keeping original (no more fallbacks)")
+            validated_refs.append(ref)
 
     return validated_refs
 
@@ -523,28 +540,37 @@ Reframe: "{module_name}"<|eot_id|><|start_header_id|>assistant<|end_header_id|>
         agent_config = load_agent_config("agent3_content_generator")
         reframe_config = agent_config["llm_config"]["module_reframing"]
 
-        response, _ = call_llm(
-            prompt,
-            temperature=reframe_config["temperature"],
-            max_tokens=reframe_config["max_tokens"]
-        )
-        reframed = response.strip().strip('"').strip("'")
-
-        # Validate it's not too long or just the original
-        if len(reframed.split()) <= 8 and reframed != module_name:
+        def check_reframed(response: str) -> str:
+            reframed = response.strip().strip('"').strip("'")
+            # Validate it's a name, not too long (small model output is regenerated on 70B)
+            if not reframed or len(reframed.split()) > 8:
+                raise ValueError(f"Reframed name must be 1-8 words, got {len(reframed.split())}")
             return reframed
-        else:
-            return module_name
+
+        with llm_metrics.call_context(agent="agent3_content_generator", task="module_reframing"):
+            reframed, _ = call_llm_checked(
+                prompt,
+                check_reframed,
+                temperature=reframe_config["temperature"],
+                max_tokens=reframe_config["max_tokens"]
+            )
+        return reframed
     except Exception as e:
         print(f"Warning: Failed to reframe module name: {e}")
         return module_name
 
 
+def generic_module_names() -> Dict[int, str]:
+    """Placeholder names ("Module 1".."Module 8") used when names can't be generated"""
+    return {i: f"Module {i}" for i in range(1, 9)}
+
+
 def generate_module_names(
     topic_id: str,
     target_role: str = None,
     target_seniority: str = None,
-    mastery: int = 0
+    mastery: int = 0,
+    fallback: bool = True
 ) -> Dict[int, str]:
     """
     Generate names for all 8 modules in a single LLM call.
@@ -559,6 +585,9 @@ def generate_module_names(
         target_role: Target job title (e.g., "Quant Trader", "ML Engineer")
         target_seniority: Target seniority level (e.g., "Junior", "Senior")
         mastery: Current mastery percentage (0-100)
+        fallback: Return generic_module_names() when generation fails (default
+            True); with False the error is raised, so callers can tell the
+            placeholders apart and avoid persisting them
 
     Returns:
         Dictionary mapping module_id (1-8) to module names
@@ -646,98 +675,200 @@ Generate 8 DISTINCT module names for topic: {topic_id}<|eot_id|><|start_header_i
         agent_config = load_agent_config("agent3_content_generator")
         module_names_config = agent_config["llm_config"]["module_naming"]
 
-        response, _ = call_llm(
-            prompt,
-            temperature=module_names_config["temperature"],
-            max_tokens=module_names_config["max_tokens"]
-        )
-
-        # Parse JSON
-        import re
-        response_clean = response.strip()
-
-        # Extract JSON object
-        if response_clean.startswith("{"):
-            names_data = json.loads(response_clean)
-        else:
-            # Find JSON object
-            start_idx = response_clean.find("{")
-            if start_idx == -1:
-                raise ValueError("No JSON object found")
-
-            brace_count = 0
-            end_idx = start_idx
-            for i in range(start_idx, len(response_clean)):
-                if response_clean[i] == '{':
-                    brace_count += 1
-                elif response_clean[i] == '}':
-                    brace_count -= 1
-                    if brace_count == 0:
-                        end_idx = i + 1
-                        break
-
-            json_str = response_clean[start_idx:end_idx]
-            names_data = json.loads(json_str)
+        def check_names(response: str) -> Dict[str, Any]:
+            # Parse JSON and validate we have all 8 modules (else regenerated on 70B)
+            names_data, _ = extract_json(response, expect="object")
+            check_schema(names_data, MODULE_NAMES_SCHEMA, "module_names")
+            return names_data
+
+        with llm_metrics.call_context(agent="agent3_content_generator", task="module_naming"):
+            names_data, _ = call_llm_checked(
+                prompt,
+                check_names,
+                temperature=module_names_config["temperature"],
+                max_tokens=module_names_config["max_tokens"],
+                json_schema=MODULE_NAMES_SCHEMA
+            )
 
         # Convert string keys to integers
-        module_names = {int(k): v for k, v in names_data.items()}
-
-        # Validate we have all 8 modules
-        assert all(i in module_names for i in range(1, 9)), "Missing module names"
-
-        return module_names
+        return {int(k): names_data[str(k)] for k in range(1, 9)}
 
     except Exception as e:
+        if not fallback:
+            raise
         # Fallback to generic names
         print(f"Warning: Failed to generate module names: {e}")
-        return {i: f"Module {i}" for i in range(1, 9)}
+        return generic_module_names()
 
 
-def clean_json_string(json_str: str) -> str:
+class ContentStreamParser:
     """
-    Clean JSON string by fixing common LLM JSON formatting errors
+    Incremental parser that extracts a top-level JSON string field while the
+    response is still streaming (used to render "content" before the JSON closes)
+
+    Single pass, O(1) work per character, state kept across feed() calls.
+    Escapes are decoded like json.loads; invalid escapes (LaTeX \\sigma) are kept
+    verbatim, matching what clean_json_string produces after the final parse.
+    """
+
+    _ESCAPES = {'"': '"', '\\': '\\', '/': '/', 'b': '\b', 'f': '\f', 'n': '\n', 'r': '\r', 't': '\t'}
+
+    def __init__(self, field: str = "content"):
+        self.field = field
+        self.depth = 0
+        self.in_string = False
+        self.escape = False
+        self.unicode_digits = None      # Pending \uXXXX hex digits
+        self.expect_key = False         # Next depth-1 string is an object key
+        self.current_key = None
+        self.token = []                 # Chars of the string being read
+        self.capturing = False
+        self.done = False
+        self.value = []                 # Decoded chars of the target field
+
+    def feed(self, chunk: str) -> str:
+        """
+        Consume the next chunk of the response
+
+        Returns:
+            Decoded value of the target field so far ("" until it starts)
+        """
+        for char in chunk:
+            if self.done:
+                break
+            if self.in_string:
+                self._string_char(char)
+            elif char == '"':
+                self.in_string = True
+                self.token = []
+                self.capturing = (
+                    self.depth == 1 and not self.expect_key and self.current_key == self.field
+                )
+            elif char in '{[':
+                self.depth += 1
+                self.expect_key = char == '{' and self.depth == 1
+            elif char in '}]':
+                self.depth -= 1
+            elif char == ',' and self.depth == 1:
+                self.expect_key = True
+            elif char == ':' and self.depth == 1:
+                self.expect_key = False
+        return "".join(self.value)
+
+    def _string_char(self, char: str) -> None:
+        if self.unicode_digits is not None:
+            self.unicode_digits += char
+            if len(self.unicode_digits) == 4:
+                try:
+                    self._emit(chr(int(self.unicode_digits, 16)))
+                except ValueError:
+                    self._emit('\\u' + self.unicode_digits)
+                self.unicode_digits = None
+        elif self.escape:
+            self.escape = False
+            if char == 'u':
+                self.unicode_digits = ""
+            else:
+                self._emit(self._ESCAPES.get(char, '\\' + char))
+        elif char == '\\':
+            self.escape = True
+        elif char == '"':
+            self.in_string = False
+            if self.capturing:
+                self.done = True
+            elif self.depth == 1 and self.expect_key:
+                self.current_key = "".join(self.token)
+        else:
+            self._emit(char)
 
-    LLMs sometimes output JSON with:
-    1. Literal newlines in string values (invalid)
-    2. Invalid escape sequences like \$ or LaTeX \frac, \sigma (should be escaped)
-    3. Bold markdown ** mixed with escaped chars
+    def _emit(self, text: str) -> None:
+        if self.capturing:
+            self.value.append(text)
+        elif self.depth == 1 and self.expect_key:
+            self.token.append(text)
 
-    This function cleans these issues to make JSON parseable while preserving
-    LaTeX rendering (e.g., \sigma becomes \\sigma in JSON, which parses to \sigma).
+
+def _stream_response(prompt: str, llm_config: Dict[str, Any], on_content: Callable[[str], None]) -> str:
+    """Stream the LLM response, reporting the partial "content" field as it grows"""
+    parser = ContentStreamParser("content")
+    chunks = []
+    rendered = ""
+
+    for chunk in stream_llm(
+        prompt,
+        temperature=llm_config["temperature"],
+        max_tokens=llm_config["max_tokens"],
+        json_schema=MODULE_CONTENT_SCHEMA
+    ):
+        chunks.append(chunk)
+        partial = parser.feed(chunk)
+        if partial != rendered:
+            rendered = partial
+            on_content(partial)
+
+    return "".join(chunks)
+
+
+# =============================================================================
+# TEMPLATE CACHE - Module content shared by users with the same profile bucket
+# =============================================================================
+
+def get_template_cache_settings() -> Dict[str, Any]:
+    """Template cache settings from agent3 config (disabled if missing)"""
+    settings = load_agent_config("agent3_content_generator").get("template_cache", {})
+    return {
+        "enabled": settings.get("enabled", False),
+        "depth_bucket_size": settings.get("depth_bucket_size", 0.1)
+    }
+
+
+def get_depth_bucket(depth_score: float, bucket_size: float = 0.1) -> float:
+    """
+    Quantize a depth score into its bucket (lower bound)
+
+    Example:
+        >>> get_depth_bucket(0.47, 0.1)
+        0.4
     """
-    import re
+    return round(math.floor(depth_score / bucket_size + 1e-9) * bucket_size, 4)
 
-    # Step 1: Replace literal newlines with space
-    cleaned = json_str.replace('\r\n', ' ').replace('\n', ' ').replace('\r', ' ')
 
-    # Step 2: Fix ALL invalid escape sequences using regex
-    # JSON only allows: \" \\ \/ \b \f \n \r \t \uXXXX
-    # Any other \X is invalid and needs to be \\X for JSON parsing
-    # This preserves LaTeX: \sigma -> \\sigma in JSON -> \sigma after parsing
-    
-    def fix_escape(match):
-        full_match = match.group(0)  # e.g., \sigma, \$, \"
-        char = match.group(1)        # e.g., s, $, "
-        
-        # Valid JSON escapes - leave alone
-        if char in '"\\bfnrt/':
-            return full_match
-        # Unicode escape \uXXXX - leave alone  
-        if char == 'u':
-            return full_match
-        # Everything else (LaTeX \sigma, \frac, etc.) - double the backslash
-        # This turns \sigma into \\sigma in JSON string
-        # When JSON parses \\sigma, it becomes \sigma in the actual string
-        # Then LaTeX/Markdown can render \sigma as σ
-        return '\\\\' + char
-    
-    # Match backslash followed by any character
-    cleaned = re.sub(r'\\(.)', fix_escape, cleaned)
+def _normalize_key_part(value: str) -> str:
+    return " ".join(str(value or "").lower().split())
+
 
-    # Step 3: Normalize whitespace
-    cleaned = re.sub(r'\s+', ' ', cleaned)
+def make_template_key(
+    topic_id: str,
+    module_id: int,
+    module_name: str,
+    target_role: str,
+    user_tier: int,
+    depth_bucket: float
+) -> str:
+    """Template cache key (module name and role are case/whitespace normalized)"""
+    payload = json.dumps([
+        topic_id, module_id, _normalize_key_part(module_name),
+        _normalize_key_part(target_role), user_tier, depth_bucket
+    ])
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
 
-    return cleaned
+
+def _content_from_template(
+    template: Dict[str, Any],
+    target_role: str,
+    module_name: str,
+    user_tier: int
+) -> Dict[str, Any]:
+    """Copy template content, re-selecting golden references for this user"""
+    content_data = copy.deepcopy(template)
+    golden_refs = get_golden_resources(
+        target_role=target_role,
+        module_name=template.get("module_name") or module_name,
+        user_tier=user_tier
+    )
+    if golden_refs:
+        content_data["references"] = golden_refs
+    return content_data
 
 
 def generate_content(
@@ -746,7 +877,8 @@ def generate_content(
     module_name: str = None,
     depth_score: float = 0.5,
     user_context: Dict[str, Any] = None,
-    all_module_names: Dict[int, str] = None
+    all_module_names: Dict[int, str] = None,
+    on_content: Callable[[str], None] = None
 ) -> Dict[str, Any]:
     """
     Generate educational content and 3 questions for a topic module
@@ -768,6 +900,8 @@ def generate_content(
             - mastery: Current mastery % for this topic (0-100)
         all_module_names: Dictionary mapping module_id (1-8) to module names.
             Used to prevent content overlap between modules.
+        on_content: Optional callback for streaming. When given, the response is
+            streamed and called with the partial "content" markdown as it arrives.
 
     Returns:
         Dictionary with:
@@ -777,8 +911,12 @@ def generate_content(
         - questions: List of 3 question dicts with id, text, correct_answer, explanation
         - references: List of quality learning resources
 
+        Over the user's token budget, the closest template is returned instead
+        with quota_fallback=True (callers should not persist it for the user).
+
     Raises:
         ValueError: If LLM returns invalid JSON or missing fields
+        QuotaExceededError: If over budget and no template exists for the module
     """
     # Get depth instructions
     depth_instructions = get_depth_instructions(depth_score)
@@ -806,6 +944,23 @@ def generate_content(
     # BUT: DO NOT reframe foundational modules (depth < foundational_threshold or contains keywords)
     original_module_name = module_name if module_name else f"Module {module_id}"
 
+    # Template cache: same topic/module/role/tier/depth bucket → reuse content (no LLM call)
+    user_tier = determine_user_tier(ctx["mastery"], ctx["target_seniority"])
+    template_settings = get_template_cache_settings()
+    template_key = None
+    if template_settings["enabled"]:
+        depth_bucket = get_depth_bucket(depth_score, template_settings["depth_bucket_size"])
+        template_key = make_template_key(
+            topic_id, module_id, original_module_name, ctx["target_job_title"], user_tier, depth_bucket
+        )
+        template = database.get_module_template(template_key)
+        if template is not None:
+            print(f"   ♻️  Template hit: '{original_module_name}' (tier {user_tier}, depth bucket {depth_bucket})")
+            content_data = _content_from_template(template, ctx["target_job_title"], original_module_name, user_tier)
+            if on_content is not None:
+                on_content(content_data.get("content", ""))
+            return content_data
+
     # Load thresholds from config
     thresholds = load_thresholds()
     content_config = thresholds["content_personalization"]
@@ -860,147 +1015,74 @@ def generate_content(
         all_module_names=curriculum_str
     )
 
-    # Load LLM config and call LLM
-    agent_config = load_agent_config("agent3_content_generator")
-    content_gen_config = agent_config["llm_config"]["content_generation"]
-    response, tokens = call_llm(
-        prompt,
-        temperature=content_gen_config["temperature"],
-        max_tokens=content_gen_config["max_tokens"]
-    )
-
     # Parse JSON from response
-    import re
     import logging
 
     logger = logging.getLogger(__name__)
-    response_clean = response.strip()
 
+    def check_content(response: str) -> Dict[str, Any]:
+        try:
+            content_data, strategy = extract_json(response, expect="object")
+            if strategy != "direct":
+                print(f"   🧩 Content JSON extracted via {strategy}")
+        except ValueError as e:
+            logger.error(f"JSON extraction failed: {e}")
+            logger.debug(f"Response: {response[:500]}")
+            print(f"\n=== EXTRACTION ERROR ===")
+            print(f"Error: {e}")
+            print(f"Full Response:\n{response}\n")
+            print(f"========================\n")
+            raise ValueError(f"Failed to extract JSON: {e}")
+
+        # Validate structure (3 questions, 2+ references, 3-5 key concepts)
+        content_data = check_schema(content_data, MODULE_CONTENT_SCHEMA, "content")
+
+        for i, ref in enumerate(content_data["references"]):
+            # Legacy string references are allowed for backward compatibility
+            if isinstance(ref, dict):
+                assert ref["url"].startswith("http"), f"Reference {i} URL must start with http"
+        return content_data
+
+    # Load LLM config and call LLM
+    agent_config = load_agent_config("agent3_content_generator")
+    content_gen_config = agent_config["llm_config"]["content_generation"]
     try:
-        # Helper function to parse JSON with fallback to cleaning
-        def parse_json_with_fallback(json_str: str) -> dict:
-            """Try direct parse, fall back to clean_json_string if needed."""
-            try:
-                return json.loads(json_str)
-            except json.JSONDecodeError as e:
-                logger.warning(f"JSON decode failed ({e}), attempting to clean JSON string")
-                json_str_clean = clean_json_string(json_str)
-                return json.loads(json_str_clean)
-        
-        # Method 1: Direct parse if starts with {
-        if response_clean.startswith("{"):
-            content_data = parse_json_with_fallback(response_clean)
-
-        # Method 2: Extract from markdown code block
-        elif "```json" in response_clean or "```" in response_clean:
-            # Extract JSON from markdown code block
-            match = re.search(r'```(?:json)?\s*(\{.*?\})\s*```', response_clean, re.DOTALL)
-            if match:
-                json_str = match.group(1)
-                content_data = parse_json_with_fallback(json_str)
+        with llm_metrics.call_context(agent="agent3_content_generator", task="content_generation"):
+            if on_content is not None:
+                response = _stream_response(prompt, content_gen_config, on_content)
+                try:
+                    content_data = check_content(response)
+                except (ValueError, AssertionError):
+                    # The stream was cached as it finished - don't replay a rejected response
+                    discard_cached_response(
+                        prompt,
+                        temperature=content_gen_config["temperature"],
+                        max_tokens=content_gen_config["max_tokens"],
+                        json_schema=MODULE_CONTENT_SCHEMA
+                    )
+                    raise
             else:
-                raise ValueError("Found code block but couldn't extract JSON")
-
-        # Method 3: Find JSON object using brace matching
-        else:
-            start_idx = response_clean.find("{")
-            if start_idx == -1:
-                logger.error(f"No JSON object found in response: {response[:300]}")
-                raise ValueError("Response contains no JSON object")
-
-            # Count braces to find matching }
-            brace_count = 0
-            end_idx = start_idx
-            for i in range(start_idx, len(response_clean)):
-                if response_clean[i] == '{':
-                    brace_count += 1
-                elif response_clean[i] == '}':
-                    brace_count -= 1
-                    if brace_count == 0:
-                        end_idx = i + 1
-                        break
-
-            if brace_count != 0:
-                logger.error(f"Unmatched braces in response: {response[:300]}")
-                raise ValueError("Unmatched braces in JSON object")
-
-            json_str = response_clean[start_idx:end_idx]
-            content_data = parse_json_with_fallback(json_str)
-
-    except json.JSONDecodeError as e:
-        logger.error(f"JSON decode failed: {e}")
-        logger.debug(f"Response: {response[:500]}")
-        print(f"\n=== JSON DECODE ERROR ===")
-        print(f"Error: {e}")
-        print(f"Full Response:\n{response}\n")
-        print(f"=========================\n")
-        raise ValueError(f"LLM returned invalid JSON: {e}")
-    except Exception as e:
-        logger.error(f"JSON extraction failed: {e}")
-        logger.debug(f"Response: {response[:500]}")
-        print(f"\n=== EXTRACTION ERROR ===")
-        print(f"Error: {e}")
-        print(f"Full Response:\n{response}\n")
-        print(f"========================\n")
-        raise ValueError(f"Failed to extract JSON: {e}")
-
-    # =========================================================================
-    # TRUNCATION DETECTION - Check if content appears to be cut off
-    # =========================================================================
-    content_text = content_data.get("content", "") if isinstance(content_data.get("content"), str) else ""
-    word_count = len(content_text.split())
-    
-    # Detect potential truncation indicators
-    truncation_indicators = [
-        "..." in content_text[-50:] if len(content_text) > 50 else False,  # Ellipsis at end
-        content_text.rstrip().endswith((",", ":", "-", "(")),  # Cut off mid-sentence
-        word_count < 300,  # Significantly below 600-700 word target
-    ]
-    
-    if any(truncation_indicators) and word_count < 400:
-        logger.warning(f"⚠️  POSSIBLE TRUNCATION DETECTED: Content has only {word_count} words (target: 600-700)")
-        print(f"\n   ⚠️  WARNING: Content may be truncated ({word_count} words, target: 600-700)")
-        print(f"   Consider increasing max_tokens in agent3_content_generator.yaml")
-    
-    # Validate structure
-    assert isinstance(content_data, dict), "Content must be object"
-    assert "module_name" in content_data, "Missing 'module_name' field"
-    assert "content" in content_data, "Missing 'content' field"
-    assert "key_concepts" in content_data, "Missing 'key_concepts' field"
-    assert "questions" in content_data, "Missing 'questions' field"
-    assert "references" in content_data, "Missing 'references' field"
-
-    # Validate questions
-    questions = content_data["questions"]
-    assert isinstance(questions, list), "Questions must be array"
-    assert len(questions) == 3, f"Must have exactly 3 questions, got {len(questions)}"
-
-    for i, q in enumerate(questions):
-        assert isinstance(q, dict), f"Question {i} must be object"
-        assert "id" in q, f"Question {i} missing 'id'"
-        assert "text" in q, f"Question {i} missing 'text'"
-        assert "correct_answer" in q, f"Question {i} missing 'correct_answer'"
-        assert "explanation" in q, f"Question {i} missing 'explanation'"
-
-    # Validate references
-    references = content_data["references"]
-    assert isinstance(references, list), "References must be array"
-    assert len(references) >= 2, f"Must have at least 2 references, got {len(references)}"
-
-    # Validate each reference has text and url
-    for i, ref in enumerate(references):
-        if isinstance(ref, dict):
-            assert "text" in ref, f"Reference {i} missing 'text' field"
-            assert "url" in ref, f"Reference {i} missing 'url' field"
-            assert ref["url"].startswith("http"), f"Reference {i} URL must start with http"
-        # Allow legacy string format for backward compatibility
-        elif not isinstance(ref, str):
-            raise AssertionError(f"Reference {i} must be dict with text/url or string")
-
-    # Validate key concepts
-    key_concepts = content_data["key_concepts"]
-    assert isinstance(key_concepts, list), "Key concepts must be array"
-    assert 3 <= len(key_concepts) <= 5, f"Must have 3-5 key concepts, got {len(key_concepts)}"
+                content_data, tokens = call_llm_checked(
+                    prompt,
+                    check_content,
+                    temperature=content_gen_config["temperature"],
+                    max_tokens=content_gen_config["max_tokens"],
+                    json_schema=MODULE_CONTENT_SCHEMA
+                )
+    except QuotaExceededError:
+        # Over budget: serve the closest shared template for this module if there is one
+        template = database.find_module_template(
+            topic_id, module_id, original_module_name,
+            get_depth_bucket(depth_score, template_settings["depth_bucket_size"])
+        )
+        if template is None:
+            raise
+        print(f"   💸 Token budget reached - serving closest template for '{original_module_name}'")
+        content_data = _content_from_template(template, ctx["target_job_title"], original_module_name, user_tier)
+        content_data["quota_fallback"] = True
+        if on_content is not None:
+            on_content(content_data.get("content", ""))
+        return content_data
 
     # =========================================================================
     # REPLACE LLM REFERENCES WITH GOLDEN RESOURCES (NO HALLUCINATION)
@@ -1009,12 +1091,9 @@ def generate_content(
     # we completely replace them with curated, verified resources
     print(f"\n   📚 Using Golden Resources (no LLM hallucination):")
     
-    # Determine user tier from context
+    # User tier was determined from context above (also part of the template key)
     target_role = ctx.get("target_job_title", "Quant Analyst")
-    target_seniority = ctx.get("target_seniority", "Intermediate")
-    mastery = ctx.get("mastery", 50)
-    user_tier = determine_user_tier(mastery, target_seniority)
-    
+
     # Get golden resources based on role, module, and tier
     golden_refs = get_golden_resources(
         target_role=target_role,
@@ -1035,6 +1114,12 @@ def generate_content(
         )
         content_data["references"] = validated_references
 
+    if template_key is not None:
+        database.save_module_template(
+            template_key, topic_id, module_id, original_module_name,
+            ctx["target_job_title"], user_tier, depth_bucket, content_data
+        )
+
     return content_data
 
 
@@ -9,7 +9,10 @@ from pathlib import Path
 from typing import Dict, List, Any, Optional
 from datetime import datetime, timedelta
 from src.core import database
-from src.core.llm_engine import call_llm
+from src.core import llm_metrics
+from src.core.llm_engine import call_llm_checked
+from src.core.json_extractor import extract_json
+from src.core.schemas import TOPICS_SCHEMA, Topic, check_schema
 from src.core import load_agent_config, load_prompts
 
 
@@ -34,10 +37,13 @@ def get_recent_skills(user_id: int, days: int = 30) -> List[str]:
         return [row['topic_id'] for row in cursor.fetchall()]
 
 
-def validate_topics_json(topics: Any) -> List[Dict[str, Any]]:
+def validate_topics_json(topics: Any) -> List[Topic]:
     """
     Validate topics JSON structure
 
+    Structure is checked against TOPICS_SCHEMA first, so the rules below work on
+    typed Topic objects.
+
     Args:
         topics: Parsed JSON (should be list of dicts)
 
@@ -45,14 +51,22 @@ def validate_topics_json(topics: Any) -> List[Dict[str, Any]]:
         Validated topics list
 
     Raises:
-        AssertionError: If validation fails
+        AssertionError: If the structure doesn't match TOPICS_SCHEMA
         ValueError: If prereq chain is invalid
     """
-    assert isinstance(topics, list), "Topics must be array"
+    try:
+        topics = check_schema(topics, TOPICS_SCHEMA, "topics")
+    except AssertionError as e:
+        print(f"\n=== VALIDATION ERROR ===")
+        print(f"All topics: {topics}")
+        print(f"Error: {e}")
+        print(f"========================\n")
+        raise
+
     valid_difficulties = ["foundational", "intermediate", "advanced"]
 
     # Build ID set for fast lookup
-    topic_ids = [t.get("id") for t in topics if isinstance(t, dict)]
+    topic_ids = [t["id"] for t in topics]
     topic_id_set = set(topic_ids)
 
     # Fix #5: Check for duplicate IDs
@@ -60,34 +74,18 @@ def validate_topics_json(topics: Any) -> List[Dict[str, Any]]:
     if duplicates:
         raise ValueError(f"Duplicate topic IDs found: {duplicates}")
 
-    for i, topic in enumerate(topics):
-        try:
-            assert isinstance(topic, dict), f"Topic {i} must be object, got: {type(topic).__name__}"
-            assert "id" in topic, f"Topic {i} missing 'id' field. Keys: {list(topic.keys())}"
-            assert "prereq" in topic, f"Topic {i} missing 'prereq' field. Keys: {list(topic.keys())}"
-            assert "difficulty" in topic, f"Topic {i} missing 'difficulty' field. Keys: {list(topic.keys())}"
-
-            # Auto-fix: Handle list prereqs (8B model error - takes first item)
-            if isinstance(topic["prereq"], list):
-                print(f"  ⚠️  Fixing list prereq: {topic['prereq']} → {topic['prereq'][0] if topic['prereq'] else None} for '{topic['id']}'")
-                topic["prereq"] = topic["prereq"][0] if topic["prereq"] else None
-
-            # Auto-fix: Map invalid difficulties to valid ones
-            if topic["difficulty"] not in valid_difficulties:
-                difficulty_map = {"expert": "advanced", "basic": "foundational", "beginner": "foundational"}
-                new_difficulty = difficulty_map.get(topic["difficulty"], "intermediate")
-                print(f"  ⚠️  Fixing difficulty: '{topic['difficulty']}' → '{new_difficulty}' for '{topic['id']}'")
-                topic["difficulty"] = new_difficulty
-
-            assert topic["difficulty"] in valid_difficulties, f"Topic {i} invalid difficulty: {topic['difficulty']}"
-        except AssertionError as e:
-            print(f"\n=== VALIDATION ERROR ===")
-            print(f"Topic index: {i}")
-            print(f"Topic value: {topic}")
-            print(f"All topics: {topics}")
-            print(f"Error: {e}")
-            print(f"========================\n")
-            raise
+    for topic in topics:
+        # Auto-fix: Handle list prereqs (8B model error - takes first item)
+        if isinstance(topic["prereq"], list):
+            print(f"  ⚠️  Fixing list prereq: {topic['prereq']} → {topic['prereq'][0] if topic['prereq'] else None} for '{topic['id']}'")
+            topic["prereq"] = topic["prereq"][0] if topic["prereq"] else None
+
+        # Auto-fix: Map invalid difficulties to valid ones
+        if topic["difficulty"] not in valid_difficulties:
+            difficulty_map = {"expert": "advanced", "basic": "foundational", "beginner": "foundational"}
+            new_difficulty = difficulty_map.get(topic["difficulty"], "intermediate")
+            print(f"  ⚠️  Fixing difficulty: '{topic['difficulty']}' → '{new_difficulty}' for '{topic['id']}'")
+            topic["difficulty"] = new_difficulty
 
         # Check for self-reference
         if topic["prereq"] == topic["id"]:
@@ -132,7 +130,7 @@ def load_prompt_template() -> str:
     return prompts["job_parser_prompt"]
 
 
-def parse_jobs(user_id: int, form_data: Dict[str, str]) -> List[Dict[str, Any]]:
+def parse_jobs(user_id: int, form_data: Dict[str, str]) -> List[Topic]:
     """
     Parse job form data and extract learning topics using Llama 3.3 70B
 
@@ -176,80 +174,37 @@ def parse_jobs(user_id: int, form_data: Dict[str, str]) -> List[Dict[str, Any]]:
     # Load LLM config and call LLM
     agent_config = load_agent_config("agent1_job_parser")
     llm_config = agent_config["llm_config"]
-    response, tokens = call_llm(
-        prompt,
-        temperature=llm_config["temperature"],
-        max_tokens=llm_config["max_tokens"]
-    )
-
     # Parse JSON from response with robust extraction
-    import re
     import logging
 
     logger = logging.getLogger(__name__)
-    response_clean = response.strip()
 
-    try:
-        # Method 1: Direct parse if starts with [
-        if response_clean.startswith("["):
-            topics = json.loads(response_clean)
-
-        # Method 2: Extract from markdown code block
-        elif "```json" in response_clean or "```" in response_clean:
-            match = re.search(r'```(?:json)?\s*(\[.*?\])\s*```', response_clean, re.DOTALL)
-            if match:
-                topics = json.loads(match.group(1))
-            else:
-                raise ValueError("Found code block but couldn't extract JSON")
-
-        # Method 3: Find JSON array using bracket matching
-        else:
-            # Find first [ and match brackets
-            start_idx = response_clean.find("[")
-            if start_idx == -1:
-                logger.error(f"No JSON array found in response: {response[:300]}")
-                raise ValueError("Response contains no JSON array")
-
-            # Count brackets to find matching ]
-            bracket_count = 0
-            end_idx = start_idx
-            for i in range(start_idx, len(response_clean)):
-                if response_clean[i] == '[':
-                    bracket_count += 1
-                elif response_clean[i] == ']':
-                    bracket_count -= 1
-                    if bracket_count == 0:
-                        end_idx = i + 1
-                        break
-
-            if bracket_count != 0:
-                logger.error(f"Unmatched brackets in response: {response[:300]}")
-                raise ValueError("Unmatched brackets in JSON array")
-
-            json_str = response_clean[start_idx:end_idx]
-            topics = json.loads(json_str)
-
-    except json.JSONDecodeError as e:
-        logger.error(f"JSON decode failed: {e}")
-        logger.debug(f"Response: {response[:500]}")
-        # Print for debugging
-        print(f"\n=== JSON DECODE ERROR ===")
-        print(f"Error: {e}")
-        print(f"Full Response:\n{response}\n")
-        print(f"=========================\n")
-        raise ValueError(f"LLM returned invalid JSON: {e}")
-    except Exception as e:
-        logger.error(f"JSON extraction failed: {e}")
-        logger.debug(f"Response: {response[:500]}")
-        # Print for debugging
-        print(f"\n=== EXTRACTION ERROR ===")
-        print(f"Error: {e}")
-        print(f"Full Response:\n{response}\n")
-        print(f"========================\n")
-        raise ValueError(f"Failed to extract JSON: {e}")
-
-    # Validate structure
-    topics = validate_topics_json(topics)
+    def check_topics(response: str) -> List[Dict[str, Any]]:
+        try:
+            topics, strategy = extract_json(response, expect="array")
+            logger.debug(f"Topics JSON extracted ({strategy})")
+        except ValueError as e:
+            logger.error(f"JSON extraction failed: {e}")
+            logger.debug(f"Response: {response[:500]}")
+            # Print for debugging
+            print(f"\n=== EXTRACTION ERROR ===")
+            print(f"Error: {e}")
+            print(f"Full Response:\n{response}\n")
+            print(f"========================\n")
+            raise ValueError(f"Failed to extract JSON: {e}")
+
+        # Validate structure
+        return validate_topics_json(topics)
+
+    # Only validated responses are cached, so a retry never replays a rejected one
+    with llm_metrics.call_context(agent="agent1_job_parser", user_id=user_id):
+        topics, tokens = call_llm_checked(
+            prompt,
+            check_topics,
+            temperature=llm_config["temperature"],
+            max_tokens=llm_config["max_tokens"],
+            json_schema=TOPICS_SCHEMA
+        )
 
     return topics
 
@@ -7,7 +7,10 @@ import json
 import yaml
 from pathlib import Path
 from typing import List, Dict, Any
-from src.core.llm_engine import call_llm
+from src.core import llm_metrics
+from src.core.llm_engine import call_llm_checked
+from src.core.json_extractor import extract_json
+from src.core.schemas import ASSESSED_TOPICS_SCHEMA, AssessedTopic, check_schema
 from src.agents.job_parser import get_recent_skills
 from src.core import load_agent_config, load_prompts
 
@@ -18,7 +21,7 @@ def load_assessor_prompt() -> str:
     return prompts["topic_assessor_prompt"]
 
 
-def assess_topics(user_id: int, topics: List[Dict[str, Any]], current_job_context: str = "") -> List[Dict[str, Any]]:
+def assess_topics(user_id: int, topics: List[Dict[str, Any]], current_job_context: str = "") -> List[AssessedTopic]:
     """
     Break down topics into subtopics with mastery and hours estimation
 
@@ -63,94 +66,38 @@ def assess_topics(user_id: int, topics: List[Dict[str, Any]], current_job_contex
     # Load LLM config and call LLM
     agent_config = load_agent_config("agent2_topic_assessor")
     llm_config = agent_config["llm_config"]
-    response, tokens = call_llm(
-        prompt,
-        temperature=llm_config["temperature"],
-        max_tokens=llm_config["max_tokens"]
-    )
-
     # Parse JSON response
-    import re
     import logging
 
     logger = logging.getLogger(__name__)
-    response_clean = response.strip()
-
-    try:
-        # Method 1: Direct parse if starts with [
-        if response_clean.startswith("["):
-            assessed_topics = json.loads(response_clean)
-
-        # Method 2: Extract from markdown code block
-        elif "```json" in response_clean or "```" in response_clean:
-            match = re.search(r'```(?:json)?\s*(\[.*?\])\s*```', response_clean, re.DOTALL)
-            if match:
-                assessed_topics = json.loads(match.group(1))
-            else:
-                raise ValueError("Found code block but couldn't extract JSON")
-
-        # Method 3: Find JSON array using bracket matching
-        else:
-            start_idx = response_clean.find("[")
-            if start_idx == -1:
-                logger.error(f"No JSON array found in response: {response[:300]}")
-                raise ValueError("Response contains no JSON array")
-
-            # Count brackets to find matching ]
-            bracket_count = 0
-            end_idx = start_idx
-            for i in range(start_idx, len(response_clean)):
-                if response_clean[i] == '[':
-                    bracket_count += 1
-                elif response_clean[i] == ']':
-                    bracket_count -= 1
-                    if bracket_count == 0:
-                        end_idx = i + 1
-                        break
-
-            if bracket_count != 0:
-                logger.error(f"Unmatched brackets in response: {response[:300]}")
-                raise ValueError("Unmatched brackets in JSON array")
-
-            json_str = response_clean[start_idx:end_idx]
-            assessed_topics = json.loads(json_str)
-
-    except json.JSONDecodeError as e:
-        logger.error(f"JSON decode failed: {e}")
-        raise ValueError(f"LLM returned invalid JSON: {e}\nResponse: {response[:300]}")
-    except Exception as e:
-        logger.error(f"JSON extraction failed: {e}")
-        raise ValueError(f"Failed to extract JSON: {e}\nResponse: {response[:300]}")
-
-    # Validate structure
-    assessed_topics = validate_assessed_topics(assessed_topics)
-
-    return assessed_topics
 
+    def check_assessment(response: str) -> List[AssessedTopic]:
+        try:
+            assessed_topics, strategy = extract_json(response, expect="array")
+            logger.debug(f"Assessment JSON extracted ({strategy})")
+        except ValueError as e:
+            logger.error(f"JSON extraction failed: {e}")
+            raise ValueError(f"Failed to extract JSON: {e}\nResponse: {response[:300]}")
+
+        # Validate structure
+        return validate_assessed_topics(assessed_topics)
+
+    # Only validated responses are cached, so a retry never replays a rejected one
+    with llm_metrics.call_context(agent="agent2_topic_assessor", user_id=user_id):
+        assessed_topics, tokens = call_llm_checked(
+            prompt,
+            check_assessment,
+            temperature=llm_config["temperature"],
+            max_tokens=llm_config["max_tokens"],
+            json_schema=ASSESSED_TOPICS_SCHEMA
+        )
 
-def validate_assessed_topics(assessed_topics: Any) -> List[Dict[str, Any]]:
-    """Validate assessed topics structure"""
-    assert isinstance(assessed_topics, list), "Assessed topics must be array"
-
-    for i, topic in enumerate(assessed_topics):
-        assert isinstance(topic, dict), f"Topic {i} must be object"
-        assert "topic_id" in topic, f"Topic {i} missing 'topic_id'"
-        assert "mastery" in topic, f"Topic {i} missing 'mastery'"
-        assert "modules_complete" in topic, f"Topic {i} missing 'modules_complete'"
-        assert "estimated_hours" in topic, f"Topic {i} missing 'estimated_hours'"
-        assert "subtopics" in topic, f"Topic {i} missing 'subtopics'"
-
-        # Validate mastery range
-        assert 0 <= topic["mastery"] <= 100, f"Topic {i} mastery must be 0-100, got {topic['mastery']}"
+    return assessed_topics
 
-        # Validate subtopics
-        assert isinstance(topic["subtopics"], list), f"Topic {i} subtopics must be array"
-        for j, subtopic in enumerate(topic["subtopics"]):
-            assert isinstance(subtopic, dict), f"Topic {i} subtopic {j} must be object"
-            assert "id" in subtopic, f"Topic {i} subtopic {j} missing 'id'"
-            assert "hours" in subtopic, f"Topic {i} subtopic {j} missing 'hours'"
 
-    return assessed_topics
+def validate_assessed_topics(assessed_topics: Any) -> List[AssessedTopic]:
+    """Validate assessed topics structure (mastery 0-100, subtopics with id/hours)"""
+    return check_schema(assessed_topics, ASSESSED_TOPICS_SCHEMA, "assessed_topics")
 
 
 def calculate_global_readiness(assessed_topics: List[Dict[str, Any]]) -> float:
@@ -4,12 +4,14 @@ from .config_loader import (
     load_prompts,
     load_thresholds,
     load_learning_resources,
+    load_llm_config,
     clear_cache
 )
 from .calculators import (
     calculate_depth_score,
     get_seniority_level,
-    is_foundational_content
+    is_foundational_content,
+    calculate_topic_progress
 )
 # Note: database and llm_engine don't export functions, they're imported directly
 
@@ -18,8 +20,10 @@ __all__ = [
     "load_prompts",
     "load_thresholds",
     "load_learning_resources",
+    "load_llm_config",
     "clear_cache",
     "calculate_depth_score",
     "get_seniority_level",
-    "is_foundational_content"
+    "is_foundational_content",
+    "calculate_topic_progress"
 ]
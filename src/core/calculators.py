@@ -3,9 +3,15 @@
 Core calculation functions for learn_flow
 Depth scoring, mastery estimation, and other mathematical operations
 """
-from typing import Dict, Any
+from typing import Dict, Any, List
+import numpy as np
 from src.core import load_thresholds
 
+MODULES_PER_TOPIC = 8
+
+# Progress buckets used by the Learn tab kanban board
+PROGRESS_BUCKETS = ("to_start", "in_progress", "nearly_done", "mastered")
+
 
 def calculate_depth_score(target_seniority: str, initial_mastery: int, module_id: int) -> float:
     """
@@ -111,3 +117,60 @@ def is_foundational_content(depth_score: float, module_name: str = "") -> bool:
             return True
 
     return False
+
+
+def topic_mastery(initial_mastery, modules_done, modules_per_topic: int = MODULES_PER_TOPIC):
+    """
+    Topic mastery (0-100) after modules_done modules, each closing 1/modules_per_topic of the gap
+
+    Element-wise on NumPy arrays (returns an int array), int for scalars.
+
+    Example:
+        >>> topic_mastery(20, 2)
+        40
+    """
+    points_per_module = (100 - initial_mastery) / float(modules_per_topic)
+    mastery = np.minimum(np.trunc(initial_mastery + modules_done * points_per_module), 100)
+    return mastery.astype(int) if isinstance(mastery, np.ndarray) else int(mastery)
+
+
+def calculate_topic_progress(
+    topics: List[Dict[str, Any]],
+    completed_by_topic: Dict[str, List[int]],
+    modules_per_topic: int = MODULES_PER_TOPIC
+) -> Dict[str, np.ndarray]:
+    """
+    Calculate updated mastery, gap and progress bucket for all topics at once
+
+    Each completed module closes 1/modules_per_topic of the gap between the
+    initial mastery and 100%.
+
+    Args:
+        topics: Topic dicts with 'topic_id' and initial 'mastery' (0-100)
+        completed_by_topic: topic_id -> completed module IDs
+            (from database.get_completed_modules_by_topic)
+        modules_per_topic: Modules per topic
+
+    Returns:
+        Dict of arrays aligned with topics: 'mastery' (int, 0-100),
+        'modules_done', 'gap' (100 - mastery) and 'bucket' (index into
+        PROGRESS_BUCKETS: <=25, <=75, <100, 100)
+
+    Example:
+        >>> calculate_topic_progress([{"topic_id": "sql", "mastery": 20}], {"sql": [1, 2]})["mastery"]
+        array([40])
+    """
+    initial = np.array([topic.get('mastery', 0) for topic in topics], dtype=float)
+    modules_done = np.array(
+        [len(completed_by_topic.get(topic['topic_id'], [])) for topic in topics], dtype=int
+    )
+    # Same formula as the path mastery (database._mastery_from_completed), on all topics at once
+    mastery = topic_mastery(initial, modules_done, modules_per_topic)
+    bucket = np.select([mastery <= 25, mastery <= 75, mastery < 100], [0, 1, 2], default=3)
+
+    return {
+        "mastery": mastery,
+        "modules_done": modules_done,
+        "gap": 100 - mastery,
+        "bucket": bucket
+    }
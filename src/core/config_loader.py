@@ -138,6 +138,30 @@ def load_learning_resources() -> Dict[str, Any]:
     return resources
 
 
+def load_llm_config() -> Dict[str, Any]:
+    """
+    Load LLM engine settings from config/llm.yaml
+
+    Returns:
+        LLM config dict with model defaults, cache settings, etc.
+
+    Example:
+        >>> llm_config = load_llm_config()
+        >>> print(llm_config["cache"]["ttl_hours"])
+        168
+    """
+    cache_key = "llm"
+
+    if cache_key in _config_cache:
+        return _config_cache[cache_key]
+
+    config_path = Path("config/llm.yaml")
+    llm_config = _load_yaml(config_path)
+
+    _config_cache[cache_key] = llm_config
+    return llm_config
+
+
 def clear_cache() -> None:
     """
     Clear the config cache - useful for testing or reloading configs
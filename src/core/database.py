@@ -2,39 +2,177 @@
 Database layer for learn_flow - SQLite with CRUD operations
 """
 import sqlite3
+import copy
+import functools
 import hashlib
 import json
 import re
+import threading
 import uuid
 from contextlib import contextmanager
 from datetime import datetime
 from typing import Optional, Dict, List, Any
 from pathlib import Path
 
+from src.core.calculators import topic_mastery
+
 # Database path - always relative to project root
 PROJECT_ROOT = Path(__file__).parent.parent.parent
 DB_DIR = PROJECT_ROOT / "database"
 DB_NAME = str(DB_DIR / "learnflow.db")
 EMAIL_REGEX = re.compile(r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$')
 
+# Connection settings
+BUSY_TIMEOUT_SECONDS = 5.0          # Wait for a writer instead of failing with "database is locked"
+CACHED_STATEMENTS = 256             # Prepared statements kept per connection
+
 # Ensure database directory exists
 DB_DIR.mkdir(parents=True, exist_ok=True)
 
+# One connection per thread and database file, reused across calls
+_local = threading.local()
 
-@contextmanager
-def get_db_connection():
-    """Context manager for database connections"""
-    conn = sqlite3.connect(DB_NAME)
+# Read-through cache for read-mostly queries (users, paths, generated content).
+# Entries are tagged with their scope version; writes bump the version after commit.
+READ_CACHE_MAX_ENTRIES = 1024
+_read_cache_lock = threading.Lock()
+_read_cache: Dict[tuple, tuple] = {}
+_cache_versions: Dict[tuple, int] = {}
+
+
+def _open_connection(db_name: str) -> sqlite3.Connection:
+    conn = sqlite3.connect(db_name, timeout=BUSY_TIMEOUT_SECONDS, cached_statements=CACHED_STATEMENTS)
     conn.row_factory = sqlite3.Row
+    # WAL: readers no longer block on writers; NORMAL sync is safe with WAL
+    conn.execute("PRAGMA journal_mode = WAL")
+    conn.execute("PRAGMA synchronous = NORMAL")
+    conn.execute(f"PRAGMA busy_timeout = {int(BUSY_TIMEOUT_SECONDS * 1000)}")
     conn.execute("PRAGMA foreign_keys = ON")
+    return conn
+
+
+@contextmanager
+def get_db_connection():
+    """
+    Context manager for database connections
+
+    Reuses this thread's pooled connection to DB_NAME. Nested uses share the
+    connection and its transaction: only the outermost block commits (or rolls
+    back on error), so helpers can be combined into one atomic write. Each
+    nested block runs in a SAVEPOINT, so an inner failure the caller catches
+    rolls back only that block's writes.
+    """
+    pool = getattr(_local, "connections", None)
+    if pool is None:
+        pool = _local.connections = {}
+
+    entry = pool.get(DB_NAME)
+    if entry is None:
+        # DB_NAME changed (e.g. tests): drop idle connections to other files
+        for name in [n for n, e in pool.items() if e["depth"] == 0]:
+            pool.pop(name)["conn"].close()
+        entry = pool[DB_NAME] = {"conn": _open_connection(DB_NAME), "depth": 0, "invalidate": set()}
+
+    conn = entry["conn"]
+    entry["depth"] += 1
+    savepoint = None
+    if entry["depth"] > 1:
+        if not conn.in_transaction:
+            # Otherwise RELEASE of the first savepoint would commit the outer block's writes
+            conn.execute("BEGIN")
+        savepoint = f"nested_{entry['depth']}"
+        conn.execute(f"SAVEPOINT {savepoint}")
     try:
         yield conn
-        conn.commit()
+        if savepoint:
+            conn.execute(f"RELEASE {savepoint}")
+        else:
+            conn.commit()
     except Exception:
-        conn.rollback()
+        if savepoint:
+            conn.execute(f"ROLLBACK TO {savepoint}")
+            conn.execute(f"RELEASE {savepoint}")
+        else:
+            conn.rollback()
         raise
     finally:
-        conn.close()
+        entry["depth"] -= 1
+        if entry["depth"] == 0 and entry["invalidate"]:
+            # Bump read cache versions only once the transaction has ended
+            scopes, entry["invalidate"] = entry["invalidate"], set()
+            _bump_cache_versions(scopes)
+
+
+def close_db_connections() -> None:
+    """Close this thread's pooled connections (tests, shutdown)"""
+    pool = getattr(_local, "connections", None) or {}
+    for entry in pool.values():
+        entry["conn"].close()
+    pool.clear()
+
+
+def _bump_cache_versions(scopes) -> None:
+    with _read_cache_lock:
+        for scope in scopes:
+            _cache_versions[scope] = _cache_versions.get(scope, 0) + 1
+
+
+def _invalidate(*scopes: tuple) -> None:
+    """
+    Invalidate cached reads for scopes such as ("path", path_id)
+
+    Inside a transaction the bump is deferred until it commits or rolls back,
+    so other threads cannot cache pre-commit data under the new version.
+    """
+    scopes = {(DB_NAME,) + scope for scope in scopes}
+    entry = (getattr(_local, "connections", None) or {}).get(DB_NAME)
+    if entry and entry["depth"] > 0:
+        entry["invalidate"].update(scopes)
+    else:
+        _bump_cache_versions(scopes)
+
+
+def _invalidate_path(cursor: sqlite3.Cursor, path_id: str) -> None:
+    """Invalidate a path and its owner's path list"""
+    cursor.execute("SELECT user_id FROM paths WHERE id = ?", (path_id,))
+    row = cursor.fetchone()
+    _invalidate(("path", path_id), *([("user_paths", row[0])] if row else []))
+
+
+def _cached_read(scope: str):
+    """
+    Cache a read in memory until its (scope, key) version is bumped
+
+    The key is the first argument: a read such as get_generated_module(path_id,
+    topic_id, module_id) is invalidated for the whole path at once.
+    Callers always get a deep copy, so mutating a result never touches the cache.
+    """
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(key, *args):
+            cache_key = (DB_NAME, fn.__name__, key, *args)
+            version_key = (DB_NAME, scope, key)
+            with _read_cache_lock:
+                # Snapshot the version before querying: a concurrent write makes this entry stale
+                version = _cache_versions.get(version_key, 0)
+                cached = _read_cache.get(cache_key)
+            if cached is not None and cached[0] == version:
+                return copy.deepcopy(cached[1])
+
+            value = fn(key, *args)
+            with _read_cache_lock:
+                if len(_read_cache) >= READ_CACHE_MAX_ENTRIES:
+                    _read_cache.pop(next(iter(_read_cache)))
+                _read_cache[cache_key] = (version, value)
+            return copy.deepcopy(value)
+        return wrapper
+    return decorator
+
+
+def clear_read_cache() -> None:
+    """Drop all cached reads (tests, external writes to the database file)"""
+    with _read_cache_lock:
+        _read_cache.clear()
 
 
 def init_db():
@@ -120,6 +258,109 @@ def init_db():
             )
         """)
 
+        # Generated module content, shared by every session of the path
+        # (version increments on regeneration; readers take the latest)
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS generated_modules (
+                path_id TEXT NOT NULL,
+                topic_id TEXT NOT NULL,
+                module_id INTEGER NOT NULL,
+                version INTEGER NOT NULL DEFAULT 1,
+                prompt_hash TEXT,
+                content JSON NOT NULL,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                PRIMARY KEY (path_id, topic_id, module_id, version)
+            )
+        """)
+
+        # Generated module names (8 per topic)
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS generated_module_names (
+                path_id TEXT NOT NULL,
+                topic_id TEXT NOT NULL,
+                version INTEGER NOT NULL DEFAULT 1,
+                prompt_hash TEXT,
+                module_names JSON NOT NULL,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                PRIMARY KEY (path_id, topic_id, version)
+            )
+        """)
+
+        # Cross-user module templates (content shared by users with the same
+        # topic/module/role/tier/depth bucket)
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS module_templates (
+                template_key TEXT PRIMARY KEY,
+                topic_id TEXT NOT NULL,
+                module_id INTEGER NOT NULL,
+                module_name TEXT,
+                target_role TEXT,
+                user_tier INTEGER,
+                depth_bucket REAL,
+                content JSON NOT NULL,
+                hits INTEGER DEFAULT 0,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                last_used TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+
+        # Workflow runs: one record per path + each completed node's output
+        # (lets a failed path generation resume without re-running finished nodes)
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS workflow_runs (
+                path_id TEXT PRIMARY KEY,
+                user_id INTEGER NOT NULL,
+                form_data JSON NOT NULL,
+                status TEXT DEFAULT 'running',
+                error TEXT,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS workflow_run_nodes (
+                path_id TEXT NOT NULL,
+                node TEXT NOT NULL,
+                output JSON NOT NULL,
+                completed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                PRIMARY KEY (path_id, node)
+            )
+        """)
+
+        # Reference URL health: last check result per URL (checked_at = epoch seconds)
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS url_status (
+                url TEXT PRIMARY KEY,
+                ok BOOLEAN NOT NULL,
+                status_code INTEGER,
+                error TEXT,
+                checked_at REAL NOT NULL
+            )
+        """)
+
+        # LLM token usage per user per UTC day (quota accounting, see quota.py)
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS token_usage (
+                user_id INTEGER NOT NULL,
+                day TEXT NOT NULL,
+                tokens INTEGER NOT NULL DEFAULT 0,
+                calls INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (user_id, day),
+                FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
+            )
+        """)
+
+        # One user_skills row per (user, topic): drop duplicates left by older
+        # versions (keep the latest row), then enforce it for ON CONFLICT upserts
+        cursor.execute("""
+            DELETE FROM user_skills
+            WHERE id NOT IN (SELECT MAX(id) FROM user_skills GROUP BY user_id, topic_id)
+        """)
+        cursor.execute("""
+            CREATE UNIQUE INDEX IF NOT EXISTS idx_user_skills_user_topic
+            ON user_skills(user_id, topic_id)
+        """)
+
         # Create indexes
         cursor.execute("""
             CREATE INDEX IF NOT EXISTS idx_user_modules
@@ -163,9 +404,11 @@ def create_user(name: str, email: str, password: str, is_admin: bool = False) ->
             "INSERT INTO users (name, email, password_hash, is_admin) VALUES (?, ?, ?, ?)",
             (name, email, password_hash, is_admin)
         )
+        _invalidate(("user", cursor.lastrowid))
         return cursor.lastrowid
 
 
+@_cached_read("user")
 def get_user(user_id: int) -> Optional[Dict[str, Any]]:
     """Get user by ID"""
     with get_db_connection() as conn:
@@ -223,10 +466,22 @@ def list_all_users() -> List[Dict[str, Any]]:
 
 
 def delete_user(user_id: int) -> bool:
-    """Delete user (cascades automatically to paths and user_skills)"""
+    """Delete user (cascades automatically to paths and user_skills) and their paths' generated content"""
     with get_db_connection() as conn:
         cursor = conn.cursor()
+        cursor.execute("SELECT id FROM paths WHERE user_id = ?", (user_id,))
+        path_ids = [row[0] for row in cursor.fetchall()]
+        # Generated content has no foreign key (the store accepts any path_id), so delete it here
+        for table in ("generated_modules", "generated_module_names"):
+            cursor.execute(f"""
+                DELETE FROM {table}
+                WHERE path_id IN (SELECT id FROM paths WHERE user_id = ?)
+            """, (user_id,))
         cursor.execute("DELETE FROM users WHERE id = ?", (user_id,))
+        _invalidate(
+            ("user", user_id), ("user_paths", user_id),
+            *[scope for path_id in path_ids for scope in (("path", path_id), ("generated", path_id))]
+        )
         return cursor.rowcount > 0
 
 
@@ -266,9 +521,11 @@ def create_path(
             target_job_title, target_description, target_seniority,
             target_company, target_industry, topics_json
         ))
+        _invalidate(("path", path_id), ("user_paths", user_id))
         return path_id
 
 
+@_cached_read("path")
 def get_path(path_id: str) -> Optional[Dict[str, Any]]:
     """Get path by ID"""
     with get_db_connection() as conn:
@@ -282,6 +539,7 @@ def get_path(path_id: str) -> Optional[Dict[str, Any]]:
         return None
 
 
+@_cached_read("user_paths")
 def get_paths_by_user(user_id: int) -> List[Dict[str, Any]]:
     """Get all paths for a user, ordered by last accessed (most recent first)"""
     with get_db_connection() as conn:
@@ -293,6 +551,7 @@ def get_paths_by_user(user_id: int) -> List[Dict[str, Any]]:
         return paths
 
 
+@_cached_read("user_paths")
 def get_path_count(user_id: int) -> int:
     """Get count of paths for a user"""
     with get_db_connection() as conn:
@@ -325,21 +584,22 @@ def calculate_path_mastery(path: Dict[str, Any]) -> float:
         return round(sum(mastery_scores) / len(mastery_scores), 1)
 
     # Calculate updated mastery for each topic based on completed modules
-    updated_mastery_scores = []
-    for topic in topics:
-        topic_id = topic.get('topic_id')
-        initial_mastery = topic.get('mastery', 0)
-
-        # Get completed modules for this topic
-        completed_modules = get_completed_modules(user_id, path_id, topic_id)
+    completed_counts = {
+        topic.get('topic_id'): len(get_completed_modules(user_id, path_id, topic.get('topic_id')))
+        for topic in topics
+    }
+    return _mastery_from_completed(topics, completed_counts)
 
-        # Calculate mastery from completed modules (same logic as dashboard)
-        points_per_module = (100 - initial_mastery) / 8.0
-        mastery_from_modules = len(completed_modules) * points_per_module
-        updated_mastery = min(int(initial_mastery + mastery_from_modules), 100)
 
-        updated_mastery_scores.append(updated_mastery)
+def _mastery_from_completed(topics: List[Dict[str, Any]], completed_counts: Dict[str, int]) -> float:
+    """Average topic mastery after crediting completed modules (same logic as dashboard)"""
+    if not topics:
+        return 0.0
 
+    updated_mastery_scores = [
+        topic_mastery(topic.get('mastery', 0), completed_counts.get(topic.get('topic_id'), 0))
+        for topic in topics
+    ]
     return round(sum(updated_mastery_scores) / len(updated_mastery_scores), 1)
 
 
@@ -351,20 +611,51 @@ def update_path_last_accessed(path_id: str) -> bool:
             "UPDATE paths SET last_accessed = CURRENT_TIMESTAMP WHERE id = ?",
             (path_id,)
         )
+        _invalidate_path(cursor, path_id)
         return cursor.rowcount > 0
 
 
+def _update_path_readiness(cursor: sqlite3.Cursor, path_id: str, global_readiness: float, topics: list) -> bool:
+    cursor.execute(
+        """UPDATE paths
+           SET global_readiness = ?, topics = ?
+           WHERE id = ?""",
+        (global_readiness, json.dumps(topics), path_id)
+    )
+    updated = cursor.rowcount > 0
+    _invalidate_path(cursor, path_id)
+    return updated
+
+
 def update_path_readiness(path_id: str, global_readiness: float, topics: list) -> bool:
     """Update path's global readiness and topics"""
+    with get_db_connection() as conn:
+        return _update_path_readiness(conn.cursor(), path_id, global_readiness, topics)
+
+
+def save_path_assessment(user_id: int, path_id: str, global_readiness: float, topics: list) -> int:
+    """
+    Save an assessed path in one transaction: path readiness/topics + user_skills upsert
+
+    Args:
+        user_id: Path owner
+        path_id: Path ID
+        global_readiness: Global readiness percentage
+        topics: Assessed topics (topic_id, mastery, modules_complete, ...)
+
+    Returns:
+        Number of user_skills rows written
+    """
+    rows = [
+        {"topic_id": t["topic_id"], "mastery_percent": t["mastery"], "modules_complete": t["modules_complete"]}
+        for t in topics
+    ]
+    _validate_skill_rows(rows)
+
     with get_db_connection() as conn:
         cursor = conn.cursor()
-        cursor.execute(
-            """UPDATE paths
-               SET global_readiness = ?, topics = ?
-               WHERE id = ?""",
-            (global_readiness, json.dumps(topics), path_id)
-        )
-        return cursor.rowcount > 0
+        _update_path_readiness(cursor, path_id, global_readiness, topics)
+        return _upsert_user_skills(cursor, user_id, rows)
 
 
 # User Skills CRUD operations
@@ -435,6 +726,47 @@ def upsert_user_skill(
             return cursor.lastrowid
 
 
+def _validate_skill_rows(rows: List[Dict[str, Any]]) -> None:
+    for row in rows:
+        if not 0 <= row["mastery_percent"] <= 100:
+            raise ValueError(f"mastery_percent must be 0-100, got {row['mastery_percent']} for {row['topic_id']}")
+
+
+def _upsert_user_skills(cursor: sqlite3.Cursor, user_id: int, rows: List[Dict[str, Any]]) -> int:
+    now = datetime.now()
+    cursor.executemany("""
+        INSERT INTO user_skills (user_id, topic_id, mastery_percent, modules_complete, last_completed)
+        VALUES (?, ?, ?, ?, ?)
+        ON CONFLICT(user_id, topic_id) DO UPDATE SET
+            mastery_percent = excluded.mastery_percent,
+            modules_complete = excluded.modules_complete,
+            last_completed = excluded.last_completed
+    """, [
+        (user_id, row["topic_id"], row["mastery_percent"], row.get("modules_complete", "0/8"), now)
+        for row in rows
+    ])
+    return len(rows)
+
+
+def upsert_user_skills(user_id: int, rows: List[Dict[str, Any]]) -> int:
+    """
+    Insert or update many user skills in one statement/transaction
+
+    Args:
+        user_id: User ID
+        rows: Dicts with topic_id, mastery_percent and optional modules_complete
+
+    Returns:
+        Number of rows written
+
+    Raises:
+        ValueError: If any mastery_percent is outside 0-100 (nothing is written)
+    """
+    _validate_skill_rows(rows)
+    with get_db_connection() as conn:
+        return _upsert_user_skills(conn.cursor(), user_id, rows)
+
+
 def get_user_skills(user_id: int) -> List[Dict[str, Any]]:
     """Get all skills for a user"""
     with get_db_connection() as conn:
@@ -455,6 +787,7 @@ def complete_module(user_id: int, path_id: str, topic_id: str, module_id: int, m
             (user_id, path_id, topic_id, module_id, mastery_bonus)
             VALUES (?, ?, ?, ?, ?)
         """, (user_id, path_id, topic_id, module_id, mastery_bonus))
+        _invalidate(("path", path_id))
 
         return cursor.lastrowid
 
@@ -476,6 +809,7 @@ def record_answer(
             (user_id, path_id, topic_id, module_id, question_id, user_answer, is_correct)
             VALUES (?, ?, ?, ?, ?, ?, ?)
         """, (user_id, path_id, topic_id, module_id, question_id, user_answer, is_correct))
+        _invalidate(("path", path_id))
         return cursor.lastrowid
 
 
@@ -491,6 +825,21 @@ def get_completed_modules(user_id: int, path_id: str, topic_id: str) -> List[int
         return [row[0] for row in cursor.fetchall()]
 
 
+def get_completed_modules_by_topic(user_id: int, path_id: str) -> Dict[str, List[int]]:
+    """Get completed module IDs for every topic of a path in one query"""
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT topic_id, GROUP_CONCAT(module_id) FROM user_topic_modules
+            WHERE user_id = ? AND path_id = ?
+            GROUP BY topic_id
+        """, (user_id, path_id))
+        return {
+            topic_id: sorted(int(module_id) for module_id in modules.split(","))
+            for topic_id, modules in cursor.fetchall()
+        }
+
+
 def get_topic_mastery_bonus(user_id: int, path_id: str, topic_id: str) -> int:
     """Calculate total mastery bonus for a topic from completed modules"""
     with get_db_connection() as conn:
@@ -514,6 +863,61 @@ def get_total_completed_modules(user_id: int, path_id: str) -> int:
         return cursor.fetchone()[0]
 
 
+def get_path_summaries(
+    user_id: int,
+    paths: Optional[List[Dict[str, Any]]] = None,
+    activity_days: int = 7
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Get mastery, completed modules and recent activity for all of a user's paths
+
+    Uses two aggregate queries for all paths instead of per-topic queries.
+
+    Args:
+        user_id: User ID
+        paths: Paths from get_paths_by_user (fetched if not given)
+        activity_days: Size of the recent activity window in days
+
+    Returns:
+        Dict keyed by path_id with 'mastery', 'completed_modules' and
+        'activity' ({'YYYY-MM-DD': completed count})
+    """
+    if paths is None:
+        paths = get_paths_by_user(user_id)
+
+    completed: Dict[str, Dict[str, int]] = {}
+    activity: Dict[str, Dict[str, int]] = {}
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT path_id, topic_id, COUNT(*) FROM user_topic_modules
+            WHERE user_id = ?
+            GROUP BY path_id, topic_id
+        """, (user_id,))
+        for path_id, topic_id, count in cursor.fetchall():
+            completed.setdefault(path_id, {})[topic_id] = count
+
+        cursor.execute("""
+            SELECT path_id, DATE(completed_date) as date, COUNT(*) FROM user_topic_modules
+            WHERE user_id = ? AND completed_date >= date('now', ?)
+            GROUP BY path_id, DATE(completed_date)
+            ORDER BY date
+        """, (user_id, f"-{activity_days} days"))
+        for path_id, date, count in cursor.fetchall():
+            activity.setdefault(path_id, {})[date] = count
+
+    summaries = {}
+    for path in paths:
+        path_id = path['id']
+        counts = completed.get(path_id, {})
+        summaries[path_id] = {
+            "mastery": _mastery_from_completed(path.get('topics', []), counts),
+            "completed_modules": sum(counts.values()),
+            "activity": activity.get(path_id, {})
+        }
+    return summaries
+
+
 def get_activity_streak(user_id: int, path_id: str) -> int:
     """Calculate current learning streak in days"""
     from datetime import datetime, timedelta
@@ -612,6 +1016,310 @@ def get_activity_heatmap(user_id: int, path_id: str, days: int = 28) -> List[Dic
         return heatmap_data
 
 
+# Generated content store: module content and names persisted per path
+def save_generated_module(
+    path_id: str,
+    topic_id: str,
+    module_id: int,
+    content_data: Dict[str, Any],
+    prompt_hash: Optional[str] = None
+) -> int:
+    """
+    Store generated module content as a new version
+
+    Returns:
+        Version number of the stored content
+    """
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("""
+            INSERT INTO generated_modules (path_id, topic_id, module_id, version, prompt_hash, content)
+            SELECT ?, ?, ?, COALESCE(MAX(version), 0) + 1, ?, ?
+            FROM generated_modules
+            WHERE path_id = ? AND topic_id = ? AND module_id = ?
+        """, (path_id, topic_id, module_id, prompt_hash, json.dumps(content_data),
+              path_id, topic_id, module_id))
+        _invalidate(("generated", path_id))
+        cursor.execute("""
+            SELECT MAX(version) FROM generated_modules
+            WHERE path_id = ? AND topic_id = ? AND module_id = ?
+        """, (path_id, topic_id, module_id))
+        return cursor.fetchone()[0]
+
+
+@_cached_read("generated")
+def get_generated_module(path_id: str, topic_id: str, module_id: int) -> Optional[Dict[str, Any]]:
+    """Get the latest generated content for a module (None if never generated)"""
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT content FROM generated_modules
+            WHERE path_id = ? AND topic_id = ? AND module_id = ?
+            ORDER BY version DESC LIMIT 1
+        """, (path_id, topic_id, module_id))
+        row = cursor.fetchone()
+        return json.loads(row[0]) if row else None
+
+
+def save_generated_module_names(
+    path_id: str,
+    topic_id: str,
+    module_names: Dict[int, str],
+    prompt_hash: Optional[str] = None
+) -> int:
+    """
+    Store generated module names for a topic as a new version
+
+    Returns:
+        Version number of the stored names
+    """
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("""
+            INSERT INTO generated_module_names (path_id, topic_id, version, prompt_hash, module_names)
+            SELECT ?, ?, COALESCE(MAX(version), 0) + 1, ?, ?
+            FROM generated_module_names
+            WHERE path_id = ? AND topic_id = ?
+        """, (path_id, topic_id, prompt_hash, json.dumps(module_names), path_id, topic_id))
+        _invalidate(("generated", path_id))
+        cursor.execute("""
+            SELECT MAX(version) FROM generated_module_names
+            WHERE path_id = ? AND topic_id = ?
+        """, (path_id, topic_id))
+        return cursor.fetchone()[0]
+
+
+@_cached_read("generated")
+def get_generated_module_names(path_id: str, topic_id: str) -> Optional[Dict[int, str]]:
+    """Get the latest generated module names for a topic ({1: "name", ...} or None)"""
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT module_names FROM generated_module_names
+            WHERE path_id = ? AND topic_id = ?
+            ORDER BY version DESC LIMIT 1
+        """, (path_id, topic_id))
+        row = cursor.fetchone()
+        # JSON object keys are strings - restore int module ids
+        return {int(k): v for k, v in json.loads(row[0]).items()} if row else None
+
+
+# Module templates: generated content shared across users
+def get_module_template(template_key: str) -> Optional[Dict[str, Any]]:
+    """Get template content by key and count the hit (None if not cached)"""
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT content FROM module_templates WHERE template_key = ?", (template_key,))
+        row = cursor.fetchone()
+        if not row:
+            return None
+        cursor.execute("""
+            UPDATE module_templates SET hits = hits + 1, last_used = CURRENT_TIMESTAMP
+            WHERE template_key = ?
+        """, (template_key,))
+        return json.loads(row[0])
+
+
+def save_module_template(
+    template_key: str,
+    topic_id: str,
+    module_id: int,
+    module_name: str,
+    target_role: str,
+    user_tier: int,
+    depth_bucket: float,
+    content_data: Dict[str, Any]
+) -> None:
+    """Store template content (first generation for a key wins)"""
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("""
+            INSERT OR IGNORE INTO module_templates
+            (template_key, topic_id, module_id, module_name, target_role, user_tier, depth_bucket, content)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        """, (template_key, topic_id, module_id, module_name, target_role, user_tier,
+              depth_bucket, json.dumps(content_data)))
+
+
+def find_module_template(
+    topic_id: str,
+    module_id: int,
+    module_name: str,
+    depth_bucket: float
+) -> Optional[Dict[str, Any]]:
+    """
+    Closest template for a module regardless of role/tier (fallback when no LLM call is allowed)
+
+    Prefers the same module name, then the nearest depth bucket, then the most used.
+    """
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT content FROM module_templates
+            WHERE topic_id = ? AND module_id = ?
+            ORDER BY lower(module_name) = lower(?) DESC, ABS(depth_bucket - ?) ASC, hits DESC
+            LIMIT 1
+        """, (topic_id, module_id, module_name, depth_bucket))
+        row = cursor.fetchone()
+        return json.loads(row[0]) if row else None
+
+
+# Workflow runs: persisted node outputs for resumable path generation
+def create_workflow_run(path_id: str, user_id: int, form_data: Dict[str, Any]) -> None:
+    """Record a new workflow run for a path (status 'running')"""
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("""
+            INSERT OR REPLACE INTO workflow_runs (path_id, user_id, form_data, status)
+            VALUES (?, ?, ?, 'running')
+        """, (path_id, user_id, json.dumps(form_data)))
+
+
+def get_workflow_run(path_id: str) -> Optional[Dict[str, Any]]:
+    """
+    Get a workflow run with its completed node outputs
+
+    Returns:
+        Dict with path_id, user_id, form_data, status, error and
+        nodes ({node_name: output}), or None if no run exists
+    """
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT * FROM workflow_runs WHERE path_id = ?", (path_id,))
+        row = cursor.fetchone()
+        if not row:
+            return None
+        run = dict(row)
+        run["form_data"] = json.loads(run["form_data"])
+
+        cursor.execute("SELECT node, output FROM workflow_run_nodes WHERE path_id = ?", (path_id,))
+        run["nodes"] = {node: json.loads(output) for node, output in cursor.fetchall()}
+        return run
+
+
+def update_workflow_run_status(path_id: str, status: str, error: Optional[str] = None) -> bool:
+    """Set run status ('running' | 'failed' | 'completed') and last error"""
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("""
+            UPDATE workflow_runs SET status = ?, error = ?, updated_at = CURRENT_TIMESTAMP
+            WHERE path_id = ?
+        """, (status, error, path_id))
+        return cursor.rowcount > 0
+
+
+def save_workflow_node_output(path_id: str, node: str, output: Dict[str, Any]) -> None:
+    """Record a completed node's output for a run"""
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("""
+            INSERT OR REPLACE INTO workflow_run_nodes (path_id, node, output)
+            VALUES (?, ?, ?)
+        """, (path_id, node, json.dumps(output)))
+
+
+def get_workflow_node_output(path_id: str, node: str) -> Optional[Dict[str, Any]]:
+    """Get a completed node's output (None if the node has not completed)"""
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT output FROM workflow_run_nodes WHERE path_id = ? AND node = ?
+        """, (path_id, node))
+        row = cursor.fetchone()
+        return json.loads(row[0]) if row else None
+
+
+# URL status: cached reference health checks
+def get_url_statuses(urls: List[str]) -> Dict[str, Dict[str, Any]]:
+    """Get the last check result for each known URL (unknown URLs are omitted)"""
+    urls = list(dict.fromkeys(urls))
+    statuses = {}
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        # Stay below SQLite's host parameter limit
+        for start in range(0, len(urls), 500):
+            chunk = urls[start:start + 500]
+            cursor.execute(
+                f"SELECT * FROM url_status WHERE url IN ({','.join('?' * len(chunk))})",
+                chunk
+            )
+            for row in cursor.fetchall():
+                status = dict(row)
+                status["ok"] = bool(status["ok"])
+                statuses[status["url"]] = status
+    return statuses
+
+
+def save_url_statuses(statuses: List[Dict[str, Any]]) -> int:
+    """Insert or replace check results (dicts with url, ok, status_code, error, checked_at)"""
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.executemany("""
+            INSERT INTO url_status (url, ok, status_code, error, checked_at)
+            VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT(url) DO UPDATE SET
+                ok = excluded.ok,
+                status_code = excluded.status_code,
+                error = excluded.error,
+                checked_at = excluded.checked_at
+        """, [
+            (s["url"], bool(s["ok"]), s.get("status_code"), s.get("error"), s["checked_at"])
+            for s in statuses
+        ])
+        return len(statuses)
+
+
+# Token usage: per-user LLM accounting for quotas
+def add_token_usage(usage: List[Dict[str, Any]]) -> int:
+    """
+    Add token counts (dicts with user_id, day, tokens, calls) in one transaction
+
+    Increments token_usage and users.tokens_used; rows for unknown users are skipped.
+
+    Returns:
+        Number of rows applied
+    """
+    applied = 0
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        for row in usage:
+            cursor.execute("""
+                INSERT INTO token_usage (user_id, day, tokens, calls)
+                SELECT ?, ?, ?, ? WHERE EXISTS (SELECT 1 FROM users WHERE id = ?)
+                ON CONFLICT(user_id, day) DO UPDATE SET
+                    tokens = tokens + excluded.tokens,
+                    calls = calls + excluded.calls
+            """, (row["user_id"], row["day"], row["tokens"], row["calls"], row["user_id"]))
+            if cursor.rowcount:
+                cursor.execute(
+                    "UPDATE users SET tokens_used = tokens_used + ? WHERE id = ?",
+                    (row["tokens"], row["user_id"])
+                )
+                _invalidate(("user", row["user_id"]))
+                applied += 1
+    return applied
+
+
+def get_token_usage(user_id: int, day: str) -> Dict[str, int]:
+    """
+    Tokens used on a UTC day ("YYYY-MM-DD") and in its month
+
+    Returns:
+        Dict with daily and monthly token totals
+    """
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT
+                COALESCE(SUM(CASE WHEN day = ? THEN tokens END), 0) AS daily,
+                COALESCE(SUM(tokens), 0) AS monthly
+            FROM token_usage
+            WHERE user_id = ? AND day >= ? AND day <= ?
+        """, (day, user_id, day[:7] + "-01", day[:7] + "-31"))
+        row = cursor.fetchone()
+        return {"daily": row["daily"], "monthly": row["monthly"]}
+
+
 if __name__ == "__main__":
     # Initialize database if run directly
     init_db()
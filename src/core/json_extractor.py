@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""
+JSON Extractor for learn_flow
+Pull the first JSON value out of an LLM response (shared by all agents)
+
+Strategies, cheapest first:
+1. direct - the whole response is the JSON value
+2. scan   - first balanced value that parses, found by a string-aware
+            scanner (after a ``` code fence if there is one)
+3. repair - clean_json_string() on the candidate, only when parsing failed
+
+Brackets inside JSON strings are ignored, so markdown/code in "content" fields
+no longer breaks extraction.
+"""
+import json
+import logging
+import re
+import threading
+from typing import Any, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+OPENERS = {"object": "{", "array": "["}
+MAX_CANDIDATES = 5
+_CLOSERS = {"{": "}", "[": "]"}
+
+# Structural characters outside strings; strings are skipped in one regex match
+_STRUCTURAL = re.compile(r'[\[\]{}"]')
+_STRING_TAIL = re.compile(r'[^"\\]*(?:\\.[^"\\]*)*"', re.DOTALL)
+_FENCE = re.compile(r'```(?:json)?', re.IGNORECASE)
+
+# Process-wide counters of which strategy succeeded (reset with reset_extraction_stats)
+_stats_lock = threading.Lock()
+_stats: Dict[str, int] = {}
+
+
+class JSONExtractionError(ValueError):
+    """No parseable JSON value of the expected type in the response"""
+
+
+def clean_json_string(json_str: str) -> str:
+    r"""
+    Clean JSON string by fixing common LLM JSON formatting errors
+
+    LLMs sometimes output JSON with:
+    1. Literal newlines in string values (invalid)
+    2. Invalid escape sequences like \$ or LaTeX \frac, \sigma (should be escaped)
+    3. Bold markdown ** mixed with escaped chars
+
+    This function cleans these issues to make JSON parseable while preserving
+    LaTeX rendering (e.g., \sigma becomes \\sigma in JSON, which parses to \sigma).
+    """
+    # Step 1: Replace literal newlines with space
+    cleaned = json_str.replace('\r\n', ' ').replace('\n', ' ').replace('\r', ' ')
+
+    # Step 2: Fix ALL invalid escape sequences using regex
+    # JSON only allows: \" \\ \/ \b \f \n \r \t \uXXXX
+    # Any other \X is invalid and needs to be \\X for JSON parsing
+    # This preserves LaTeX: \sigma -> \\sigma in JSON -> \sigma after parsing
+
+    def fix_escape(match):
+        full_match = match.group(0)  # e.g., \sigma, \$, \"
+        char = match.group(1)        # e.g., s, $, "
+
+        # Valid JSON escapes - leave alone
+        if char in '"\\bfnrt/':
+            return full_match
+        # Unicode escape \uXXXX - leave alone
+        if char == 'u':
+            return full_match
+        # Everything else (LaTeX \sigma, \frac, etc.) - double the backslash
+        # This turns \sigma into \\sigma in JSON string
+        # When JSON parses \\sigma, it becomes \sigma in the actual string
+        # Then LaTeX/Markdown can render \sigma as σ
+        return '\\\\' + char
+
+    # Match backslash followed by any character
+    cleaned = re.sub(r'\\(.)', fix_escape, cleaned)
+
+    # Step 3: Normalize whitespace
+    cleaned = re.sub(r'\s+', ' ', cleaned)
+
+    return cleaned
+
+
+def find_json_span(text: str, start: int = 0, opener: str = "{") -> Optional[Tuple[int, int]]:
+    """
+    Find the first balanced JSON value starting with `opener` at or after `start`
+
+    Linear in the length of the value: strings are skipped with a single regex
+    match, so brackets and braces inside them are ignored.
+
+    Returns:
+        (start, end) slice of the value, or None if there is none / it never closes
+    """
+    begin = text.find(opener, start)
+    if begin == -1:
+        return None
+
+    stack = []
+    pos = begin
+    while True:
+        match = _STRUCTURAL.search(text, pos)
+        if match is None:
+            return None  # Truncated response
+        char = match.group()
+        if char == '"':
+            tail = _STRING_TAIL.match(text, match.end())
+            if tail is None:
+                return None  # Unterminated string
+            pos = tail.end()
+            continue
+        if char in _CLOSERS:
+            stack.append(_CLOSERS[char])
+        elif not stack or char != stack.pop():
+            return None  # Mismatched closer
+        pos = match.end()
+        if not stack:
+            return (begin, pos)
+
+
+def _record(strategy: str) -> None:
+    with _stats_lock:
+        _stats[strategy] = _stats.get(strategy, 0) + 1
+
+
+def _loads(candidate: str, strategy: str, repair: bool) -> Tuple[Any, str]:
+    try:
+        return json.loads(candidate), strategy
+    except json.JSONDecodeError as e:
+        if not repair:
+            raise
+        logger.warning(f"JSON decode failed ({e}), attempting to clean JSON string")
+        return json.loads(clean_json_string(candidate)), f"{strategy}+repair"
+
+
+def extract_json(text: str, expect: str = "object", repair: bool = True) -> Tuple[Any, str]:
+    """
+    Extract the first JSON object/array from an LLM response
+
+    Args:
+        text: Raw LLM response
+        expect: "object" or "array"
+        repair: Retry with clean_json_string() if the candidate doesn't parse
+
+    Returns:
+        Tuple of (parsed value, strategy) where strategy is "direct", "scan",
+        "direct+repair" or "scan+repair"
+
+    Raises:
+        JSONExtractionError: If no value of the expected type can be parsed
+
+    Example:
+        >>> extract_json('Sure! ```json\\n[{"id": "a]"}]\\n```', expect="array")
+        ([{'id': 'a]'}], 'scan')
+    """
+    opener = OPENERS[expect]
+    stripped = text.strip()
+    errors = []
+
+    if stripped.startswith(opener):
+        try:
+            value, strategy = _loads(stripped, "direct", repair)
+            _record(strategy)
+            return value, strategy
+        except json.JSONDecodeError as e:
+            # Trailing prose or a truncated tail: fall through to the scanner
+            errors.append(f"direct: {e}")
+
+    fence = _FENCE.search(stripped)
+    span = find_json_span(stripped, fence.end() if fence else 0, opener)
+    if span is None and fence:
+        span = find_json_span(stripped, 0, opener)
+    if span is None:
+        _record("failed")
+        if opener not in stripped:
+            raise JSONExtractionError(f"Response contains no JSON {expect}")
+        raise JSONExtractionError(f"Unmatched brackets in JSON {expect}")
+
+    # A bracketed aside in prose ("[note]") can precede the real value: try a few candidates
+    for _ in range(MAX_CANDIDATES):
+        try:
+            value, strategy = _loads(stripped[span[0]:span[1]], "scan", repair)
+            _record(strategy)
+            return value, strategy
+        except json.JSONDecodeError as e:
+            errors.append(f"scan: {e}")
+        span = find_json_span(stripped, span[0] + 1, opener)
+        if span is None:
+            break
+
+    _record("failed")
+    raise JSONExtractionError(f"LLM returned invalid JSON: {'; '.join(errors)}")
+
+
+def get_extraction_stats() -> Dict[str, int]:
+    """Counts of successful strategies (and failures) in this process"""
+    with _stats_lock:
+        return dict(_stats)
+
+
+def reset_extraction_stats() -> None:
+    with _stats_lock:
+        _stats.clear()
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Link Audit for learn_flow
+Offline batch job: verify every curated resource URL and record the results
+
+Walks golden_resources_by_role.yaml and learning_resources.yaml, checks all
+URLs concurrently, writes the url_status table (read by the request path) and
+a Markdown report of dead links.
+
+Usage:
+    python -m src.core.link_audit [--report PATH] [--workers N]
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+from typing import Dict, Any, List, Optional
+
+import yaml
+
+from src.core import database
+from src.core.url_checker import URLChecker
+
+GOLDEN_RESOURCES_PATH = Path("config/resources/golden_resources_by_role.yaml")
+LEARNING_RESOURCES_PATH = Path("config/resources/learning_resources.yaml")
+DEFAULT_REPORT_PATH = Path("database/link_audit_report.md")
+
+
+def _walk_urls(node: Any, location: str, found: Dict[str, List[str]]) -> None:
+    if isinstance(node, dict):
+        url = node.get("url")
+        if isinstance(url, str):
+            found.setdefault(url, []).append(location)
+        for key, value in node.items():
+            _walk_urls(value, f"{location}.{key}" if location else str(key), found)
+    elif isinstance(node, list):
+        for i, item in enumerate(node):
+            _walk_urls(item, f"{location}[{i}]", found)
+
+
+def collect_resource_urls(config_paths: Optional[List[Path]] = None) -> Dict[str, List[str]]:
+    """
+    Collect checkable URLs from resource config files
+
+    Placeholders ("#" for paid books) and templated URLs ("{module_name}") are skipped.
+
+    Returns:
+        Dict of url -> locations ("file: yaml.path") where it appears
+    """
+    found: Dict[str, List[str]] = {}
+    for config_path in config_paths or [GOLDEN_RESOURCES_PATH, LEARNING_RESOURCES_PATH]:
+        with open(config_path, 'r') as f:
+            data = yaml.safe_load(f) or {}
+        urls: Dict[str, List[str]] = {}
+        _walk_urls(data, "", urls)
+        for url, locations in urls.items():
+            found.setdefault(url, []).extend(f"{config_path.name}: {loc}" for loc in locations)
+
+    return {
+        url: locations for url, locations in found.items()
+        if url.startswith(("http://", "https://")) and "{" not in url
+    }
+
+
+def write_report(report_path: Path, results: Dict[str, tuple], sources: Dict[str, List[str]], elapsed: float) -> None:
+    """Write a Markdown report listing dead links and where they are configured"""
+    dead = sorted(url for url, (ok, _) in results.items() if not ok)
+    lines = [
+        "# Link Audit Report",
+        "",
+        f"- Checked: {time.strftime('%Y-%m-%d %H:%M:%S')}",
+        f"- URLs: {len(results)}",
+        f"- Dead: {len(dead)}",
+        f"- Duration: {elapsed:.1f}s",
+        ""
+    ]
+    if dead:
+        lines += ["| Status | URL | Configured at |", "|---|---|---|"]
+        for url in dead:
+            status = results[url][1] or "error"
+            lines.append(f"| {status} | {url} | {'<br>'.join(sources.get(url, []))} |")
+    else:
+        lines.append("No dead links found.")
+
+    report_path.parent.mkdir(parents=True, exist_ok=True)
+    report_path.write_text("\n".join(lines) + "\n")
+
+
+def run_link_audit(
+    report_path: Optional[Path] = None,
+    config_paths: Optional[List[Path]] = None,
+    settings: Optional[Dict[str, Any]] = None
+) -> Dict[str, Any]:
+    """
+    Check all resource URLs, store results in url_status and write the report
+
+    Args:
+        report_path: Markdown report destination
+        config_paths: Resource YAML files to audit (default: golden + learning resources)
+        settings: URLChecker setting overrides (e.g. max_workers)
+
+    Returns:
+        Summary dict with checked, dead (list of urls) and report path
+    """
+    report_path = report_path or DEFAULT_REPORT_PATH
+    database.init_db()
+    sources = collect_resource_urls(config_paths)
+
+    checker = URLChecker(settings)
+    started = time.time()
+    try:
+        # Always re-check: the audit is what keeps url_status fresh
+        results = checker.check_many(list(sources), use_cache=False)
+    finally:
+        checker.close()
+    elapsed = time.time() - started
+
+    write_report(report_path, results, sources, elapsed)
+    dead = sorted(url for url, (ok, _) in results.items() if not ok)
+    return {"checked": len(results), "dead": dead, "report": str(report_path)}
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Verify curated resource URLs and report dead links")
+    parser.add_argument("--report", type=Path, default=DEFAULT_REPORT_PATH, help="Markdown report path")
+    parser.add_argument("--workers", type=int, help="Concurrent checks (default from url_validation)")
+    args = parser.parse_args(argv)
+
+    settings = {"max_workers": args.workers} if args.workers else None
+    summary = run_link_audit(report_path=args.report, settings=settings)
+    print(f"Checked {summary['checked']} URLs, {len(summary['dead'])} dead")
+    for url in summary["dead"]:
+        print(f"  ❌ {url}")
+    print(f"Report: {summary['report']}")
+    return 1 if summary["dead"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,291 @@
+#!/usr/bin/env python3
+"""
+LLM Response Cache for learn_flow
+Persistent, content-addressed cache in front of call_llm (SQLite backend)
+
+Key = sha256(prompt, model, temperature, max_tokens)
+- TTL expiry (ttl_hours)
+- LRU eviction bounded by max_entries and max_bytes
+- Hit/miss/byte counters for the current process
+"""
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Optional, Dict, Any, Tuple
+
+from src.core.config_loader import load_llm_config
+
+PROJECT_ROOT = Path(__file__).parent.parent.parent
+
+# Process-wide counters (reset with reset_cache_stats)
+_stats_lock = threading.Lock()
+_stats: Dict[str, int] = {
+    "hits": 0,
+    "misses": 0,
+    "writes": 0,
+    "evictions": 0,
+    "bytes_read": 0,
+    "bytes_written": 0
+}
+
+_initialized_paths = set()
+
+
+def _get_settings() -> Dict[str, Any]:
+    """Cache settings from config/llm.yaml with safe defaults"""
+    try:
+        settings = load_llm_config().get("cache", {})
+    except (FileNotFoundError, ValueError):
+        settings = {}
+    return {
+        "enabled": settings.get("enabled", True),
+        "path": settings.get("path", "database/llm_cache.db"),
+        "ttl_hours": settings.get("ttl_hours", 168),
+        "max_entries": settings.get("max_entries", 5000),
+        "max_bytes": settings.get("max_bytes", 50 * 1024 * 1024)
+    }
+
+
+def _cache_path(settings: Dict[str, Any]) -> str:
+    path = Path(settings["path"])
+    if not path.is_absolute():
+        path = PROJECT_ROOT / path
+    path.parent.mkdir(parents=True, exist_ok=True)
+    return str(path)
+
+
+@contextmanager
+def _get_connection(settings: Dict[str, Any]):
+    """Context manager for cache database connections"""
+    db_path = _cache_path(settings)
+    conn = sqlite3.connect(db_path, timeout=5)
+    try:
+        if db_path not in _initialized_paths:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS llm_cache (
+                    cache_key TEXT PRIMARY KEY,
+                    response_text TEXT NOT NULL,
+                    tokens_used INTEGER DEFAULT 0,
+                    size_bytes INTEGER NOT NULL,
+                    created_at REAL NOT NULL,
+                    last_accessed REAL NOT NULL
+                )
+            """)
+            conn.execute("""
+                CREATE INDEX IF NOT EXISTS idx_llm_cache_lru
+                ON llm_cache(last_accessed)
+            """)
+            _initialized_paths.add(db_path)
+        yield conn
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+
+def _bump(counter: str, amount: int = 1) -> None:
+    with _stats_lock:
+        _stats[counter] += amount
+
+
+def is_cache_enabled() -> bool:
+    """Check if the response cache is enabled in config/llm.yaml"""
+    return bool(_get_settings()["enabled"])
+
+
+def make_cache_key(
+    prompt: str,
+    model: str,
+    temperature: float,
+    max_tokens: int,
+    json_schema: Optional[Dict[str, Any]] = None
+) -> str:
+    """
+    Build content-addressed cache key for an LLM request
+
+    Args:
+        prompt: Full prompt string
+        model: Provider model name (e.g., "llama-3.3-70b-versatile")
+        temperature: Sampling temperature
+        max_tokens: Maximum tokens in response
+        json_schema: JSON mode schema (plain-text requests keep their existing keys)
+
+    Returns:
+        Hex sha256 digest
+    """
+    request = {
+        "prompt": prompt,
+        "model": model,
+        "temperature": round(float(temperature), 4),
+        "max_tokens": int(max_tokens)
+    }
+    if json_schema:
+        request["json_schema"] = json_schema
+    payload = json.dumps(request, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def get_cached_response(cache_key: str) -> Optional[Tuple[str, int]]:
+    """
+    Look up a cached response (expired entries count as misses and are removed)
+
+    Args:
+        cache_key: Key from make_cache_key()
+
+    Returns:
+        Tuple of (response_text, tokens_used) or None on miss
+    """
+    settings = _get_settings()
+    now = time.time()
+    ttl_seconds = settings["ttl_hours"] * 3600
+
+    with _get_connection(settings) as conn:
+        row = conn.execute(
+            "SELECT response_text, tokens_used, size_bytes, created_at FROM llm_cache WHERE cache_key = ?",
+            (cache_key,)
+        ).fetchone()
+
+        if row is None:
+            _bump("misses")
+            return None
+
+        response_text, tokens_used, size_bytes, created_at = row
+        if ttl_seconds and now - created_at > ttl_seconds:
+            conn.execute("DELETE FROM llm_cache WHERE cache_key = ?", (cache_key,))
+            _bump("misses")
+            _bump("evictions")
+            return None
+
+        conn.execute(
+            "UPDATE llm_cache SET last_accessed = ? WHERE cache_key = ?",
+            (now, cache_key)
+        )
+
+    _bump("hits")
+    _bump("bytes_read", size_bytes)
+    return response_text, tokens_used
+
+
+def store_response(cache_key: str, response_text: str, tokens_used: int = 0) -> None:
+    """
+    Store a response and evict least-recently-used entries beyond the size bounds
+
+    Args:
+        cache_key: Key from make_cache_key()
+        response_text: LLM response text
+        tokens_used: Tokens the original call consumed
+    """
+    settings = _get_settings()
+    now = time.time()
+    size_bytes = len(response_text.encode("utf-8"))
+
+    # A single response larger than the whole budget is never worth keeping
+    if settings["max_bytes"] and size_bytes > settings["max_bytes"]:
+        return
+
+    with _get_connection(settings) as conn:
+        conn.execute("""
+            INSERT OR REPLACE INTO llm_cache
+            (cache_key, response_text, tokens_used, size_bytes, created_at, last_accessed)
+            VALUES (?, ?, ?, ?, ?, ?)
+        """, (cache_key, response_text, tokens_used, size_bytes, now, now))
+
+        evicted = _evict_lru(conn, settings["max_entries"], settings["max_bytes"])
+
+    _bump("writes")
+    _bump("bytes_written", size_bytes)
+    if evicted:
+        _bump("evictions", evicted)
+
+
+def delete_response(cache_key: str) -> bool:
+    """
+    Remove a cached response (e.g. one the caller rejected)
+
+    Returns:
+        True if an entry was removed
+    """
+    with _get_connection(_get_settings()) as conn:
+        deleted = conn.execute("DELETE FROM llm_cache WHERE cache_key = ?", (cache_key,)).rowcount
+    return bool(deleted)
+
+
+def _evict_lru(conn: sqlite3.Connection, max_entries: int, max_bytes: int) -> int:
+    """Delete least-recently-used rows until both bounds hold. Returns rows deleted."""
+    count, total_bytes = conn.execute(
+        "SELECT COUNT(*), COALESCE(SUM(size_bytes), 0) FROM llm_cache"
+    ).fetchone()
+
+    excess_entries = max(count - max_entries, 0) if max_entries else 0
+    excess_bytes = max(total_bytes - max_bytes, 0) if max_bytes else 0
+    if not excess_entries and not excess_bytes:
+        return 0
+
+    victims = []
+    freed = 0
+    for cache_key, size_bytes in conn.execute(
+        "SELECT cache_key, size_bytes FROM llm_cache ORDER BY last_accessed ASC"
+    ):
+        if len(victims) >= excess_entries and freed >= excess_bytes:
+            break
+        victims.append((cache_key,))
+        freed += size_bytes
+
+    conn.executemany("DELETE FROM llm_cache WHERE cache_key = ?", victims)
+    return len(victims)
+
+
+def get_cache_stats() -> Dict[str, Any]:
+    """
+    Get cache counters for this process plus current table size
+
+    Returns:
+        Dict with hits, misses, writes, evictions, bytes_read, bytes_written,
+        hit_rate, entries, total_bytes
+    """
+    with _stats_lock:
+        stats = dict(_stats)
+
+    lookups = stats["hits"] + stats["misses"]
+    stats["hit_rate"] = round(stats["hits"] / lookups, 3) if lookups else 0.0
+
+    settings = _get_settings()
+    with _get_connection(settings) as conn:
+        entries, total_bytes = conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size_bytes), 0) FROM llm_cache"
+        ).fetchone()
+    stats["entries"] = entries
+    stats["total_bytes"] = total_bytes
+    return stats
+
+
+def reset_cache_stats() -> None:
+    """Reset process counters (does not touch stored responses)"""
+    with _stats_lock:
+        for counter in _stats:
+            _stats[counter] = 0
+
+
+def clear_llm_cache() -> int:
+    """
+    Delete all cached responses
+
+    Returns:
+        Number of entries deleted
+    """
+    settings = _get_settings()
+    with _get_connection(settings) as conn:
+        cursor = conn.execute("DELETE FROM llm_cache")
+        return cursor.rowcount
+
+
+if __name__ == "__main__":
+    print("LLM response cache stats:")
+    for name, value in get_cache_stats().items():
+        print(f"  {name}: {value}")
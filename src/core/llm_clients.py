@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""
+LLM Client Registry for learn_flow
+One pooled, thread-safe client per provider/credential, shared by every call_llm
+
+- Groq: keep-alive httpx pool (no TLS handshake per module generation)
+- Ollama: reused ollama.Client per host
+- Provider settings (Streamlit secrets / env vars) re-read only when they change
+"""
+import hashlib
+import os
+import threading
+from pathlib import Path
+from typing import Dict, Any, Optional, Tuple
+
+from src.core.config_loader import load_llm_config
+
+# Try to import streamlit for secrets (when deployed)
+try:
+    import streamlit as st
+    HAS_STREAMLIT = True
+except ImportError:
+    HAS_STREAMLIT = False
+
+PROJECT_ROOT = Path(__file__).parent.parent.parent
+
+# Streamlit reads secrets from these files (project first, then user home)
+SECRETS_PATHS = [
+    PROJECT_ROOT / ".streamlit" / "secrets.toml",
+    Path.home() / ".streamlit" / "secrets.toml"
+]
+ENV_VARS = ("LOCAL_MODE", "GROQ_API_KEY", "OLLAMA_HOST")
+
+_lock = threading.Lock()
+_clients: Dict[Tuple[str, str], Any] = {}
+_settings_cache: Dict[str, Any] = {"fingerprint": None, "settings": None}
+
+
+def _get_pool_settings() -> Dict[str, Any]:
+    """Connection pool settings from config/llm.yaml with safe defaults"""
+    try:
+        settings = load_llm_config().get("client", {})
+    except (FileNotFoundError, ValueError):
+        settings = {}
+    return {
+        "pool_size": settings.get("pool_size", 10),
+        "keepalive_expiry_seconds": settings.get("keepalive_expiry_seconds", 30)
+    }
+
+
+def _settings_fingerprint() -> Tuple:
+    """Cheap fingerprint of everything provider settings depend on"""
+    mtimes = []
+    for path in SECRETS_PATHS:
+        try:
+            mtimes.append(path.stat().st_mtime_ns)
+        except OSError:
+            mtimes.append(None)
+    return tuple(mtimes) + tuple(os.getenv(name) for name in ENV_VARS)
+
+
+def _get_llm_secrets() -> Optional[Any]:
+    """Get [llm] Streamlit secrets section, or None when no secrets file exists"""
+    if not HAS_STREAMLIT or not hasattr(st, 'secrets'):
+        return None
+    try:
+        return st.secrets['llm'] if 'llm' in st.secrets else None
+    except Exception:
+        # Streamlit raises when no secrets.toml is present (local runs, tests)
+        return None
+
+
+def _read_provider_settings() -> Dict[str, Any]:
+    """Read provider settings: Streamlit secrets first (deployed), then env vars (local)"""
+    llm_secrets = _get_llm_secrets()
+    if llm_secrets is not None:
+        provider = llm_secrets.get('provider', 'groq')
+        return {
+            "provider": "ollama" if provider == 'ollama' else "groq",
+            "api_key": llm_secrets.get('groq_api_key') if provider == 'groq' else None,
+            "ollama_host": llm_secrets.get('ollama_base_url') or os.getenv("OLLAMA_HOST")
+        }
+
+    local_mode = os.getenv("LOCAL_MODE", "false").lower() == "true"
+    return {
+        "provider": "ollama" if local_mode else "groq",
+        "api_key": os.getenv("GROQ_API_KEY"),
+        "ollama_host": os.getenv("OLLAMA_HOST")
+    }
+
+
+def get_provider_settings() -> Dict[str, Any]:
+    """
+    Get provider settings, re-reading secrets/env only when they changed
+
+    Returns:
+        Dict with provider ("groq" | "ollama"), api_key, ollama_host
+    """
+    fingerprint = _settings_fingerprint()
+    with _lock:
+        if _settings_cache["fingerprint"] != fingerprint or _settings_cache["settings"] is None:
+            _settings_cache["settings"] = _read_provider_settings()
+            _settings_cache["fingerprint"] = fingerprint
+        return dict(_settings_cache["settings"])
+
+
+def _credential_id(secret: Optional[str]) -> str:
+    """Registry key for a credential (never keep raw keys as dict keys)"""
+    return hashlib.sha256((secret or "").encode("utf-8")).hexdigest()[:16]
+
+
+def _replace_client(provider: str, credential: str, client: Any) -> None:
+    """Register client, closing clients of the same provider with a stale credential"""
+    for key in [k for k in _clients if k[0] == provider and k[1] != credential]:
+        _close(_clients.pop(key))
+    _clients[(provider, credential)] = client
+
+
+def _close(client: Any) -> None:
+    close = getattr(client, "close", None)
+    if close is None:
+        # ollama.Client keeps its httpx client on _client
+        close = getattr(getattr(client, "_client", None), "close", None)
+    if close:
+        try:
+            close()
+        except Exception:
+            pass
+
+
+def get_groq_client(api_key: str):
+    """
+    Get the shared Groq client for this API key (created on first use)
+
+    Args:
+        api_key: Groq API key
+
+    Returns:
+        groq.Groq client backed by a keep-alive connection pool
+    """
+    credential = _credential_id(api_key)
+    key = ("groq", credential)
+
+    with _lock:
+        client = _clients.get(key)
+        if client is None:
+            import httpx
+            from groq import Groq, DefaultHttpxClient
+
+            pool = _get_pool_settings()
+            http_client = DefaultHttpxClient(
+                limits=httpx.Limits(
+                    max_connections=pool["pool_size"],
+                    max_keepalive_connections=pool["pool_size"],
+                    keepalive_expiry=pool["keepalive_expiry_seconds"]
+                )
+            )
+            client = Groq(api_key=api_key, http_client=http_client)
+            _replace_client("groq", credential, client)
+        return client
+
+
+def get_ollama_client(host: Optional[str] = None):
+    """
+    Get the shared Ollama client for this host (created on first use)
+
+    Args:
+        host: Ollama base URL (None → ollama default / OLLAMA_HOST)
+
+    Returns:
+        ollama.Client with a keep-alive connection pool
+    """
+    credential = _credential_id(host)
+    key = ("ollama", credential)
+
+    with _lock:
+        client = _clients.get(key)
+        if client is None:
+            import httpx
+            import ollama
+
+            pool = _get_pool_settings()
+            client = ollama.Client(
+                host=host,
+                limits=httpx.Limits(
+                    max_connections=pool["pool_size"],
+                    max_keepalive_connections=pool["pool_size"],
+                    keepalive_expiry=pool["keepalive_expiry_seconds"]
+                )
+            )
+            _replace_client("ollama", credential, client)
+        return client
+
+
+def close_clients() -> None:
+    """Close all pooled clients (tests, shutdown)"""
+    with _lock:
+        for client in _clients.values():
+            _close(client)
+        _clients.clear()
+        _settings_cache["fingerprint"] = None
+        _settings_cache["settings"] = None
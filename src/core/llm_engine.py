@@ -3,10 +3,26 @@
 LLM Engine for learn_flow
 Phase 2A.2: Dual-mode Llama 3.3 70B (Ollama dev + Groq deploy)
 """
+import asyncio
+import contextvars
+import json
 import os
-from typing import Tuple
+import threading
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Tuple, TypeVar, Optional, Iterator
 from pathlib import Path
 
+from src.core import llm_cache
+from src.core import llm_clients
+from src.core import llm_metrics
+from src.core import llm_profiles
+from src.core import llm_router
+from src.core import quota
+from src.core import rate_limiter
+from src.core.config_loader import load_llm_config
+from src.core.llm_profiles import GROQ_MODEL, OLLAMA_MODEL  # Default models per provider
+
 # Load .env file from project root (not src/core/)
 try:
     from dotenv import load_dotenv
@@ -17,90 +33,874 @@ try:
 except ImportError:
     pass  # dotenv not installed, skip
 
-# Try to import streamlit for secrets (when deployed)
-try:
-    import streamlit as st
-    HAS_STREAMLIT = True
-except ImportError:
-    HAS_STREAMLIT = False
 
+T = TypeVar("T")
+
+# Groq's json_object mode only returns objects: top-level arrays are wrapped under this key
+ARRAY_WRAPPER_KEY = "items"
+
+_in_flight_lock = threading.Lock()
+_in_flight: Optional[threading.BoundedSemaphore] = None
+_async_in_flight: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = weakref.WeakKeyDictionary()
+_deadline_executor: Optional[ThreadPoolExecutor] = None
+
+
+def is_structured_output_enabled() -> bool:
+    """Provider JSON mode switch (structured_output.enabled in llm.yaml)"""
+    try:
+        return bool(load_llm_config().get("structured_output", {}).get("enabled", True))
+    except (FileNotFoundError, ValueError):
+        return True
+
+
+def _json_mode_instruction(json_schema: Dict[str, Any]) -> str:
+    """System message for Groq JSON mode (the schema itself is not enforced server-side)"""
+    if json_schema.get("type") == "array":
+        wrapped = {
+            "type": "object",
+            "properties": {ARRAY_WRAPPER_KEY: json_schema},
+            "required": [ARRAY_WRAPPER_KEY]
+        }
+        return (
+            f'Respond with a JSON object {{"{ARRAY_WRAPPER_KEY}": [...]}} whose "{ARRAY_WRAPPER_KEY}" '
+            f"array is the requested output. JSON schema: {json.dumps(wrapped)}"
+        )
+    return f"Respond with a JSON object matching this JSON schema: {json.dumps(json_schema)}"
+
+
+def _unwrap_array(response_text: str) -> str:
+    """Undo the array wrapping of _json_mode_instruction (unparseable text is returned as-is)"""
+    try:
+        data = json.loads(response_text)
+    except json.JSONDecodeError:
+        return response_text
+    if isinstance(data, dict):
+        if isinstance(data.get(ARRAY_WRAPPER_KEY), list):
+            return json.dumps(data[ARRAY_WRAPPER_KEY])
+        # Model picked its own key for the array
+        lists = [value for value in data.values() if isinstance(value, list)]
+        if len(lists) == 1:
+            return json.dumps(lists[0])
+    return response_text
+
+
+def _failed_generation(error: Exception) -> Optional[str]:
+    """
+    Text Groq rejected in JSON mode (400 json_validate_failed), if the error carries it
+
+    Usually a near-miss such as LaTeX escapes that extract_json's repair step can
+    fix, which is far cheaper than regenerating.
+    """
+    body = getattr(error, "body", None)
+    if not isinstance(body, dict):
+        return None
+    details = body.get("error", body)
+    if not isinstance(details, dict):
+        return None
+    failed = details.get("failed_generation")
+    return failed if isinstance(failed, str) and failed else None
+
+
+def _with_deadline(request: Callable[[], Any], timeout: Optional[float]) -> Any:
+    """
+    Run a blocking request, giving up after `timeout` seconds (None → wait forever)
+
+    For clients without a per-request timeout (ollama): the caller is released,
+    but the abandoned request finishes in the background.
+    """
+    global _deadline_executor
+    if not timeout:
+        return request()
+    with _in_flight_lock:
+        if _deadline_executor is None:
+            _deadline_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="llm-deadline")
+    # Copy the context so the provider can still report usage to the current call
+    future = _deadline_executor.submit(contextvars.copy_context().run, request)
+    try:
+        return future.result(timeout=timeout)
+    except TimeoutError:
+        raise TimeoutError(f"No response within {timeout}s") from None
+
+
+def _call_ollama(
+    prompt: str,
+    model: str,
+    temperature: float,
+    max_tokens: int,
+    host: Optional[str] = None,
+    json_schema: Optional[Dict[str, Any]] = None,
+    timeout: Optional[float] = None
+) -> Tuple[str, int]:
+    """DEV MODE: FREE Ollama (unlimited local inference)"""
+    try:
+        client = llm_clients.get_ollama_client(host)
+    except ImportError:
+        raise ImportError(
+            "Ollama not installed. Install with:\n"
+            "  brew install ollama  # macOS\n"
+            "  ollama pull llama3.3:70b"
+        )
+
+    # Ollama constrains decoding to the schema (arrays included)
+    json_mode = {'format': json_schema} if json_schema else {}
+    response = _with_deadline(lambda: client.chat(
+        model=model,
+        messages=[{'role': 'user', 'content': prompt}],
+        options={
+            'num_predict': max_tokens,
+            'temperature': temperature
+        },
+        **json_mode
+    ), timeout)
+
+    response_text = response['message']['content']
+    prompt_tokens, completion_tokens = response.get('prompt_eval_count'), response.get('eval_count')
+    if prompt_tokens is not None and completion_tokens is not None:
+        llm_metrics.record_usage(prompt_tokens, completion_tokens)
+        tokens_used = prompt_tokens + completion_tokens
+    else:
+        # Older Ollama versions don't return token counts, estimate as ~4 chars per token
+        tokens_used = len(prompt + response_text) // 4
+
+    return response_text, tokens_used
+
+
+def _call_groq(
+    prompt: str,
+    model: str,
+    temperature: float,
+    max_tokens: int,
+    api_key: Optional[str],
+    json_schema: Optional[Dict[str, Any]] = None,
+    timeout: Optional[float] = None
+) -> Tuple[str, int]:
+    """DEPLOY MODE: Groq API (for beta testers)"""
+    if not api_key:
+        raise ValueError(
+            "GROQ_API_KEY not found in Streamlit secrets or environment variables.\n"
+            "Add groq_api_key to [llm] section in Streamlit Cloud secrets, or set GROQ_API_KEY env var."
+        )
+
+    # Shared pooled client - no client construction / TLS handshake per call
+    client = llm_clients.get_groq_client(api_key)
+
+    messages = [{"role": "user", "content": prompt}]
+    extra = {"timeout": timeout} if timeout else {}
+    if json_schema:
+        messages.insert(0, {"role": "system", "content": _json_mode_instruction(json_schema)})
+        extra["response_format"] = {"type": "json_object"}
+
+    try:
+        response = client.chat.completions.create(
+            model=model,
+            messages=messages,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            **extra
+        )
+    except Exception as e:
+        failed = _failed_generation(e) if json_schema else None
+        if failed is None:
+            raise
+        print("   ⚠️  Groq rejected JSON mode output, passing it on for local repair")
+        response_text, tokens_used = failed, (len(prompt) + len(failed)) // 4
+    else:
+        tokens_used = response.usage.total_tokens
+        response_text = response.choices[0].message.content
+        llm_metrics.record_usage(
+            getattr(response.usage, "prompt_tokens", None),
+            getattr(response.usage, "completion_tokens", None)
+        )
+
+    if json_schema and json_schema.get("type") == "array":
+        response_text = _unwrap_array(response_text)
+
+    return response_text, tokens_used
+
+
+def _stream_ollama(
+    prompt: str,
+    model: str,
+    temperature: float,
+    max_tokens: int,
+    host: Optional[str] = None,
+    json_schema: Optional[Dict[str, Any]] = None
+) -> Iterator[str]:
+    """Streaming variant of _call_ollama - yields text chunks, returns tokens_used"""
+    try:
+        client = llm_clients.get_ollama_client(host)
+    except ImportError:
+        raise ImportError(
+            "Ollama not installed. Install with:\n"
+            "  brew install ollama  # macOS\n"
+            "  ollama pull llama3.3:70b"
+        )
+
+    stream = client.chat(
+        model=model,
+        messages=[{'role': 'user', 'content': prompt}],
+        options={
+            'num_predict': max_tokens,
+            'temperature': temperature
+        },
+        stream=True,
+        **({'format': json_schema} if json_schema else {})
+    )
+
+    tokens_used = None
+    response_len = 0
+    for chunk in stream:
+        text = chunk['message']['content']
+        if text:
+            response_len += len(text)
+            yield text
+        if chunk.get('done'):
+            # The final chunk carries the same counts as a non-streamed response
+            prompt_tokens, completion_tokens = chunk.get('prompt_eval_count'), chunk.get('eval_count')
+            if prompt_tokens is not None and completion_tokens is not None:
+                tokens_used = prompt_tokens + completion_tokens
+
+    if tokens_used is None:
+        # Counts missing, estimate as ~4 chars per token
+        tokens_used = (len(prompt) + response_len) // 4
+    return tokens_used
 
-def call_llm(prompt: str, temperature: float = 0.1, max_tokens: int = 2000) -> Tuple[str, int]:
+
+def _stream_groq(
+    prompt: str,
+    model: str,
+    temperature: float,
+    max_tokens: int,
+    api_key: Optional[str],
+    timeout: Optional[float] = None,
+    json_schema: Optional[Dict[str, Any]] = None
+) -> Iterator[str]:
+    """
+    Streaming variant of _call_groq - yields text chunks, returns tokens_used (timeout applies per read)
+
+    JSON mode works as in _call_groq, except that array schemas are not
+    unwrapped: chunks are passed on as the provider sends them.
+    """
+    if not api_key:
+        raise ValueError(
+            "GROQ_API_KEY not found in Streamlit secrets or environment variables.\n"
+            "Add groq_api_key to [llm] section in Streamlit Cloud secrets, or set GROQ_API_KEY env var."
+        )
+
+    client = llm_clients.get_groq_client(api_key)
+
+    messages = [{"role": "user", "content": prompt}]
+    extra = {"timeout": timeout} if timeout else {}
+    if json_schema:
+        messages.insert(0, {"role": "system", "content": _json_mode_instruction(json_schema)})
+        extra["response_format"] = {"type": "json_object"}
+
+    stream = client.chat.completions.create(
+        model=model,
+        messages=messages,
+        temperature=temperature,
+        max_tokens=max_tokens,
+        stream=True,
+        stream_options={"include_usage": True},
+        **extra
+    )
+
+    tokens_used = None
+    response_len = 0
+    for chunk in stream:
+        if chunk.choices:
+            text = chunk.choices[0].delta.content
+            if text:
+                response_len += len(text)
+                yield text
+        if chunk.usage:
+            tokens_used = chunk.usage.total_tokens
+
+    if tokens_used is None:
+        tokens_used = (len(prompt) + response_len) // 4
+    return tokens_used
+
+
+def _open_stream(
+    settings: dict,
+    route: Tuple[str, str],
+    prompt: str,
+    temperature: float,
+    max_tokens: int,
+    timeout: Optional[float] = None,
+    json_schema: Optional[Dict[str, Any]] = None
+) -> Iterator[str]:
+    provider, model = route
+    json_mode = {"json_schema": json_schema} if json_schema else {}
+    if provider == "ollama":
+        # The ollama client has no per-request timeout (see _with_deadline)
+        return _stream_ollama(prompt, model, temperature, max_tokens, settings["ollama_host"], **json_mode)
+    return _stream_groq(prompt, model, temperature, max_tokens, settings["api_key"], timeout=timeout, **json_mode)
+
+
+def _max_in_flight() -> int:
+    """rate_limits.max_in_flight from llm.yaml (default 8)"""
+    try:
+        return load_llm_config().get("rate_limits", {}).get("max_in_flight", 8)
+    except (FileNotFoundError, ValueError):
+        return 8
+
+
+def _get_in_flight_semaphore() -> threading.BoundedSemaphore:
+    """Process-wide cap on concurrent provider requests (rate_limits.max_in_flight)"""
+    global _in_flight
+    with _in_flight_lock:
+        if _in_flight is None:
+            _in_flight = threading.BoundedSemaphore(_max_in_flight())
+        return _in_flight
+
+
+def _get_async_in_flight_semaphore() -> asyncio.Semaphore:
+    """
+    max_in_flight cap for acall_llm on the running event loop
+
+    asyncio primitives belong to one loop, so each loop gets its own. Admitted
+    requests still take the process-wide semaphore in their worker thread, so
+    this only keeps waiting coroutines from tying up worker threads.
+    """
+    loop = asyncio.get_running_loop()
+    with _in_flight_lock:
+        semaphore = _async_in_flight.get(loop)
+        if semaphore is None:
+            semaphore = _async_in_flight[loop] = asyncio.Semaphore(_max_in_flight())
+        return semaphore
+
+
+def _route_in_flight(
+    routes: List[Tuple[str, str]],
+    attempt: Callable[[Tuple[str, str]], Tuple[str, int]],
+    max_retries: Optional[int]
+) -> Tuple[Tuple[str, int], Tuple[str, str]]:
+    """Route a request while holding a max_in_flight slot"""
+    with _get_in_flight_semaphore():
+        return llm_router.get_router().route(routes, attempt, max_retries)
+
+
+def _estimate_tokens(prompt: str, max_tokens: int) -> int:
+    """Upper-bound token estimate for rate limiting (~4 chars per token + full completion)"""
+    return len(prompt) // 4 + max_tokens
+
+
+def _cache_lookup(
+    prompt: str,
+    model: str,
+    temperature: float,
+    max_tokens: int,
+    use_cache: bool,
+    json_schema: Optional[Dict[str, Any]] = None
+) -> Tuple[Optional[str], Optional[Tuple[str, int]]]:
+    """Returns (cache_key, cached_response) - cache_key is None when caching is off"""
+    if not use_cache or not llm_cache.is_cache_enabled():
+        return None, None
+    cache_key = llm_cache.make_cache_key(prompt, model, temperature, max_tokens, json_schema)
+    return cache_key, llm_cache.get_cached_response(cache_key)
+
+
+def _provider_order(settings: dict) -> List[str]:
+    """Configured provider first, then routing.fallback_providers (Groq only with an API key)"""
+    providers = [settings["provider"]]
+    for provider in llm_router.get_router().settings["fallback_providers"]:
+        if provider in providers or (provider == "groq" and not settings["api_key"]):
+            continue
+        providers.append(provider)
+    return providers
+
+
+def _routes(settings: dict, profile: Dict[str, Any]) -> List[Tuple[str, str]]:
+    """
+    (provider, model) routes in preference order for a call profile
+
+    The profile model and its fallback model on each provider, providers in
+    _provider_order (e.g. groq/70B, groq/8B, ollama/local model).
+    """
+    routes = []
+    for provider in _provider_order(settings):
+        for model in (profile["model"], profile["fallback_model"]):
+            if model is None:
+                continue
+            route = (provider, llm_profiles.provider_model(provider, model))
+            if route not in routes:
+                routes.append(route)
+    return routes
+
+
+def _current_profile() -> Dict[str, Any]:
+    """Call profile for the agent/task of the current llm_metrics.call_context()"""
+    context = llm_metrics.current_context()
+    return llm_profiles.get_call_profile(context["agent"], context["task"])
+
+
+def _dispatch(
+    settings: dict,
+    route: Tuple[str, str],
+    prompt: str,
+    temperature: float,
+    max_tokens: int,
+    json_schema: Optional[Dict[str, Any]] = None,
+    timeout: Optional[float] = None
+) -> Tuple[str, int]:
+    """Send the request to one (provider, model) route"""
+    provider, model = route
+    if provider == "ollama":
+        return _call_ollama(prompt, model, temperature, max_tokens, settings["ollama_host"],
+                            json_schema=json_schema, timeout=timeout)
+    return _call_groq(prompt, model, temperature, max_tokens, settings["api_key"],
+                      json_schema=json_schema, timeout=timeout)
+
+
+class _LimitedAttempt:
+    """
+    Router attempt: one request on a route, under its provider's rate limiter
+
+    `prepaid` names a provider whose first request was already admitted by the
+    caller (acall_llm waits for the primary's limiter on the event loop).
+
+    Every attempt charges the tokens it used to its provider's limiter and to
+    the attempt's running total, which the caller commits to the user's quota
+    with settle(). A hedged loser that finishes after settle() commits its own
+    tokens, so both requests of a hedge are paid for.
+    """
+
+    def __init__(
+        self,
+        settings: dict,
+        prompt: str,
+        temperature: float,
+        max_tokens: int,
+        json_schema: Optional[Dict[str, Any]],
+        timeout: Optional[float],
+        estimate: int,
+        prepaid: Optional[str] = None,
+        user_id: Optional[int] = None
+    ):
+        self.settings = settings
+        self.prompt = prompt
+        self.temperature = temperature
+        self.max_tokens = max_tokens
+        self.json_schema = json_schema
+        self.timeout = timeout
+        self.estimate = estimate
+        self._prepaid = prepaid
+        self.user_id = user_id
+        self._lock = threading.Lock()
+        self._tokens_spent = 0
+        self._settled = False
+
+    def __call__(self, route: Tuple[str, str]) -> Tuple[str, int]:
+        provider = route[0]
+        limiter = rate_limiter.get_rate_limiter(provider)
+        with self._lock:
+            prepaid = provider == self._prepaid
+            if prepaid:
+                self._prepaid = None
+        if not prepaid:
+            limiter.acquire(self.estimate)
+        tokens_used = 0
+        try:
+            response_text, tokens_used = _dispatch(
+                self.settings, route, self.prompt, self.temperature, self.max_tokens, self.json_schema, self.timeout
+            )
+        finally:
+            limiter.refund(self.estimate - tokens_used)
+            with self._lock:
+                late = self._settled
+                if not late:
+                    self._tokens_spent += tokens_used
+            if late and tokens_used:
+                quota.get_quota_service().commit(self.user_id, 0, tokens_used)
+        return response_text, tokens_used
+
+    def settle(self) -> int:
+        """Tokens used by all attempts so far; later attempts commit their own"""
+        with self._lock:
+            self._settled = True
+            return self._tokens_spent
+
+    def release_prepaid(self) -> None:
+        """Return the prepaid admission if the router never used it (e.g. open breaker)"""
+        with self._lock:
+            provider, self._prepaid = self._prepaid, None
+        if provider:
+            rate_limiter.get_rate_limiter(provider).refund(self.estimate)
+
+
+def call_llm(
+    prompt: str,
+    temperature: float = 0.1,
+    max_tokens: int = 2000,
+    use_cache: bool = True,
+    json_schema: Optional[Dict[str, Any]] = None
+) -> Tuple[str, int]:
     """
     Dual-mode LLM: Ollama (LOCAL_MODE=true) or Groq (LOCAL_MODE=false)
 
     SAME FUNCTION SIGNATURE - Zero changes to job_parser.py or topic_assessor.py
 
+    Identical requests (prompt, model, temperature, max_tokens) are served from the
+    persistent response cache (see llm_cache.py) without calling the provider.
+    Provider requests queue on the shared rate limiter (see rate_limiter.py) and
+    the max_in_flight semaphore instead of failing with 429s. Every call,
+    cache hits and errors included, is recorded in llm_metrics under the
+    agent/user set with llm_metrics.call_context(). Calls for a user are
+    metered against their token budget (see quota.py) - cache hits are free.
+    Model, timeout, retries and fallback model come from the calling agent's
+    call profile (see llm_profiles.py). Provider errors are retried and fail
+    over to the fallback model, then routing.fallback_providers, behind
+    per-route circuit breakers, optionally hedging slow requests (see
+    llm_router.py). Fallback answers are not cached.
+
+    With json_schema the provider's JSON mode is used (Ollama format=schema, Groq
+    response_format json_object), so the response is JSON rather than prose
+    around JSON. Array schemas still return a JSON array. Callers should keep
+    checking the result (see schemas.check_schema): Groq does not enforce the schema.
+
+    Responses are cached as soon as they arrive. Callers that parse/validate the
+    response should use call_llm_checked, which only caches accepted responses.
+
     Args:
         prompt: User prompt string
         temperature: Model temperature (default 0.1)
         max_tokens: Maximum tokens in response (default 2000)
+        use_cache: Read/write the response cache (default True)
+        json_schema: Expected output schema (see schemas.py) - enables JSON mode
 
     Returns:
-        Tuple of (response_text, tokens_used)
+        Tuple of (response_text, tokens_used) - tokens_used is 0 on a cache hit
 
     Raises:
         ImportError: If Ollama not installed in LOCAL_MODE
         ValueError: If GROQ_API_KEY not set in deploy mode
+        QuotaExceededError: If the current user is over their token budget
     """
-    # Check for Streamlit secrets first (deployed), then fall back to env vars (local)
-    if HAS_STREAMLIT and hasattr(st, 'secrets') and 'llm' in st.secrets:
-        provider = st.secrets['llm'].get('provider', 'groq')
-        local_mode = provider == 'ollama'
-        api_key = st.secrets['llm'].get('groq_api_key') if provider == 'groq' else None
-    else:
-        local_mode = os.getenv("LOCAL_MODE", "false").lower() == "true"
-        api_key = os.getenv("GROQ_API_KEY")
+    response_text, tokens_used, cache_key, cacheable = _call_llm(
+        prompt, temperature, max_tokens, use_cache, json_schema
+    )
+    if cacheable:
+        llm_cache.store_response(cache_key, response_text, tokens_used)
+    return response_text, tokens_used
+
+
+def _call_llm(
+    prompt: str,
+    temperature: float,
+    max_tokens: int,
+    use_cache: bool,
+    json_schema: Optional[Dict[str, Any]]
+) -> Tuple[str, int, Optional[str], bool]:
+    """
+    call_llm without the cache write
+
+    Returns:
+        Tuple of (response_text, tokens_used, cache_key, cacheable) - cache_key is
+        None when caching is off; cacheable is True for a fresh primary-route answer
+    """
+    settings = llm_clients.get_provider_settings()
+    profile = _current_profile()
+    routes = _routes(settings, profile)
+    provider, model = routes[0]
+    if json_schema and not is_structured_output_enabled():
+        json_schema = None
+
+    with llm_metrics.track_call(provider, model, prompt) as call:
+        cache_key, cached = _cache_lookup(prompt, model, temperature, max_tokens, use_cache, json_schema)
+        if cached is not None:
+            call["cache_hit"] = True
+            return cached[0], 0, cache_key, False
+
+        estimate = _estimate_tokens(prompt, max_tokens)
+        quotas = quota.get_quota_service()
+        reserved = quotas.check_and_reserve(call["user_id"], estimate)
+        attempt = _LimitedAttempt(
+            settings, prompt, temperature, max_tokens, json_schema, profile["timeout_seconds"], estimate,
+            user_id=call["user_id"]
+        )
 
-    if local_mode:
-        # DEV MODE: FREE Ollama (unlimited local inference)
         try:
-            import ollama
-        except ImportError:
-            raise ImportError(
-                "Ollama not installed. Install with:\n"
-                "  brew install ollama  # macOS\n"
-                "  ollama pull llama3.3:70b"
-            )
+            (response_text, tokens_used), route = _route_in_flight(routes, attempt, profile["max_retries"])
+        finally:
+            # Includes a hedged request that finished before the winner returned
+            quotas.commit(call["user_id"], reserved, attempt.settle())
+        call["provider"], call["model"] = route
+        call["tokens_used"] = tokens_used
+
+    # A fallback route's answer is not cached under the primary model's key
+    cacheable = bool(cache_key and response_text and route == routes[0])
+    return response_text, tokens_used, cache_key, cacheable
+
+
+def discard_cached_response(
+    prompt: str,
+    temperature: float = 0.1,
+    max_tokens: int = 2000,
+    json_schema: Optional[Dict[str, Any]] = None
+) -> None:
+    """
+    Drop the cached response for a request (e.g. a streamed response that failed validation)
+
+    Uses the same key as call_llm/stream_llm for the current call profile, so a
+    retry of the request goes to the provider instead of the rejected answer.
+    """
+    if not llm_cache.is_cache_enabled():
+        return
+    settings = llm_clients.get_provider_settings()
+    model = _routes(settings, _current_profile())[0][1]
+    if json_schema and not is_structured_output_enabled():
+        json_schema = None
+    llm_cache.delete_response(llm_cache.make_cache_key(prompt, model, temperature, max_tokens, json_schema))
+
+
+def call_llm_checked(
+    prompt: str,
+    check: Callable[[str], T],
+    temperature: float = 0.1,
+    max_tokens: int = 2000,
+    use_cache: bool = True,
+    json_schema: Optional[Dict[str, Any]] = None
+) -> Tuple[T, int]:
+    """
+    call_llm that only caches responses `check` accepts, with a quality gate for small-model tasks
+
+    `check` parses/validates the response and raises ValueError or
+    AssertionError when it is unusable. A rejected response is not cached (a
+    rejected cache hit is removed), so retries reach the provider. If the
+    current profile is in the small task class (see llm_profiles.py), a
+    rejected response is regenerated once on the large model; otherwise the
+    error propagates.
 
-        response = ollama.chat(
-            model='llama3.1:8b',  # 8B for local dev (18GB RAM compatible)
-            messages=[{'role': 'user', 'content': prompt}],
-            options={
-                'num_predict': max_tokens,
-                'temperature': temperature
-            }
+    Returns:
+        Tuple of (check(response_text), tokens_used across both calls)
+    """
+    response_text, tokens_used, cache_key, cacheable = _call_llm(
+        prompt, temperature, max_tokens, use_cache, json_schema
+    )
+    try:
+        return _check_and_cache(check, response_text, tokens_used, cache_key, cacheable), tokens_used
+    except (ValueError, AssertionError) as e:
+        settings = llm_clients.get_provider_settings()
+        profile = _current_profile()
+        larger = llm_profiles.escalated_profile(profile)
+        # Locally both classes may map to the same model: a retry would return the same answer
+        if larger is None or _routes(settings, larger)[0] == _routes(settings, profile)[0]:
+            raise
+        print(f"   ⚠️  {profile['model']} output rejected ({e}), regenerating with {larger['model']}")
+
+    with llm_profiles.escalate():
+        response_text, more_tokens, cache_key, cacheable = _call_llm(
+            prompt, temperature, max_tokens, use_cache, json_schema
         )
+        result = _check_and_cache(check, response_text, more_tokens, cache_key, cacheable)
+    return result, tokens_used + more_tokens
 
-        response_text = response['message']['content']
-        # Ollama doesn't return token count, estimate as ~4 chars per token
-        tokens_used = len(prompt + response_text) // 4
 
-        return response_text, tokens_used
+def _check_and_cache(
+    check: Callable[[str], T],
+    response_text: str,
+    tokens_used: int,
+    cache_key: Optional[str],
+    cacheable: bool
+) -> T:
+    """Run `check`; cache the response only if it passes, drop a rejected cache hit"""
+    try:
+        result = check(response_text)
+    except (ValueError, AssertionError):
+        if cache_key and not cacheable:
+            llm_cache.delete_response(cache_key)
+        raise
+    if cacheable:
+        llm_cache.store_response(cache_key, response_text, tokens_used)
+    return result
 
-    else:
-        # DEPLOY MODE: Groq API (for beta testers)
-        from groq import Groq
 
-        if not api_key:
-            raise ValueError(
-                "GROQ_API_KEY not found in Streamlit secrets or environment variables.\n"
-                "Add groq_api_key to [llm] section in Streamlit Cloud secrets, or set GROQ_API_KEY env var."
-            )
+def stream_llm(
+    prompt: str,
+    temperature: float = 0.1,
+    max_tokens: int = 2000,
+    use_cache: bool = True,
+    json_schema: Optional[Dict[str, Any]] = None
+) -> Iterator[str]:
+    """
+    Streaming counterpart of call_llm - yields response text chunks as they arrive
 
-        client = Groq(api_key=api_key)
+    Uses the same cache, rate limiter and max_in_flight cap as call_llm. A cache
+    hit yields the whole response as a single chunk. The complete response is
+    cached once the stream finishes. A provider that fails before its first
+    chunk is skipped for the next one; a stream is never retried or hedged.
 
-        response = client.chat.completions.create(
-            model="llama-3.3-70b-versatile",
-            messages=[{"role": "user", "content": prompt}],
-            temperature=temperature,
-            max_tokens=max_tokens
+    Args:
+        prompt: User prompt string
+        temperature: Model temperature (default 0.1)
+        max_tokens: Maximum tokens in response (default 2000)
+        use_cache: Read/write the response cache (default True)
+        json_schema: Expected output schema - enables JSON mode (see call_llm;
+            array schemas are not unwrapped while streaming)
+
+    Yields:
+        Response text chunks (concatenate for the full response)
+    """
+    settings = llm_clients.get_provider_settings()
+    profile = _current_profile()
+    routes = _routes(settings, profile)
+    provider, model = routes[0]
+    if json_schema and not is_structured_output_enabled():
+        json_schema = None
+
+    # No track_call here: context variables set in a generator leak into the consumer
+    call = llm_metrics.new_call(provider, model, prompt)
+    cache_key, cached = _cache_lookup(prompt, model, temperature, max_tokens, use_cache, json_schema)
+    if cached is not None:
+        call["cache_hit"] = True
+        llm_metrics.mark_first_token(call)
+        llm_metrics.finish_call(call)
+        yield cached[0]
+        return
+
+    estimate = _estimate_tokens(prompt, max_tokens)
+    quotas = quota.get_quota_service()
+    try:
+        reserved = quotas.check_and_reserve(call["user_id"], estimate)
+    except quota.QuotaExceededError as e:
+        llm_metrics.finish_call(call, error=e)
+        raise
+    router = llm_router.get_router()
+    candidates = [r for r in routes if router.breaker(r).allow()] or routes
+
+    chunks = []
+    tokens_used = 0
+    error = None
+    limiter = None
+    try:
+        with _get_in_flight_semaphore():
+            # Fail over only until a provider yields its first chunk - after that the
+            # consumer has partial output and a switch would mix two responses
+            for index, route in enumerate(candidates):
+                limiter = rate_limiter.get_rate_limiter(route[0])
+                limiter.acquire(estimate)
+                stream = _open_stream(
+                    settings, route, prompt, temperature, max_tokens, profile["timeout_seconds"], json_schema
+                )
+                try:
+                    chunk = next(stream)
+                except StopIteration as done:
+                    chunk, tokens_used = None, done.value or 0
+                except Exception as e:
+                    limiter.refund(estimate)
+                    limiter = None
+                    router.breaker(route).record_failure()
+                    if index == len(candidates) - 1:
+                        raise
+                    print(f"   ⚠️  {'/'.join(route)} stream failed ({type(e).__name__}: {e}), failing over")
+                    continue
+                router.breaker(route).record_success()
+                call["provider"], call["model"] = route
+                break
+
+            while chunk is not None:
+                llm_metrics.mark_first_token(call)
+                chunks.append(chunk)
+                yield chunk
+                try:
+                    chunk = next(stream)
+                except StopIteration as done:
+                    tokens_used = done.value or 0
+                    break
+    except GeneratorExit:
+        # Consumer stopped reading - not a provider error
+        raise
+    except BaseException as e:
+        error = e
+        raise
+    finally:
+        if limiter is not None:
+            limiter.refund(estimate - tokens_used)
+        spent = tokens_used or ((len(prompt) + sum(map(len, chunks))) // 4 if chunks else 0)
+        quotas.commit(call["user_id"], reserved, spent)
+        llm_metrics.finish_call(call, spent, error=error)
+
+    response_text = "".join(chunks)
+    if cache_key and response_text and (call["provider"], call["model"]) == routes[0]:
+        llm_cache.store_response(cache_key, response_text, tokens_used)
+
+
+async def acall_llm(
+    prompt: str,
+    temperature: float = 0.1,
+    max_tokens: int = 2000,
+    use_cache: bool = True,
+    json_schema: Optional[Dict[str, Any]] = None
+) -> Tuple[str, int]:
+    """
+    Async counterpart of call_llm for fan-out (e.g. asyncio.gather over many prompts)
+
+    Shares the response cache, rate limiter, max_in_flight cap and provider
+    routing with call_llm, so sync and async callers together never exceed the
+    provider limits.
+    Waiting for capacity yields to the event loop; the blocking provider request
+    runs in a worker thread.
+
+    Args:
+        prompt: User prompt string
+        temperature: Model temperature (default 0.1)
+        max_tokens: Maximum tokens in response (default 2000)
+        use_cache: Read/write the response cache (default True)
+        json_schema: Expected output schema - enables JSON mode (see call_llm)
+
+    Returns:
+        Tuple of (response_text, tokens_used) - tokens_used is 0 on a cache hit
+    """
+    settings = llm_clients.get_provider_settings()
+    profile = _current_profile()
+    routes = _routes(settings, profile)
+    provider, model = routes[0]
+    if json_schema and not is_structured_output_enabled():
+        json_schema = None
+
+    with llm_metrics.track_call(provider, model, prompt) as call:
+        cache_key, cached = await asyncio.to_thread(
+            _cache_lookup, prompt, model, temperature, max_tokens, use_cache, json_schema
         )
+        if cached is not None:
+            call["cache_hit"] = True
+            return cached[0], 0
 
-        tokens_used = response.usage.total_tokens
-        response_text = response.choices[0].message.content
+        estimate = _estimate_tokens(prompt, max_tokens)
+        quotas = quota.get_quota_service()
+        if call["user_id"] is not None:
+            # Load persisted usage in a worker so the reservation below doesn't read the database
+            await asyncio.to_thread(quotas.get_usage, call["user_id"])
+        # No await between the reservation and the try: a cancelled task still commits it
+        reserved = quotas.check_and_reserve(call["user_id"], estimate)
+        attempt = None
+        try:
+            # Wait for the primary's limiter on the event loop; retries and fallbacks wait in the worker
+            await rate_limiter.get_rate_limiter(provider).aacquire(estimate)
+            attempt = _LimitedAttempt(
+                settings, prompt, temperature, max_tokens, json_schema, profile["timeout_seconds"], estimate,
+                prepaid=provider, user_id=call["user_id"]
+            )
+            async with _get_async_in_flight_semaphore():
+                # to_thread copies the context, so the provider can report usage to this call.
+                # A cancelled task leaves the worker running; its late tokens are committed by the attempt.
+                (response_text, tokens_used), route = await asyncio.to_thread(
+                    _route_in_flight, routes, attempt, profile["max_retries"]
+                )
+        finally:
+            spent = 0
+            if attempt is not None:
+                attempt.release_prepaid()
+                spent = attempt.settle()
+            quotas.commit(call["user_id"], reserved, spent)
+        call["provider"], call["model"] = route
+        call["tokens_used"] = tokens_used
 
-        return response_text, tokens_used
+    if cache_key and response_text and route == routes[0]:
+        await asyncio.to_thread(llm_cache.store_response, cache_key, response_text, tokens_used)
+
+    return response_text, tokens_used
 
 
 if __name__ == "__main__":
@@ -0,0 +1,295 @@
+#!/usr/bin/env python3
+"""
+LLM Metrics for learn_flow
+Per-call instrumentation for call_llm / stream_llm / acall_llm
+
+Each call records agent, task, user, provider, model, prompt/completion tokens,
+latency, time-to-first-token (streams), cache hit and error class:
+- the most recent calls are kept in a ring buffer (metrics.ring_size) for
+  per-user / per-agent aggregates and percentiles
+- cumulative counters and a latency histogram back a Prometheus text dump
+
+Agent and user are taken from call_context() (set by agents and the UI) so
+callers deep in the stack don't have to thread them through.
+"""
+import contextvars
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Deque, Dict, Iterator, List, Optional, Tuple
+
+from src.core.config_loader import load_llm_config
+
+DEFAULT_RING_SIZE = 2000
+LATENCY_BUCKETS = (0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+_agent_var: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("llm_agent", default=None)
+_task_var: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("llm_task", default=None)
+_user_var: contextvars.ContextVar[Optional[int]] = contextvars.ContextVar("llm_user_id", default=None)
+# Record of the call in progress, so providers can report exact token usage
+_call_var: contextvars.ContextVar[Optional[Dict[str, Any]]] = contextvars.ContextVar("llm_call", default=None)
+
+_lock = threading.Lock()
+_calls: Optional[Deque[Dict[str, Any]]] = None
+# (agent, provider, model) -> cumulative counters (Prometheus counters never reset on eviction)
+_totals: Dict[Tuple[str, str, str], Dict[str, Any]] = {}
+
+
+def _get_ring() -> Deque[Dict[str, Any]]:
+    global _calls
+    if _calls is None:
+        try:
+            ring_size = load_llm_config().get("metrics", {}).get("ring_size", DEFAULT_RING_SIZE)
+        except (FileNotFoundError, ValueError):
+            ring_size = DEFAULT_RING_SIZE
+        _calls = deque(maxlen=ring_size)
+    return _calls
+
+
+@contextmanager
+def call_context(agent: Optional[str] = None, task: Optional[str] = None, user_id: Optional[int] = None) -> Iterator[None]:
+    """
+    Attribute LLM calls made inside the block to an agent/task/user
+
+    Nested blocks only override what they set, e.g. the UI sets user_id and the
+    agent sets agent/task.
+    """
+    tokens = []
+    for var, value in ((_agent_var, agent), (_task_var, task), (_user_var, user_id)):
+        if value is not None:
+            tokens.append((var, var.set(value)))
+    try:
+        yield
+    finally:
+        for var, token in reversed(tokens):
+            var.reset(token)
+
+
+def current_context() -> Dict[str, Any]:
+    """Agent, task and user_id of the current call context"""
+    return {"agent": _agent_var.get(), "task": _task_var.get(), "user_id": _user_var.get()}
+
+
+def new_call(provider: str, model: str, prompt: str, agent: Optional[str] = None, task: Optional[str] = None) -> Dict[str, Any]:
+    """Start a call record (finish it with finish_call)"""
+    context = current_context()
+    return {
+        "timestamp": time.time(),
+        "agent": agent or context["agent"] or "unknown",
+        "task": task or context["task"],
+        "user_id": context["user_id"],
+        "provider": provider,
+        "model": model,
+        "prompt_chars": len(prompt),
+        "prompt_tokens": None,
+        "completion_tokens": None,
+        "latency_ms": None,
+        "ttft_ms": None,
+        "cache_hit": False,
+        "error": None,
+        "_started": time.perf_counter()
+    }
+
+
+def mark_first_token(call: Dict[str, Any]) -> None:
+    """Record time-to-first-token (first call wins)"""
+    if call["ttft_ms"] is None:
+        call["ttft_ms"] = (time.perf_counter() - call["_started"]) * 1000
+
+
+def record_usage(prompt_tokens: Optional[int], completion_tokens: Optional[int]) -> None:
+    """Exact token counts from the provider for the call in progress (no-op outside a call)"""
+    call = _call_var.get()
+    if call is not None:
+        call["prompt_tokens"] = prompt_tokens
+        call["completion_tokens"] = completion_tokens
+
+
+def finish_call(call: Dict[str, Any], tokens_used: int = 0, error: Optional[BaseException] = None) -> Dict[str, Any]:
+    """
+    Complete a call record and add it to the ring buffer and counters
+
+    Token split falls back to a ~4 chars/token prompt estimate when the
+    provider didn't report usage.
+    """
+    call["latency_ms"] = (time.perf_counter() - call.pop("_started")) * 1000
+    if error is not None:
+        call["error"] = type(error).__name__
+    if call["cache_hit"]:
+        call["prompt_tokens"] = call["completion_tokens"] = 0
+    elif call["prompt_tokens"] is None or call["completion_tokens"] is None:
+        tokens_used = tokens_used or 0
+        call["prompt_tokens"] = min(call["prompt_chars"] // 4, tokens_used)
+        call["completion_tokens"] = tokens_used - call["prompt_tokens"]
+
+    key = (call["agent"], call["provider"], call["model"])
+    with _lock:
+        _get_ring().append(call)
+        totals = _totals.setdefault(key, {
+            "calls": 0, "cache_hits": 0, "errors": {}, "prompt_tokens": 0, "completion_tokens": 0,
+            "latency_sum": 0.0, "latency_buckets": [0] * len(LATENCY_BUCKETS)
+        })
+        totals["calls"] += 1
+        totals["cache_hits"] += int(call["cache_hit"])
+        if call["error"]:
+            totals["errors"][call["error"]] = totals["errors"].get(call["error"], 0) + 1
+        totals["prompt_tokens"] += call["prompt_tokens"]
+        totals["completion_tokens"] += call["completion_tokens"]
+        latency = call["latency_ms"] / 1000
+        totals["latency_sum"] += latency
+        for i, bound in enumerate(LATENCY_BUCKETS):
+            if latency <= bound:
+                totals["latency_buckets"][i] += 1
+    return call
+
+
+@contextmanager
+def track_call(
+    provider: str,
+    model: str,
+    prompt: str,
+    agent: Optional[str] = None,
+    task: Optional[str] = None
+) -> Iterator[Dict[str, Any]]:
+    """
+    Record one LLM call around a block (errors are recorded and re-raised)
+
+    The block sets call["cache_hit"] / call["tokens_used"]; providers called
+    inside it can report exact usage with record_usage().
+    """
+    call = new_call(provider, model, prompt, agent, task)
+    token = _call_var.set(call)
+    try:
+        yield call
+    except BaseException as e:
+        finish_call(call, call.pop("tokens_used", 0), error=e)
+        raise
+    else:
+        finish_call(call, call.pop("tokens_used", 0))
+    finally:
+        _call_var.reset(token)
+
+
+def get_recent_calls(limit: Optional[int] = None) -> List[Dict[str, Any]]:
+    """Most recent call records, oldest first"""
+    with _lock:
+        calls = list(_get_ring())
+    return [dict(c) for c in (calls[-limit:] if limit else calls)]
+
+
+def _percentile(values: List[float], q: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(q / 100 * (len(ordered) - 1)))))
+    return round(ordered[index], 1)
+
+
+def latency_percentile(q: float, provider: Optional[str] = None, model: Optional[str] = None) -> Optional[float]:
+    """Latency percentile in ms over successful provider calls in the ring buffer (None without data)"""
+    with _lock:
+        latencies = [
+            c["latency_ms"] for c in _get_ring()
+            if not c["cache_hit"] and not c["error"]
+            and (provider is None or c["provider"] == provider)
+            and (model is None or c["model"] == model)
+        ]
+    return _percentile(latencies, q)
+
+
+def get_aggregates(by: str = "agent") -> Dict[Any, Dict[str, Any]]:
+    """
+    Aggregate the ring buffer by a call field
+
+    Args:
+        by: "agent", "task", "user_id", "provider" or "model"
+
+    Returns:
+        Dict of group -> calls, cache_hits, cache_hit_rate, errors, prompt_tokens,
+        completion_tokens, total_tokens, latency_p50_ms, latency_p95_ms, ttft_p50_ms
+    """
+    groups: Dict[Any, List[Dict[str, Any]]] = {}
+    for call in get_recent_calls():
+        groups.setdefault(call[by], []).append(call)
+
+    aggregates = {}
+    for group, calls in groups.items():
+        provider_calls = [c for c in calls if not c["cache_hit"]]
+        prompt_tokens = sum(c["prompt_tokens"] for c in calls)
+        completion_tokens = sum(c["completion_tokens"] for c in calls)
+        cache_hits = len(calls) - len(provider_calls)
+        aggregates[group] = {
+            "calls": len(calls),
+            "cache_hits": cache_hits,
+            "cache_hit_rate": round(cache_hits / len(calls), 3),
+            "errors": sum(1 for c in calls if c["error"]),
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+            "latency_p50_ms": _percentile([c["latency_ms"] for c in provider_calls], 50),
+            "latency_p95_ms": _percentile([c["latency_ms"] for c in provider_calls], 95),
+            "ttft_p50_ms": _percentile([c["ttft_ms"] for c in provider_calls if c["ttft_ms"] is not None], 50)
+        }
+    return aggregates
+
+
+def _escape(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(**labels: Any) -> str:
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in labels.items()) + "}"
+
+
+def render_prometheus() -> str:
+    """Cumulative counters and latency histogram in Prometheus text exposition format"""
+    with _lock:
+        totals = {key: {**value, "errors": dict(value["errors"]), "latency_buckets": list(value["latency_buckets"])}
+                  for key, value in _totals.items()}
+
+    lines = [
+        "# HELP learnflow_llm_calls_total LLM calls (including cache hits)",
+        "# TYPE learnflow_llm_calls_total counter"
+    ]
+    for (agent, provider, model), t in sorted(totals.items()):
+        lines.append(f"learnflow_llm_calls_total{_labels(agent=agent, provider=provider, model=model)} {t['calls']}")
+
+    lines += ["# HELP learnflow_llm_cache_hits_total LLM calls served from the response cache",
+              "# TYPE learnflow_llm_cache_hits_total counter"]
+    for (agent, provider, model), t in sorted(totals.items()):
+        lines.append(f"learnflow_llm_cache_hits_total{_labels(agent=agent, provider=provider, model=model)} {t['cache_hits']}")
+
+    lines += ["# HELP learnflow_llm_errors_total Failed LLM calls by error class",
+              "# TYPE learnflow_llm_errors_total counter"]
+    for (agent, provider, model), t in sorted(totals.items()):
+        for error, count in sorted(t["errors"].items()):
+            lines.append(f"learnflow_llm_errors_total{_labels(agent=agent, provider=provider, model=model, error=error)} {count}")
+
+    lines += ["# HELP learnflow_llm_tokens_total Tokens used by kind",
+              "# TYPE learnflow_llm_tokens_total counter"]
+    for (agent, provider, model), t in sorted(totals.items()):
+        for kind in ("prompt", "completion"):
+            labels = _labels(agent=agent, provider=provider, model=model, kind=kind)
+            lines.append(f"learnflow_llm_tokens_total{labels} {t[kind + '_tokens']}")
+
+    lines += ["# HELP learnflow_llm_latency_seconds LLM call latency",
+              "# TYPE learnflow_llm_latency_seconds histogram"]
+    for (agent, provider, model), t in sorted(totals.items()):
+        for bound, count in zip(LATENCY_BUCKETS, t["latency_buckets"]):
+            labels = _labels(agent=agent, provider=provider, model=model, le=bound)
+            lines.append(f"learnflow_llm_latency_seconds_bucket{labels} {count}")
+        base = dict(agent=agent, provider=provider, model=model)
+        lines.append(f"learnflow_llm_latency_seconds_bucket{_labels(**base, le='+Inf')} {t['calls']}")
+        lines.append(f"learnflow_llm_latency_seconds_sum{_labels(**base)} {t['latency_sum']:.6f}")
+        lines.append(f"learnflow_llm_latency_seconds_count{_labels(**base)} {t['calls']}")
+
+    return "\n".join(lines) + "\n"
+
+
+def reset_metrics() -> None:
+    """Clear the ring buffer and counters (tests)"""
+    global _calls
+    with _lock:
+        _calls = None
+        _totals.clear()
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+LLM Call Profiles for learn_flow
+Per-agent model, timeout, retries and fallback model, taken from the agent YAMLs
+
+Each agent's llm_config (or llm_config.<task> for agents with several
+operations, e.g. agent3's content_generation / module_reframing / module_naming)
+defines:
+- task_class: "small" (short/classification outputs) or "large" (long generations),
+  mapped to a model by llm.yaml task_classes
+- model: explicit Groq model name, overrides task_class (mapped to a local
+  model via llm.yaml ollama_models)
+- timeout_seconds: per-request timeout
+- max_retries: transient-error retries per route (overrides routing.retries)
+- fallback_model: tried on the same provider before failing over to the next one
+
+call_llm resolves the profile from the agent/task in llm_metrics.call_context();
+calls outside an agent get llm.yaml call_defaults. Profiles are resolved once
+per (agent, task) and cached.
+
+Quality gate: when small-model output fails validation, the caller re-runs
+the request inside escalate(), which moves small-class profiles to the large
+class (see llm_engine.call_llm_checked).
+"""
+import contextvars
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+from src.core.config_loader import load_agent_config, load_llm_config
+
+# Default models per provider (agents without a model setting)
+GROQ_MODEL = "llama-3.3-70b-versatile"
+OLLAMA_MODEL = "llama3.1:8b"  # 8B for local dev (18GB RAM compatible)
+DEFAULT_TASK_CLASSES = {"small": "llama-3.1-8b-instant", "large": GROQ_MODEL}
+
+_escalated_var: contextvars.ContextVar[bool] = contextvars.ContextVar("llm_escalated", default=False)
+_lock = threading.Lock()
+_profiles: Dict[Tuple[Optional[str], Optional[str]], Dict[str, Any]] = {}
+
+
+def _get_llm_section(name: str) -> Dict[str, Any]:
+    try:
+        return load_llm_config().get(name, {}) or {}
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+def get_task_class_models() -> Dict[str, str]:
+    """Task class -> Groq model (llm.yaml task_classes)"""
+    return {**DEFAULT_TASK_CLASSES, **_get_llm_section("task_classes")}
+
+
+def _agent_llm_config(agent: Optional[str], task: Optional[str]) -> Dict[str, Any]:
+    """The agent's llm_config block for this task ({} for unknown agents)"""
+    if not agent:
+        return {}
+    try:
+        llm_config = load_agent_config(agent).get("llm_config", {}) or {}
+    except (FileNotFoundError, ValueError):
+        return {}
+    if task and isinstance(llm_config.get(task), dict):
+        return llm_config[task]
+    # Single-operation agents keep their settings directly under llm_config
+    return {key: value for key, value in llm_config.items() if not isinstance(value, dict)}
+
+
+def resolve_profile(agent: Optional[str] = None, task: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Build the call profile for an agent/task (uncached - see get_call_profile)
+
+    Returns:
+        Dict with task_class, model, fallback_model, timeout_seconds, max_retries
+        (max_retries None → routing.retries default)
+    """
+    defaults = _get_llm_section("call_defaults")
+    settings = {**defaults, **_agent_llm_config(agent, task)}
+    task_class = settings.get("task_class", "large")
+    fallback_model = settings.get("fallback_model")
+    model = settings.get("model") or get_task_class_models().get(task_class) or GROQ_MODEL
+    return {
+        "task_class": task_class,
+        "model": model,
+        "fallback_model": fallback_model if fallback_model != model else None,
+        "timeout_seconds": settings.get("timeout_seconds"),
+        "max_retries": settings.get("max_retries")
+    }
+
+
+def get_call_profile(agent: Optional[str] = None, task: Optional[str] = None) -> Dict[str, Any]:
+    """Cached call profile for an agent/task (see resolve_profile), escalated inside escalate()"""
+    key = (agent, task)
+    with _lock:
+        profile = _profiles.get(key)
+    if profile is None:
+        profile = resolve_profile(agent, task)
+        with _lock:
+            _profiles[key] = profile
+    if _escalated_var.get():
+        return escalated_profile(profile) or dict(profile)
+    return dict(profile)
+
+
+def escalated_profile(profile: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Large-class version of a small-class profile (None if there is nothing larger)"""
+    large = get_task_class_models()["large"]
+    if profile["task_class"] != "small" or profile["model"] == large:
+        return None
+    return {**profile, "task_class": "large", "model": large, "fallback_model": None}
+
+
+@contextmanager
+def escalate() -> Iterator[None]:
+    """Run calls in the block with small-class profiles moved to the large class"""
+    token = _escalated_var.set(True)
+    try:
+        yield
+    finally:
+        _escalated_var.reset(token)
+
+
+def provider_model(provider: str, model: Optional[str]) -> str:
+    """
+    Model name to send to a provider
+
+    Profile models are Groq names; Ollama gets the mapped local model
+    (llm.yaml ollama_models, default OLLAMA_MODEL).
+    """
+    if provider != "ollama":
+        return model or GROQ_MODEL
+    return _get_llm_section("ollama_models").get(model, OLLAMA_MODEL)
+
+
+def clear_profiles() -> None:
+    """Forget resolved profiles (after config changes, tests)"""
+    with _lock:
+        _profiles.clear()
@@ -0,0 +1,255 @@
+#!/usr/bin/env python3
+"""
+LLM Router for learn_flow
+Provider failover for call_llm: ordered routes, circuit breakers, retries, hedging
+
+A route is a (provider, model) pair. The engine lists them in preference order:
+the configured provider with the profile model, then its fallback model, then
+routing.fallback_providers (see llm_profiles.py).
+- Each route has a circuit breaker: after failure_threshold consecutive transient
+  failures it is skipped for reset_timeout_seconds, then tried again
+- Transient errors are retried with exponential backoff and jitter
+- Hedging (optional): if the first route hasn't answered after its p95 latency,
+  the next route is asked too and the first successful answer wins
+
+The router never calls a provider itself: the engine passes an `attempt(route)`
+callable that performs one request, so tests can drive it with fake providers.
+"""
+import contextvars
+import random
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, List, Optional, Tuple, TypeVar
+
+from src.core import llm_metrics
+from src.core.config_loader import load_llm_config
+
+T = TypeVar("T")
+Route = Tuple[str, str]  # (provider, model)
+
+# Errors that a retry cannot fix (bad configuration, missing package, bad arguments)
+_PERMANENT_ERRORS = (ValueError, ImportError, TypeError, KeyError, AttributeError)
+# HTTP statuses worth retrying: timeout, conflict, rate limit (plus all 5xx)
+_RETRYABLE_STATUS = {408, 409, 429}
+
+
+def get_routing_settings() -> Dict[str, Any]:
+    """Routing settings from llm.yaml (routing section) with safe defaults"""
+    try:
+        settings = load_llm_config().get("routing", {}) or {}
+    except (FileNotFoundError, ValueError):
+        settings = {}
+    breaker = settings.get("circuit_breaker", {}) or {}
+    retries = settings.get("retries", {}) or {}
+    hedging = settings.get("hedging", {}) or {}
+    return {
+        "fallback_providers": settings.get("fallback_providers", []),
+        "failure_threshold": breaker.get("failure_threshold", 5),
+        "reset_timeout_seconds": breaker.get("reset_timeout_seconds", 30),
+        "max_retries": retries.get("max_retries", 1),
+        "backoff_base_seconds": retries.get("backoff_base_seconds", 0.5),
+        "backoff_max_seconds": retries.get("backoff_max_seconds", 8),
+        "hedging_enabled": hedging.get("enabled", False),
+        "hedge_percentile": hedging.get("percentile", 95),
+        "hedge_min_delay_seconds": hedging.get("min_delay_seconds", 2),
+        "hedge_max_delay_seconds": hedging.get("max_delay_seconds", 20),
+        "hedge_default_delay_seconds": hedging.get("default_delay_seconds", 8)
+    }
+
+
+def _label(route: Route) -> str:
+    return "/".join(route)
+
+
+def is_retryable(error: Exception) -> bool:
+    """Transient provider errors (connection problems, timeouts, 429, 5xx) are retryable"""
+    if isinstance(error, _PERMANENT_ERRORS):
+        return False
+    status = getattr(error, "status_code", None)
+    if isinstance(status, int) and 400 <= status < 500:
+        return status in _RETRYABLE_STATUS
+    return True
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker
+
+    closed → open after failure_threshold failures in a row; open → half-open
+    after reset_timeout seconds (requests allowed again); a success closes it,
+    a failure while half-open reopens it immediately.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._state(time.monotonic())
+
+    def _state(self, now: float) -> str:
+        if self._opened_at is None:
+            return "closed"
+        if now - self._opened_at >= self.reset_timeout:
+            return "half_open"
+        return "open"
+
+    def allow(self) -> bool:
+        """Whether a request may be sent now (closed or half-open)"""
+        return self.state != "open"
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if self._opened_at is not None or self._failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+
+
+class ProviderRouter:
+    """Routes one logical LLM request across providers (shared by all threads)"""
+
+    def __init__(self, settings: Optional[Dict[str, Any]] = None, sleep: Callable[[float], None] = time.sleep):
+        self.settings = {**get_routing_settings(), **(settings or {})}
+        self._sleep = sleep
+        self._lock = threading.Lock()
+        self._breakers: Dict[Route, CircuitBreaker] = {}
+        # Hedged requests run here; losers finish in the background (threads can't be cancelled)
+        self._executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="llm-hedge")
+
+    def breaker(self, route: Route) -> CircuitBreaker:
+        with self._lock:
+            if route not in self._breakers:
+                self._breakers[route] = CircuitBreaker(
+                    self.settings["failure_threshold"], self.settings["reset_timeout_seconds"]
+                )
+            return self._breakers[route]
+
+    def hedge_delay(self, route: Route) -> float:
+        """Seconds to wait for `route` before hedging (its recent p95 latency, clamped)"""
+        provider, model = route
+        p95_ms = llm_metrics.latency_percentile(self.settings["hedge_percentile"], provider=provider, model=model)
+        if p95_ms is None:
+            return self.settings["hedge_default_delay_seconds"]
+        return min(max(p95_ms / 1000, self.settings["hedge_min_delay_seconds"]), self.settings["hedge_max_delay_seconds"])
+
+    def _backoff(self, retry: int) -> float:
+        delay = self.settings["backoff_base_seconds"] * (2 ** retry)
+        return min(delay, self.settings["backoff_max_seconds"]) * (0.5 + random.random() / 2)
+
+    def run_with_retries(self, route: Route, attempt: Callable[[Route], T], max_retries: Optional[int] = None) -> T:
+        """One route: retry transient errors with exponential backoff (breaker updated per transient failure)"""
+        breaker = self.breaker(route)
+        if max_retries is None:
+            max_retries = self.settings["max_retries"]
+        for retry in range(max_retries + 1):
+            if retry:
+                self._sleep(self._backoff(retry - 1))
+            try:
+                result = attempt(route)
+            except Exception as e:
+                if not is_retryable(e):
+                    # A bad request or missing configuration says nothing about the provider's health
+                    raise
+                breaker.record_failure()
+                if retry == max_retries:
+                    raise
+                print(f"   ⚠️  {_label(route)} request failed ({type(e).__name__}), retrying")
+            else:
+                breaker.record_success()
+                return result
+
+    def _submit(self, route: Route, attempt: Callable[[Route], T], max_retries: Optional[int]) -> "Future[T]":
+        # Carry the caller's context (metrics call record, user, agent) into the worker
+        context = contextvars.copy_context()
+        return self._executor.submit(context.run, self.run_with_retries, route, attempt, max_retries)
+
+    def route(
+        self,
+        routes: List[Route],
+        attempt: Callable[[Route], T],
+        max_retries: Optional[int] = None
+    ) -> Tuple[T, Route]:
+        """
+        Run `attempt` against the first healthy route, failing over in order
+
+        Args:
+            routes: (provider, model) pairs in preference order
+            attempt: Performs one request on the given route
+            max_retries: Retries per route (None → routing.retries.max_retries)
+
+        Returns:
+            Tuple of (result, route that produced it)
+
+        Raises:
+            The first failed route's error if every route failed
+        """
+        # Routes with an open breaker are skipped - unless that would leave none
+        candidates = [r for r in routes if self.breaker(r).allow()] or list(routes)
+        errors: List[Tuple[Route, Exception]] = []
+
+        if self.settings["hedging_enabled"] and len(candidates) > 1:
+            result = self._route_hedged(candidates[0], candidates[1], attempt, max_retries, errors)
+            if result is not None:
+                return result
+            candidates = candidates[2:]
+
+        for route in candidates:
+            try:
+                return self.run_with_retries(route, attempt, max_retries), route
+            except Exception as e:
+                errors.append((route, e))
+                if route != candidates[-1]:
+                    print(f"   ⚠️  {_label(route)} failed ({type(e).__name__}: {e}), failing over")
+
+        raise errors[0][1]
+
+    def _route_hedged(
+        self,
+        primary: Route,
+        secondary: Route,
+        attempt: Callable[[Route], T],
+        max_retries: Optional[int],
+        errors: List[Tuple[Route, Exception]]
+    ) -> Optional[Tuple[T, Route]]:
+        """Primary first, secondary after the hedge delay; first success wins (None if both fail)"""
+        futures = {self._submit(primary, attempt, max_retries): primary}
+        done, _ = wait(futures, timeout=self.hedge_delay(primary))
+        if not done:
+            print(f"   🏁 {_label(primary)} slower than its p{self.settings['hedge_percentile']}, "
+                  f"hedging with {_label(secondary)}")
+        if not done or next(iter(done)).exception() is not None:
+            # Slow primary: hedge. Failed primary: plain failover to the secondary
+            futures[self._submit(secondary, attempt, max_retries)] = secondary
+
+        pending = set(futures)
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    return future.result(), futures[future]
+                errors.append((futures[future], future.exception()))
+        return None
+
+
+_router: Optional[ProviderRouter] = None
+_router_lock = threading.Lock()
+
+
+def get_router() -> ProviderRouter:
+    """Process-wide router (breaker state is shared by all callers)"""
+    global _router
+    with _router_lock:
+        if _router is None:
+            _router = ProviderRouter()
+        return _router
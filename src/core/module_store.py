@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Module Store for learn_flow
+Generated module content and module names, shared across sessions and restarts
+
+- Persistent: generated_modules / generated_module_names tables (database.py),
+  so each module is generated once per path for its whole life
+- Repeat reads are served by database's read cache (bounded, invalidated per
+  path on writes and when the path's user is deleted)
+- Shared by the Streamlit session (foreground clicks) and the background
+  prefetch workers, so a module generated ahead of time is visible to the UI
+
+Keys: (path_id, topic_id, module_id) for content, (path_id, topic_id) for names.
+"""
+import hashlib
+import json
+from typing import Dict, Any, Optional
+
+from src.core import database
+
+
+def make_prompt_hash(*parts: Any) -> str:
+    """
+    Hash of everything a generation depended on (prompt template + inputs)
+
+    Stored next to the content so stale generations can be identified later.
+    """
+    payload = json.dumps(parts, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def get_module_content(path_id: str, topic_id: str, module_id: int) -> Optional[Dict[str, Any]]:
+    """
+    Get generated content for a module
+
+    Returns:
+        content_data dict (as returned by generate_content) or None if not generated yet
+    """
+    return database.get_generated_module(path_id, topic_id, module_id)
+
+
+def save_module_content(
+    path_id: str,
+    topic_id: str,
+    module_id: int,
+    content_data: Dict[str, Any],
+    prompt_hash: Optional[str] = None
+) -> None:
+    """Store generated content for a module"""
+    database.save_generated_module(path_id, topic_id, module_id, content_data, prompt_hash)
+
+
+def get_module_names(path_id: str, topic_id: str) -> Optional[Dict[int, str]]:
+    """Get the 8 module names for a topic, or None"""
+    return database.get_generated_module_names(path_id, topic_id)
+
+
+def save_module_names(
+    path_id: str,
+    topic_id: str,
+    module_names: Dict[int, str],
+    prompt_hash: Optional[str] = None
+) -> None:
+    """Store the 8 module names for a topic"""
+    database.save_generated_module_names(path_id, topic_id, module_names, prompt_hash)
+
+
+def clear_module_store() -> None:
+    """Drop in-process copies (the database is left untouched)"""
+    database.clear_read_cache()
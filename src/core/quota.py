@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+"""
+Quota Service for learn_flow
+Per-user daily/monthly LLM token budgets, enforced before each provider call
+
+- check_and_reserve() runs before dispatch: over-budget users get QuotaExceededError
+  (cache hits are served before this check, so cached content still works)
+- commit() records the actual tokens after the call
+- hot counters stay in memory and are flushed to token_usage / users.tokens_used
+  every flush_interval_seconds (and at exit)
+
+Calls without a user (call_context user_id unset) are not metered.
+"""
+import atexit
+import sqlite3
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional, Tuple
+
+from src.core import database
+from src.core.config_loader import load_llm_config
+
+
+class QuotaExceededError(Exception):
+    """User is over their daily or monthly token budget"""
+
+    def __init__(self, user_id: int, period: str, used: int, budget: int):
+        self.user_id = user_id
+        self.period = period
+        self.used = used
+        self.budget = budget
+        super().__init__(f"User {user_id} is over the {period} token budget ({used}/{budget})")
+
+
+def get_quota_settings() -> Dict[str, Any]:
+    """Quota settings from llm.yaml (quotas section) with safe defaults"""
+    try:
+        settings = load_llm_config().get("quotas", {}) or {}
+    except (FileNotFoundError, ValueError):
+        settings = {}
+    return {
+        "enabled": settings.get("enabled", False),
+        "daily_tokens": settings.get("daily_tokens"),
+        "monthly_tokens": settings.get("monthly_tokens"),
+        "flush_interval_seconds": settings.get("flush_interval_seconds", 30)
+    }
+
+
+def _today() -> str:
+    return datetime.now(timezone.utc).strftime("%Y-%m-%d")
+
+
+class QuotaService:
+    """
+    In-memory token accounting with periodic flush, shared by all threads
+
+    Per user it keeps the persisted daily/monthly totals (loaded once per day),
+    unflushed tokens and tokens reserved by calls still in flight.
+    """
+
+    def __init__(self, settings: Optional[Dict[str, Any]] = None):
+        self.settings = {**get_quota_settings(), **(settings or {})}
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._persisted: Dict[int, Dict[str, Any]] = {}  # user_id -> {"day", "daily", "monthly"}
+        self._pending: Dict[Tuple[int, str], Dict[str, int]] = {}  # (user_id, day) -> {"tokens", "calls"}
+        self._reserved: Dict[int, int] = {}
+        self._last_flush = time.monotonic()
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.settings["enabled"]) and bool(self.settings["daily_tokens"] or self.settings["monthly_tokens"])
+
+    def _load(self, user_id: int, day: str) -> Dict[str, Any]:
+        """Persisted totals for today (caller holds no lock: reads the database)"""
+        try:
+            usage = database.get_token_usage(user_id, day)
+        except sqlite3.Error as e:
+            print(f"   ⚠️  Token usage unavailable: {e}")
+            usage = {"daily": 0, "monthly": 0}
+        return {"day": day, **usage}
+
+    def _persisted_for(self, user_id: int) -> Dict[str, Any]:
+        day = _today()
+        with self._lock:
+            persisted = self._persisted.get(user_id)
+        if persisted is None or persisted["day"] != day:
+            # New user or day rollover: flush first so the reload includes pending tokens
+            if persisted is not None:
+                self.flush()
+            persisted = self._load(user_id, day)
+            with self._lock:
+                self._persisted[user_id] = persisted
+        return persisted
+
+    def _usage_locked(self, user_id: int, persisted: Dict[str, Any]) -> Dict[str, int]:
+        """Usage from persisted totals, unflushed and in-flight tokens (caller holds self._lock)"""
+        day = persisted["day"]
+        daily = monthly = self._reserved.get(user_id, 0)
+        for (pending_user, pending_day), counts in self._pending.items():
+            if pending_user != user_id:
+                continue
+            if pending_day == day:
+                daily += counts["tokens"]
+            if pending_day[:7] == day[:7]:
+                monthly += counts["tokens"]
+        return {"daily": persisted["daily"] + daily, "monthly": persisted["monthly"] + monthly}
+
+    def get_usage(self, user_id: int) -> Dict[str, int]:
+        """Current daily/monthly usage including unflushed and in-flight tokens"""
+        persisted = self._persisted_for(user_id)
+        with self._lock:
+            return self._usage_locked(user_id, persisted)
+
+    def check_and_reserve(self, user_id: Optional[int], estimate: int) -> int:
+        """
+        Raise if the user is over budget, otherwise reserve `estimate` tokens
+
+        Reservations make concurrent calls from one user count against the
+        budget before they finish. The check and the reservation happen under
+        one lock, so concurrent calls cannot both pass on the same usage.
+
+        Returns:
+            Tokens reserved (0 when the call is not metered) - pass to commit()
+
+        Raises:
+            QuotaExceededError: If the daily or monthly budget is used up
+        """
+        if user_id is None or not self.enabled:
+            return 0
+        persisted = self._persisted_for(user_id)
+        with self._lock:
+            usage = self._usage_locked(user_id, persisted)
+            for period in ("daily", "monthly"):
+                budget = self.settings[f"{period}_tokens"]
+                if budget and usage[period] >= budget:
+                    raise QuotaExceededError(user_id, period, usage[period], budget)
+            self._reserved[user_id] = self._reserved.get(user_id, 0) + estimate
+        return estimate
+
+    def commit(self, user_id: Optional[int], reserved: int, tokens_used: int) -> None:
+        """Release a reservation and count the tokens actually used (also for failed calls)"""
+        if user_id is None:
+            return
+        with self._lock:
+            if reserved:
+                self._reserved[user_id] = max(0, self._reserved.get(user_id, 0) - reserved)
+                if not self._reserved[user_id]:
+                    del self._reserved[user_id]
+            if tokens_used:
+                # Stamp the day now: a flush after midnight must not move these tokens to the next day
+                pending = self._pending.setdefault((user_id, _today()), {"tokens": 0, "calls": 0})
+                pending["tokens"] += tokens_used
+                pending["calls"] += 1
+            due = time.monotonic() - self._last_flush >= self.settings["flush_interval_seconds"]
+        if due:
+            self.flush()
+
+    def flush(self) -> int:
+        """
+        Write unflushed tokens to the database (one transaction)
+
+        Returns:
+            Number of users flushed
+        """
+        with self._flush_lock:
+            with self._lock:
+                pending, self._pending = self._pending, {}
+                self._last_flush = time.monotonic()
+            if not pending:
+                return 0
+
+            try:
+                database.add_token_usage([
+                    {"user_id": user_id, "day": day, "tokens": counts["tokens"], "calls": counts["calls"]}
+                    for (user_id, day), counts in pending.items()
+                ])
+            except sqlite3.Error as e:
+                # Keep the counts for the next flush rather than losing them
+                print(f"   ⚠️  Could not flush token usage: {e}")
+                with self._lock:
+                    for key, counts in pending.items():
+                        current = self._pending.setdefault(key, {"tokens": 0, "calls": 0})
+                        current["tokens"] += counts["tokens"]
+                        current["calls"] += counts["calls"]
+                return 0
+
+            with self._lock:
+                for (user_id, day), counts in pending.items():
+                    persisted = self._persisted.get(user_id)
+                    if persisted is None:
+                        continue
+                    if persisted["day"] == day:
+                        persisted["daily"] += counts["tokens"]
+                    if persisted["day"][:7] == day[:7]:
+                        persisted["monthly"] += counts["tokens"]
+            return len({user_id for user_id, _ in pending})
+
+
+_service: Optional[QuotaService] = None
+_service_lock = threading.Lock()
+
+
+def get_quota_service() -> QuotaService:
+    """Process-wide quota service (created on first use, flushed at exit)"""
+    global _service
+    with _service_lock:
+        if _service is None:
+            _service = QuotaService()
+            atexit.register(_service.flush)
+        return _service
@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""
+Rate Limiter for learn_flow
+Process-wide token buckets for provider requests-per-minute and tokens-per-minute
+
+Callers queue (sleep) until both buckets have capacity instead of hitting 429s.
+Work run inside background() (e.g. module prefetch) yields to foreground
+callers: while a foreground request is waiting, background requests don't take capacity.
+"""
+import asyncio
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional
+
+from src.core.config_loader import load_llm_config
+
+# How often a background request re-checks while foreground requests are waiting
+BACKGROUND_POLL_SECONDS = 0.05
+
+_background_var: contextvars.ContextVar[bool] = contextvars.ContextVar("rate_limit_background", default=False)
+
+
+@contextmanager
+def background() -> Iterator[None]:
+    """Run requests in the block at background priority (behind waiting foreground requests)"""
+    token = _background_var.set(True)
+    try:
+        yield
+    finally:
+        _background_var.reset(token)
+
+
+class TokenBucket:
+    """Classic token bucket: `capacity` tokens, refilled continuously at `rate` per second"""
+
+    def __init__(self, capacity: float, rate: float):
+        self.capacity = float(capacity)
+        self.rate = float(rate)
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+
+    def refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float) -> float:
+        """Seconds until `amount` tokens are available (0 if available now)"""
+        if self.tokens >= amount:
+            return 0.0
+        return (amount - self.tokens) / self.rate
+
+
+class RateLimiter:
+    """
+    Requests-per-minute + tokens-per-minute limiter shared by all threads
+
+    A limit of None/0 disables that bucket. Token amounts larger than the
+    per-minute budget are clamped so a single huge request can still proceed.
+    """
+
+    def __init__(self, requests_per_minute: Optional[int] = None, tokens_per_minute: Optional[int] = None):
+        self._lock = threading.Lock()
+        self._foreground_waiting = 0
+        self._requests = TokenBucket(requests_per_minute, requests_per_minute / 60.0) if requests_per_minute else None
+        self._tokens = TokenBucket(tokens_per_minute, tokens_per_minute / 60.0) if tokens_per_minute else None
+
+    def _clamp(self, tokens: int) -> float:
+        return min(float(tokens), self._tokens.capacity) if self._tokens else 0.0
+
+    def try_acquire(self, tokens: int = 0, background: bool = False) -> float:
+        """
+        Take one request + `tokens` tokens if both are available
+
+        Args:
+            tokens: Estimated tokens for the request
+            background: Don't take capacity while foreground requests are waiting
+
+        Returns:
+            0.0 if acquired, otherwise seconds to wait before retrying
+        """
+        amount = self._clamp(tokens)
+        with self._lock:
+            now = time.monotonic()
+            wait = 0.0
+            if self._requests:
+                self._requests.refill(now)
+                wait = max(wait, self._requests.wait_time(1))
+            if self._tokens:
+                self._tokens.refill(now)
+                wait = max(wait, self._tokens.wait_time(amount))
+            if background and self._foreground_waiting:
+                wait = max(wait, BACKGROUND_POLL_SECONDS)
+            if wait > 0:
+                return wait
+
+            if self._requests:
+                self._requests.tokens -= 1
+            if self._tokens:
+                self._tokens.tokens -= amount
+            return 0.0
+
+    def _set_waiting(self, waiting: bool) -> None:
+        with self._lock:
+            self._foreground_waiting += 1 if waiting else -1
+
+    def acquire(self, tokens: int = 0) -> None:
+        """Block until one request + `tokens` tokens are available (background() callers go last)"""
+        is_background = _background_var.get()
+        waiting = False
+        try:
+            while True:
+                wait = self.try_acquire(tokens, is_background)
+                if wait <= 0:
+                    return
+                if not is_background and not waiting:
+                    self._set_waiting(waiting=True)
+                    waiting = True
+                time.sleep(wait)
+        finally:
+            if waiting:
+                self._set_waiting(waiting=False)
+
+    async def aacquire(self, tokens: int = 0) -> None:
+        """Async version of acquire() - yields to the event loop while waiting"""
+        is_background = _background_var.get()
+        waiting = False
+        try:
+            while True:
+                wait = self.try_acquire(tokens, is_background)
+                if wait <= 0:
+                    return
+                if not is_background and not waiting:
+                    self._set_waiting(waiting=True)
+                    waiting = True
+                await asyncio.sleep(wait)
+        finally:
+            if waiting:
+                self._set_waiting(waiting=False)
+
+    def refund(self, tokens: int) -> None:
+        """Return over-estimated tokens once the real usage is known"""
+        if not self._tokens or tokens <= 0:
+            return
+        with self._lock:
+            self._tokens.refill(time.monotonic())
+            self._tokens.tokens = min(self._tokens.capacity, self._tokens.tokens + tokens)
+
+
+_limiters: Dict[str, RateLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(provider: str) -> RateLimiter:
+    """
+    Get the process-wide limiter for a provider (limits from config/llm.yaml)
+
+    Args:
+        provider: "groq" or "ollama"
+
+    Returns:
+        Shared RateLimiter (unlimited if provider has no configured limits)
+    """
+    with _limiters_lock:
+        limiter = _limiters.get(provider)
+        if limiter is None:
+            try:
+                limits = load_llm_config().get("rate_limits", {}).get(provider) or {}
+            except (FileNotFoundError, ValueError):
+                limits = {}
+            limiter = RateLimiter(
+                requests_per_minute=limits.get("requests_per_minute"),
+                tokens_per_minute=limits.get("tokens_per_minute")
+            )
+            _limiters[provider] = limiter
+        return limiter
+
+
+def reset_rate_limiters() -> None:
+    """Drop limiters so new config/llm.yaml limits take effect (tests, reload)"""
+    with _limiters_lock:
+        _limiters.clear()
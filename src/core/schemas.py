@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+"""
+Output Schemas for learn_flow
+JSON schemas each agent requests from the LLM, and the typed objects they produce
+
+The schemas are sent to the provider's JSON mode (see call_llm json_schema) and
+checked again locally with check_schema(), so agent validators only handle the
+domain rules (prereq chains, auto-fixes) on already well-typed objects.
+
+Only the JSON Schema subset below is supported locally: type (str or list),
+properties, required, items, enum, minimum/maximum, minItems/maxItems.
+"""
+from typing import Any, Dict, List, Optional, TypedDict, Union
+
+
+class Topic(TypedDict):
+    """Agent 1 output item"""
+    id: str
+    prereq: Optional[str]
+    difficulty: str
+
+
+class Subtopic(TypedDict):
+    id: str
+    hours: float
+
+
+class AssessedTopic(TypedDict):
+    """Agent 2 output item"""
+    topic_id: str
+    mastery: float
+    modules_complete: str
+    estimated_hours: float
+    subtopics: List[Subtopic]
+
+
+class Question(TypedDict):
+    id: Union[int, str]
+    text: str
+    correct_answer: str
+    explanation: str
+
+
+class Reference(TypedDict):
+    text: str
+    url: str
+
+
+class ModuleContent(TypedDict):
+    """Agent 3 output"""
+    module_name: str
+    content: str
+    key_concepts: List[str]
+    questions: List[Question]
+    references: List[Union[Reference, str]]
+
+
+TOPICS_SCHEMA: Dict[str, Any] = {
+    "type": "array",
+    "items": {
+        "type": "object",
+        "properties": {
+            "id": {"type": "string"},
+            # Lists and unknown difficulties are auto-fixed by validate_topics_json
+            "prereq": {"type": ["string", "null", "array"], "items": {"type": "string"}},
+            "difficulty": {"type": "string"}
+        },
+        "required": ["id", "prereq", "difficulty"]
+    }
+}
+
+ASSESSED_TOPICS_SCHEMA: Dict[str, Any] = {
+    "type": "array",
+    "items": {
+        "type": "object",
+        "properties": {
+            "topic_id": {"type": "string"},
+            "mastery": {"type": "number", "minimum": 0, "maximum": 100},
+            "modules_complete": {"type": "string"},
+            "estimated_hours": {"type": "number"},
+            "subtopics": {
+                "type": "array",
+                "items": {
+                    "type": "object",
+                    "properties": {"id": {"type": "string"}, "hours": {"type": "number"}},
+                    "required": ["id", "hours"]
+                }
+            }
+        },
+        "required": ["topic_id", "mastery", "modules_complete", "estimated_hours", "subtopics"]
+    }
+}
+
+MODULE_NAMES_SCHEMA: Dict[str, Any] = {
+    "type": "object",
+    "properties": {str(i): {"type": "string"} for i in range(1, 9)},
+    "required": [str(i) for i in range(1, 9)]
+}
+
+MODULE_CONTENT_SCHEMA: Dict[str, Any] = {
+    "type": "object",
+    "properties": {
+        "module_name": {"type": "string"},
+        "content": {"type": "string"},
+        "key_concepts": {"type": "array", "items": {"type": "string"}, "minItems": 3, "maxItems": 5},
+        "questions": {
+            "type": "array",
+            "minItems": 3,
+            "maxItems": 3,
+            "items": {
+                "type": "object",
+                "properties": {
+                    "id": {"type": ["integer", "string"]},
+                    "text": {"type": "string"},
+                    "options": {"type": "object"},
+                    "correct_answer": {"type": "string"},
+                    "explanation": {"type": "string"}
+                },
+                "required": ["id", "text", "correct_answer", "explanation"]
+            }
+        },
+        "references": {
+            "type": "array",
+            "minItems": 2,
+            "items": {
+                # Legacy plain-string references are still accepted
+                "type": ["object", "string"],
+                "properties": {"text": {"type": "string"}, "url": {"type": "string"}},
+                "required": ["text", "url"]
+            }
+        }
+    },
+    "required": ["module_name", "content", "key_concepts", "questions", "references"]
+}
+
+_TYPE_CHECKS = {
+    "object": lambda v: isinstance(v, dict),
+    "array": lambda v: isinstance(v, list),
+    "string": lambda v: isinstance(v, str),
+    "integer": lambda v: isinstance(v, int) and not isinstance(v, bool),
+    "number": lambda v: isinstance(v, (int, float)) and not isinstance(v, bool),
+    "boolean": lambda v: isinstance(v, bool),
+    "null": lambda v: v is None
+}
+
+
+def schema_errors(value: Any, schema: Dict[str, Any], path: str = "$") -> List[str]:
+    """
+    Check a parsed JSON value against a schema
+
+    Args:
+        value: Parsed JSON
+        schema: Schema dict (supported subset, see module docstring)
+        path: Location prefix used in messages
+
+    Returns:
+        List of error messages (empty if the value conforms)
+    """
+    types = schema.get("type")
+    if types is not None:
+        types = [types] if isinstance(types, str) else types
+        matched = [t for t in types if _TYPE_CHECKS[t](value)]
+        if not matched:
+            return [f"{path} must be {' or '.join(types)}, got {type(value).__name__}"]
+    else:
+        matched = []
+
+    errors = []
+    if "enum" in schema and value not in schema["enum"]:
+        errors.append(f"{path} must be one of {schema['enum']}, got {value!r}")
+
+    if "number" in matched or "integer" in matched:
+        if "minimum" in schema and value < schema["minimum"]:
+            errors.append(f"{path} must be >= {schema['minimum']}, got {value}")
+        if "maximum" in schema and value > schema["maximum"]:
+            errors.append(f"{path} must be <= {schema['maximum']}, got {value}")
+
+    if "object" in matched:
+        missing = [key for key in schema.get("required", []) if key not in value]
+        if missing:
+            errors.append(f"{path} missing {missing}. Keys: {list(value.keys())}")
+        for key, subschema in schema.get("properties", {}).items():
+            if key in value:
+                errors.extend(schema_errors(value[key], subschema, f"{path}.{key}"))
+
+    if "array" in matched:
+        if "minItems" in schema and len(value) < schema["minItems"]:
+            errors.append(f"{path} must have at least {schema['minItems']} items, got {len(value)}")
+        if "maxItems" in schema and len(value) > schema["maxItems"]:
+            errors.append(f"{path} must have at most {schema['maxItems']} items, got {len(value)}")
+        if "items" in schema:
+            for i, item in enumerate(value):
+                errors.extend(schema_errors(item, schema["items"], f"{path}[{i}]"))
+
+    return errors
+
+
+def check_schema(value: Any, schema: Dict[str, Any], name: str = "$") -> Any:
+    """
+    Assert a parsed JSON value conforms to a schema
+
+    Returns:
+        The value unchanged (typed by the caller, e.g. List[Topic])
+
+    Raises:
+        AssertionError: Listing every mismatch (agents' validators raise AssertionError too)
+    """
+    errors = schema_errors(value, schema, name)
+    if errors:
+        raise AssertionError("; ".join(errors))
+    return value
@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+"""
+URL Checker for learn_flow
+Concurrent, cached health checks for reference URLs
+
+- One pooled requests.Session (keep-alive connections reused across checks)
+- Thread pool with a per-host concurrency limit
+- Results persisted in the url_status table with a TTL (shorter for failures)
+- YouTube playlist pages are read only up to youtube_max_bytes
+
+The request path only reads url_status (live_checks: false); the offline link
+audit (python -m src.core.link_audit) keeps the table up to date.
+"""
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from src.core import database
+from src.core.config_loader import load_learning_resources
+
+
+def get_url_validation_settings() -> Dict[str, Any]:
+    """URL validation settings from learning_resources.yaml with safe defaults"""
+    try:
+        settings = load_learning_resources().get("url_validation", {}) or {}
+    except (FileNotFoundError, ValueError):
+        settings = {}
+    return {
+        "timeout_seconds": settings.get("timeout_seconds", 5),
+        "max_workers": settings.get("max_workers", 8),
+        "per_host_limit": settings.get("per_host_limit", 2),
+        "ttl_hours": settings.get("ttl_hours", 24),
+        "failure_ttl_hours": settings.get("failure_ttl_hours", 1),
+        "youtube_max_bytes": settings.get("youtube_max_bytes", 1024 * 1024),
+        "live_checks": settings.get("live_checks", False)
+    }
+
+
+def playlist_problem(content: str) -> Optional[str]:
+    """
+    Detect an empty/missing YouTube playlist from page content
+
+    YouTube returns 200 even for non-existent playlists, so the page is inspected.
+
+    Returns:
+        Problem description, or None if the playlist looks fine
+    """
+    content_lower = content.lower()
+
+    # 1. Check for "0 videos" or empty playlist
+    if ('"videoCount":0' in content or
+            '"videoCount":"0"' in content or
+            '0 videos' in content_lower):
+        return "YouTube playlist is empty (0 videos)"
+
+    # 2. Check for explicit error messages
+    if ('playlist does not exist' in content_lower or
+            'playlist not found' in content_lower or
+            'this playlist is private' in content_lower or
+            'playlist is unavailable' in content_lower):
+        return "YouTube playlist not found or private"
+
+    # 3. Only flag generic unavailability when it is in the title or early in the page
+    if 'unavailable' in content_lower and 'playlist' in content_lower[:5000]:
+        if 'playlist unavailable' in content_lower[:2000]:
+            return "YouTube playlist unavailable"
+
+    return None
+
+
+class URLChecker:
+    """
+    Reference URL checker shared by all threads
+
+    check() always hits the network; check_many() serves fresh results from the
+    url_status table and checks the rest concurrently.
+    """
+
+    def __init__(self, settings: Optional[Dict[str, Any]] = None):
+        self.settings = {**get_url_validation_settings(), **(settings or {})}
+        self.session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=self.settings["max_workers"],
+            pool_maxsize=self.settings["max_workers"]
+        )
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.settings["max_workers"], thread_name_prefix="url-check"
+        )
+        # Separate single worker so background refreshes never starve check_many
+        self._background = ThreadPoolExecutor(max_workers=1, thread_name_prefix="url-refresh")
+        self._host_lock = threading.Lock()
+        self._host_slots: Dict[str, threading.BoundedSemaphore] = {}
+
+    def _host_slot(self, url: str) -> threading.BoundedSemaphore:
+        host = urlsplit(url).netloc.lower()
+        with self._host_lock:
+            if host not in self._host_slots:
+                self._host_slots[host] = threading.BoundedSemaphore(self.settings["per_host_limit"])
+            return self._host_slots[host]
+
+    def _read_prefix(self, response: requests.Response) -> str:
+        """Read at most youtube_max_bytes of a streamed response body"""
+        limit = self.settings["youtube_max_bytes"]
+        chunks = []
+        size = 0
+        for chunk in response.iter_content(chunk_size=64 * 1024):
+            chunks.append(chunk)
+            size += len(chunk)
+            if size >= limit:
+                break
+        return b"".join(chunks)[:limit].decode(response.encoding or "utf-8", errors="replace")
+
+    def check(self, url: str, timeout: Optional[float] = None) -> Tuple[bool, int]:
+        """
+        Check if a URL is accessible and returns 200 OK
+
+        Args:
+            url: URL to check
+            timeout: Request timeout in seconds (default from settings)
+
+        Returns:
+            Tuple of (is_accessible, status_code); status 0 means the request failed
+        """
+        timeout = timeout or self.settings["timeout_seconds"]
+        try:
+            with self._host_slot(url):
+                # Special handling for YouTube playlists (check if playlist actually exists)
+                if 'youtube.com/playlist' in url:
+                    with self.session.get(url, timeout=timeout, allow_redirects=True, stream=True) as response:
+                        if response.status_code == 200:
+                            problem = playlist_problem(self._read_prefix(response))
+                            if problem:
+                                print(f"   ⚠️  {problem}")
+                                return (False, 404)
+                        return (response.status_code == 200, response.status_code)
+
+                # Standard URL check for non-YouTube
+                response = self.session.head(url, timeout=timeout, allow_redirects=True)
+                # Some servers don't support HEAD, try GET if HEAD fails
+                if response.status_code == 405:
+                    with self.session.get(url, timeout=timeout, allow_redirects=True, stream=True) as response:
+                        return (response.status_code == 200, response.status_code)
+                return (response.status_code == 200, response.status_code)
+        except requests.exceptions.RequestException as e:
+            print(f"   ⚠️  URL check failed for {url}: {e}")
+            return (False, 0)
+
+    def _is_fresh(self, status: Dict[str, Any], now: float) -> bool:
+        ttl_hours = self.settings["ttl_hours"] if status["ok"] else self.settings["failure_ttl_hours"]
+        return now - status["checked_at"] < ttl_hours * 3600
+
+    def cached_statuses(self, urls: List[str], include_stale: bool = False) -> Dict[str, Tuple[bool, int]]:
+        """Results from the url_status table (fresh ones only unless include_stale)"""
+        try:
+            stored = database.get_url_statuses(urls)
+        except sqlite3.Error as e:
+            print(f"   ⚠️  URL status cache unavailable: {e}")
+            return {}
+        now = time.time()
+        return {
+            url: (status["ok"], status["status_code"])
+            for url, status in stored.items()
+            if include_stale or self._is_fresh(status, now)
+        }
+
+    def check_many(self, urls: List[str], use_cache: bool = True) -> Dict[str, Tuple[bool, int]]:
+        """
+        Check several URLs concurrently
+
+        Args:
+            urls: URLs to check (duplicates are checked once)
+            use_cache: Serve fresh results from the url_status table
+
+        Returns:
+            Dict of url -> (is_accessible, status_code)
+        """
+        urls = list(dict.fromkeys(urls))
+        results = self.cached_statuses(urls) if use_cache else {}
+
+        pending = [url for url in urls if url not in results]
+        if not pending:
+            return results
+
+        checked_at = time.time()
+        for url, result in zip(pending, self._executor.map(self.check, pending)):
+            results[url] = result
+
+        try:
+            database.save_url_statuses([
+                {"url": url, "ok": results[url][0], "status_code": results[url][1], "checked_at": checked_at}
+                for url in pending
+            ])
+        except sqlite3.Error as e:
+            print(f"   ⚠️  Could not save URL statuses: {e}")
+        return results
+
+    def refresh_in_background(self, urls: List[str]) -> None:
+        """Queue checks for URLs without blocking the caller (results land in url_status)"""
+        urls = list(dict.fromkeys(url for url in urls if url))
+        if urls:
+            self._background.submit(self.check_many, urls, False)
+
+    def close(self) -> None:
+        self._background.shutdown(wait=False)
+        self._executor.shutdown(wait=False)
+        self.session.close()
+
+
+_checker: Optional[URLChecker] = None
+_checker_lock = threading.Lock()
+
+
+def get_url_checker() -> URLChecker:
+    """Process-wide URL checker (created on first use)"""
+    global _checker
+    with _checker_lock:
+        if _checker is None:
+            _checker = URLChecker()
+        return _checker
@@ -13,10 +13,20 @@ sys.path.insert(0, str(project_root))
 import streamlit as st
 from pyvis.network import Network
 import streamlit.components.v1 as components
-from src.workflow import run_full_workflow
+from src.workflow import run_full_workflow, resume_workflow
 from src.core import database
 from src.core.llm_engine import call_llm
-from src.core import calculate_depth_score
+from src.core import calculate_depth_score, calculate_topic_progress
+from src.core import llm_metrics
+from src.core.quota import QuotaExceededError
+from src.core import module_store
+from src.workflow.prefetch import (
+    build_user_context,
+    get_prefetch_scheduler,
+    module_prompt_hash,
+    prefetch_topic_modules,
+    wait_for_module
+)
 
 # Initialize database on startup
 database.init_db()
@@ -268,14 +278,18 @@ def screen_0_my_paths():
 
     st.markdown("---")
 
+    # Mastery, completion and activity for all paths in one pass
+    summaries = database.get_path_summaries(user_id, paths)
+
     # Display each path as a card
     for path in paths:
         path_id = path['id']
-        mastery = database.calculate_path_mastery(path)
+        summary = summaries[path_id]
+        mastery = summary['mastery']
         topics = path.get('topics', [])
 
         # Calculate metrics
-        total_modules_completed = database.get_total_completed_modules(user_id, path_id)
+        total_modules_completed = summary['completed_modules']
         total_modules = len(topics) * 8
 
         # Path card
@@ -355,22 +369,10 @@ def screen_0_my_paths():
 
                 # Activity heatmap - simple text-based representation
                 st.caption("**Recent Activity (Last 7 Days)**")
-                # Get recent activity from database
-                with database.get_db_connection() as conn:
-                    cursor = conn.cursor()
-                    cursor.execute("""
-                        SELECT DATE(completed_date) as date, COUNT(*) as count
-                        FROM user_topic_modules
-                        WHERE user_id = ? AND path_id = ?
-                        AND completed_date >= date('now', '-7 days')
-                        GROUP BY DATE(completed_date)
-                        ORDER BY date
-                    """, (user_id, path_id))
-                    activity = cursor.fetchall()
-
-                if activity:
+                activity_dict = summary['activity']
+
+                if activity_dict:
                     # Create simple text heatmap
-                    activity_dict = {row[0]: row[1] for row in activity}
                     from datetime import datetime, timedelta
 
                     heatmap_str = ""
@@ -389,7 +391,7 @@ def screen_0_my_paths():
                         heatmap_str += block
 
                     st.text(f"Activity: {heatmap_str} (7 days)")
-                    total_last_7 = sum(row[1] for row in activity)
+                    total_last_7 = sum(activity_dict.values())
                     st.text(f"Modules completed: {total_last_7}")
                 else:
                     st.text("No activity in last 7 days")
@@ -505,37 +507,59 @@ def screen_1_form():
 
     st.markdown("---")
 
+    # Prepare form data
+    form_data = {
+        "current_job_title": current_job_title,
+        "current_description": current_description,
+        "current_seniority": current_seniority,
+        "target_job_title": target_job_title,
+        "target_description": target_description,
+        "target_seniority": target_seniority,
+        "target_company": target_company,
+        "target_industry": "Finance"  # Default for now
+    }
+
     if st.button(":material/rocket_launch: Generate Learning Path", type="primary", use_container_width=True):
         with st.spinner("🤖 AI analyzing skill gap and building your path..."):
-            # Prepare form data
-            form_data = {
-                "current_job_title": current_job_title,
-                "current_description": current_description,
-                "current_seniority": current_seniority,
-                "target_job_title": target_job_title,
-                "target_description": target_description,
-                "target_seniority": target_seniority,
-                "target_company": target_company,
-                "target_industry": "Finance"  # Default for now
-            }
-
             try:
                 # Call Phase 2D workflow
                 result = run_full_workflow(user_id=get_current_user_id(), form_data=form_data)
-
-                if result.get("error"):
-                    st.error(f"❌ Error: {result['error']}")
-                else:
-                    st.session_state.path_data = result
-                    st.session_state.dashboard_tab = 'Dashboard'  # FIX #1: Force Dashboard for fresh path
-                    st.session_state.tabs_unlocked = False  # Keep tabs locked initially
-                    st.snow()  # Fireworks-style celebration animation
-                    st.success(f"✅ Path generated! {result['topics_count']} topics, {result['global_readiness']}% readiness")
-                    st.query_params["screen"] = "graph_new"
-                    st.rerun()
+                show_workflow_result(result)
             except Exception as e:
                 st.error(f"❌ Error generating path: {e}")
 
+    # A failed run is resumed from its persisted run record (completed steps are
+    # not re-run); if not even the path was created there is nothing to resume
+    failed_run = st.session_state.get('failed_workflow')
+    if failed_run:
+        if st.button(":material/refresh: Retry Path Generation", use_container_width=True):
+            with st.spinner("🤖 Retrying from the last completed step..."):
+                try:
+                    if failed_run.get("path_id"):
+                        result = resume_workflow(failed_run["path_id"])
+                    else:
+                        result = run_full_workflow(user_id=get_current_user_id(), form_data=form_data)
+                    show_workflow_result(result)
+                except Exception as e:
+                    st.session_state.failed_workflow = None
+                    st.error(f"❌ Error generating path: {e}")
+
+
+def show_workflow_result(result: dict):
+    """Show a workflow result: remember failed runs for retry, open the dashboard on success"""
+    if result.get("error"):
+        st.session_state.failed_workflow = {"path_id": result.get("path_id")}
+        st.error(f"❌ Error: {result['error']}")
+    else:
+        st.session_state.failed_workflow = None
+        st.session_state.path_data = result
+        st.session_state.dashboard_tab = 'Dashboard'  # FIX #1: Force Dashboard for fresh path
+        st.session_state.tabs_unlocked = False  # Keep tabs locked initially
+        st.snow()  # Fireworks-style celebration animation
+        st.success(f"✅ Path generated! {result['topics_count']} topics, {result['global_readiness']}% readiness")
+        st.query_params["screen"] = "graph_new"
+        st.rerun()
+
 
 def screen_2_graph():
     """Screen 2: Radar Chart + Progress Bars Dashboard"""
@@ -556,14 +580,10 @@ def screen_2_graph():
     path_id = path_data.get('path_id', '')
 
     # Update mastery for each topic based on completed modules
-    for topic in topics:
-        topic_id = topic['topic_id']
-        initial_mastery = topic.get('mastery', 0)
-        completed_modules = database.get_completed_modules(user_id, path_id, topic_id)
-        points_per_module = (100 - initial_mastery) / 8.0
-        mastery_from_modules = len(completed_modules) * points_per_module
-        updated_mastery = min(int(initial_mastery + mastery_from_modules), 100)
-        topic['mastery'] = updated_mastery
+    completed_by_topic = database.get_completed_modules_by_topic(user_id, path_id)
+    progress = calculate_topic_progress(topics, completed_by_topic)
+    for topic, updated_mastery in zip(topics, progress['mastery']):
+        topic['mastery'] = int(updated_mastery)
 
     # Calculate average mastery
     avg_mastery = sum(t['mastery'] for t in topics) / len(topics) if topics else 0
@@ -818,22 +838,16 @@ def screen_2_new():
 
         # FIX #4: Calculate mastery from completed modules (single source of truth)
         # Calculate current mastery for each topic without modifying the topic objects
-        topic_masteries = []
+        completed_by_topic = database.get_completed_modules_by_topic(user_id, path_id)
+        progress = calculate_topic_progress(topics, completed_by_topic)
+        topic_masteries = progress['mastery'].tolist()
         topics_with_updated_mastery = []  # Create new list with updated mastery values
 
-        for topic in topics:
-            topic_id = topic['topic_id']
-            initial_mastery = topic.get('mastery', 0)
-            completed_modules = database.get_completed_modules(user_id, path_id, topic_id)
-            points_per_module = (100 - initial_mastery) / 8.0
-            mastery_from_modules = len(completed_modules) * points_per_module
-            updated_mastery = min(int(initial_mastery + mastery_from_modules), 100)
-            topic_masteries.append(updated_mastery)
-
+        for topic, updated_mastery, modules_done in zip(topics, topic_masteries, progress['modules_done'].tolist()):
             # Create a copy of topic with updated mastery for display purposes
             topic_display = topic.copy()
             topic_display['mastery'] = updated_mastery
-            topic_display['modules_completed'] = len(completed_modules)
+            topic_display['modules_completed'] = modules_done
             topics_with_updated_mastery.append(topic_display)
 
         # Calculate average mastery from computed values (not stored in topics)
@@ -989,31 +1003,23 @@ def screen_2_new():
         st.caption("All topics sorted by priority — Focus on high-priority items for maximum impact")
 
         # Calculate mastery and gaps for all topics
+        # Target is always 100% (user needs to master everything for target role)
+        completed_by_topic = database.get_completed_modules_by_topic(user_id, path_id)
+        progress = calculate_topic_progress(topics, completed_by_topic)
         topic_data = []
-        for topic in topics:
-            topic_id = topic['topic_id']
-            initial_mastery = topic.get('mastery', 0)
-
-            # Get completed modules
-            completed_modules = database.get_completed_modules(user_id, path_id, topic_id)
-
-            # Calculate current mastery
-            points_per_module = (100 - initial_mastery) / 8.0
-            mastery_from_modules = len(completed_modules) * points_per_module
-            current_mastery = min(int(initial_mastery + mastery_from_modules), 100)
-
-            # Target is always 100% (user needs to master everything for target role)
-            target_mastery = 100
-            gap = target_mastery - current_mastery
-
+        for topic, current_mastery, gap, modules_done, bucket in zip(
+            topics, progress['mastery'].tolist(), progress['gap'].tolist(),
+            progress['modules_done'].tolist(), progress['bucket'].tolist()
+        ):
             topic_data.append({
-                'topic_id': topic_id,
-                'name': format_topic_name(topic_id),
+                'topic_id': topic['topic_id'],
+                'name': format_topic_name(topic['topic_id']),
                 'current': current_mastery,
-                'target': target_mastery,
+                'target': 100,
                 'gap': gap,
+                'bucket': bucket,
                 'hours': topic.get('estimated_hours', 0),
-                'modules_done': len(completed_modules),
+                'modules_done': modules_done,
                 'modules_total': 8
             })
 
@@ -1021,11 +1027,10 @@ def screen_2_new():
         st.subheader(":material/route: Your Learning Path")
         st.caption("Track your progress across all topics — Start with 'To Start' column")
 
-        # Group topics into columns based on mastery
-        to_start = [t for t in topic_data if t['current'] <= 25]
-        in_progress = [t for t in topic_data if 25 < t['current'] <= 75]
-        nearly_done = [t for t in topic_data if 75 < t['current'] < 100]
-        mastered = [t for t in topic_data if t['current'] == 100]
+        # Group topics into columns based on mastery (to start, in progress, nearly done, mastered)
+        to_start, in_progress, nearly_done, mastered = (
+            [t for t in topic_data if t['bucket'] == bucket] for bucket in range(4)
+        )
 
         # Sort each group by gap (highest gap = highest priority)
         to_start.sort(key=lambda x: x['gap'], reverse=True)
@@ -1227,6 +1232,8 @@ def screen_3_topics():
 
         # If user changed topic, update and reload
         if selected_display != selected_topic_id:
+            # Background work for the old topic would delay the new topic's modules
+            get_prefetch_scheduler().cancel_pending(user_id)
             st.session_state.selected_topic_id = selected_display
             st.session_state.current_module = None
             st.rerun()
@@ -1237,21 +1244,59 @@ def screen_3_topics():
         # Generate module names if not cached (with user context for role-specific modules)
         # Cache key includes path_id to ensure different paths get different modules
         module_cache_key = (path_id, selected_topic_id)
+        # Names are generated once per path and shared across sessions (module store)
+        if module_cache_key not in st.session_state.module_names_cache:
+            stored_names = module_store.get_module_names(path_id, selected_topic_id)
+            if stored_names:
+                st.session_state.module_names_cache[module_cache_key] = stored_names
+        names_generated = True
         if module_cache_key not in st.session_state.module_names_cache:
-            from src.agents.content_generator import generate_module_names
+            from src.agents.content_generator import generate_module_names, generic_module_names
             # Pass user context for role-specific module names
             target_role = path_record.get('target_job_title', 'Quant Analyst') if path_record else 'Quant Analyst'
             target_sen = path_record.get('target_seniority', 'Intermediate') if path_record else 'Intermediate'
-            module_names = generate_module_names(
-                topic_id=selected_topic_id,
-                target_role=target_role,
-                target_seniority=target_sen,
-                mastery=initial_mastery
-            )
-            st.session_state.module_names_cache[module_cache_key] = module_names
+            try:
+                with llm_metrics.call_context(user_id=user_id):
+                    module_names = generate_module_names(
+                        topic_id=selected_topic_id,
+                        target_role=target_role,
+                        target_seniority=target_sen,
+                        mastery=initial_mastery,
+                        fallback=False
+                    )
+            except Exception as e:
+                # Show placeholders for now; they are not stored, so the names are generated next time
+                if isinstance(e, QuotaExceededError):
+                    st.warning(f"💸 You've reached your {e.period} AI usage limit. Please come back later.")
+                else:
+                    print(f"Warning: Failed to generate module names: {e}")
+                module_names, names_generated = generic_module_names(), False
+            if names_generated:
+                st.session_state.module_names_cache[module_cache_key] = module_names
+                module_store.save_module_names(
+                    path_id, selected_topic_id, module_names,
+                    prompt_hash=module_store.make_prompt_hash(
+                        "module_naming", selected_topic_id, target_role, target_sen, initial_mastery
+                    )
+                )
         else:
             module_names = st.session_state.module_names_cache[module_cache_key]
 
+        # Pre-generate the next module(s) after the open one in the background so "Next module"
+        # is served from the module store (no-op for modules already queued/stored).
+        # The open module itself is generated (and streamed) in the foreground.
+        # Placeholder names would produce content for the wrong modules: no prefetch.
+        if names_generated:
+            prefetch_topic_modules(
+                user_id=user_id,
+                path_id=path_id,
+                topic_id=selected_topic_id,
+                path_record=path_record,
+                mastery=initial_mastery,
+                module_names=module_names,
+                start_module=(st.session_state.get('current_module') or 0) + 1
+            )
+
         # Get answers to determine in-progress vs completed
         # A module is "in progress" if it has answers but not all correct
         # A module is "completed" if it's in completed_modules list
@@ -1388,6 +1433,16 @@ def screen_3_topics():
         if cache_key in st.session_state.module_cache:
             content_data = st.session_state.module_cache[cache_key]
         else:
+            # Generated before (any session) or prefetched in the background?
+            # Waits if it is still being generated
+            content_data = module_store.get_module_content(path_id, selected_topic_id, module_id)
+            if content_data is None:
+                with st.spinner("🤖 Finishing module prepared in the background..."):
+                    content_data = wait_for_module(path_id, selected_topic_id, module_id)
+            if content_data is not None:
+                st.session_state.module_cache[cache_key] = content_data
+
+        if content_data is None:
             # Generate content and cache it
             # Get the module name from the names cache
             module_name = module_names.get(module_id, f"Module {module_id}")
@@ -1400,34 +1455,47 @@ def screen_3_topics():
             )
 
             # Build user context for personalized content
-            user_context = None
-            if path_record:
-                user_context = {
-                    "current_seniority": path_record.get('current_seniority', 'Intermediate'),
-                    "current_job_title": path_record.get('current_job_title', 'Professional'),
-                    "current_description": path_record.get('current_description', 'General background'),
-                    "target_seniority": path_record.get('target_seniority', 'Advanced'),
-                    "target_job_title": path_record.get('target_job_title', 'Senior Professional'),
-                    "target_description": path_record.get('target_description', 'Advanced skills required'),
-                    "target_company": path_record.get('target_company', 'Industry'),
-                    "mastery": initial_mastery
-                }
+            user_context = build_user_context(path_record, initial_mastery)
+
+            # Stream the module text into a placeholder as it is generated
+            # (first paint after ~1s instead of a spinner for the whole generation)
+            stream_placeholder = st.empty()
+
+            def show_partial_content(partial_markdown: str):
+                stream_placeholder.markdown(partial_markdown + " ▌")
 
             with st.spinner(f"🤖 Generating module content..."):
                 try:
                     from src.agents.content_generator import generate_content
-                    content_data = generate_content(
-                        topic_id=selected_topic_id,
-                        module_id=module_id,
-                        module_name=module_name,
-                        depth_score=depth_score,
-                        user_context=user_context,
-                        all_module_names=module_names  # Pass all 8 module names to prevent overlap
-                    )
+                    with llm_metrics.call_context(user_id=user_id):
+                        content_data = generate_content(
+                            topic_id=selected_topic_id,
+                            module_id=module_id,
+                            module_name=module_name,
+                            depth_score=depth_score,
+                            user_context=user_context,
+                            all_module_names=module_names,  # Pass all 8 module names to prevent overlap
+                            on_content=show_partial_content
+                        )
                     st.session_state.module_cache[cache_key] = content_data
+                    if content_data.get("quota_fallback"):
+                        st.info("💸 You've reached your AI usage limit for now - showing a shared version of this module.")
+                    else:
+                        module_store.save_module_content(
+                            path_id, selected_topic_id, module_id, content_data,
+                            prompt_hash=module_prompt_hash(
+                                selected_topic_id, module_id, module_name, depth_score, user_context, module_names
+                            )
+                        )
+                except QuotaExceededError as e:
+                    stream_placeholder.empty()
+                    st.warning(f"💸 You've reached your {e.period} AI usage limit. Please come back later.")
+                    return
                 except Exception as e:
+                    stream_placeholder.empty()
                     st.error(f"❌ Error generating content: {e}")
                     return
+            stream_placeholder.empty()
 
         st.markdown("---")
         st.subheader(f":material/book: {content_data.get('module_name', f'Module {module_id}')}")
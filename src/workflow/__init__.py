@@ -1,4 +1,4 @@
 # src.workflow package
-from .orchestrator import run_full_workflow
+from .orchestrator import run_full_workflow, resume_workflow
 
-__all__ = ["run_full_workflow"]
+__all__ = ["run_full_workflow", "resume_workflow"]
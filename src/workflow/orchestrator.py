@@ -2,13 +2,45 @@
 """
 LangGraph Workflow Orchestration for learn_flow
 Phase 2D: Orchestrates Agent 1 (Job Parser) → Agent 2 (Topic Assessor) → Database
+
+Agent 2 runs either as one call for all topics or, in parallel mode, as a
+Send fan-out over topic chunks merged before the database save.
 """
 import json
-from typing import TypedDict, Annotated
+import threading
+from typing import TypedDict, Annotated, Optional, List, Dict, Any
 from langgraph.graph import StateGraph, END
+from langgraph.types import Send
 from src.agents.job_parser import parse_jobs
 from src.agents.topic_assessor import assess_topics, calculate_global_readiness
-from src.core import database
+from src.core import database, load_agent_config
+
+
+def merge_assessed_topics(left: Optional[list], right: Optional[list]) -> list:
+    """
+    Reducer for assessed topic chunks written by parallel branches
+
+    Merges by topic_id (right wins), so nodes returning the full state are idempotent.
+    """
+    merged = {topic["topic_id"]: topic for topic in (left or [])}
+    for topic in right or []:
+        merged[topic["topic_id"]] = topic
+    return list(merged.values())
+
+
+def merge_errors(left: Optional[str], right: Optional[str]) -> Optional[str]:
+    """
+    Reducer for errors written by parallel branches
+
+    None keeps the current error, "" clears it, distinct errors are joined with "; ".
+    """
+    if right is None:
+        return left
+    if right == "" or not left:
+        return right
+    if right in left.split("; "):
+        return left
+    return f"{left}; {right}"
 
 
 class WorkflowState(TypedDict):
@@ -17,16 +49,92 @@ class WorkflowState(TypedDict):
     form_data: dict
     path_id: str
     topics: list
+    assessed_chunks: Annotated[list, merge_assessed_topics]  # Parallel Agent 2 results
     assessed_topics: list
     global_readiness: float
-    error: str
+    error: Annotated[Optional[str], merge_errors]
+
+
+def get_parallel_assessment_settings() -> Dict[str, Any]:
+    """Agent 2 fan-out settings from config with safe defaults"""
+    try:
+        settings = load_agent_config("agent2_topic_assessor").get("parallel_assessment", {})
+    except (FileNotFoundError, ValueError):
+        settings = {}
+    return {
+        "enabled": settings.get("enabled", False),
+        "chunk_size": max(1, settings.get("chunk_size", 3)),
+        "max_concurrency": max(1, settings.get("max_concurrency", 5))
+    }
+
+
+def _current_job_context(form_data: dict) -> str:
+    """Current job context string used by Agent 2 for mastery estimation"""
+    return f"{form_data['current_seniority']} {form_data['current_job_title']}: {form_data['current_description']}"
+
+
+# =============================================================================
+# PERSISTED NODE OUTPUTS (resume_workflow skips nodes that already completed)
+# =============================================================================
+
+# State keys each resumable node produces
+NODE_OUTPUT_KEYS = {
+    "agent1_parse_jobs": ("topics",),
+    "agent2_assess_topics": ("assessed_topics", "global_readiness"),
+    "agent2_merge": ("assessed_topics", "global_readiness"),
+    "save_to_database": ()
+}
+
+
+def resumable(node_name: str, node_fn):
+    """
+    Wrap a node so its output is persisted per path and restored on resume
+
+    If the path's run already recorded this node, the stored output is loaded
+    into the state and the node is skipped.
+    """
+    output_keys = NODE_OUTPUT_KEYS[node_name]
+
+    def run_node(state: WorkflowState) -> WorkflowState:
+        path_id = state.get("path_id")
+        if path_id and not state.get("error"):
+            output = database.get_workflow_node_output(path_id, node_name)
+            if output is not None:
+                state.update(output)
+                print(f"  ⏭️  {node_name}: restored from previous run")
+                return state
+
+        state = node_fn(state)
+
+        if state.get("path_id") and not state.get("error"):
+            try:
+                database.save_workflow_node_output(
+                    state["path_id"], node_name, {key: state[key] for key in output_keys}
+                )
+            except Exception as e:
+                # Only costs resumability, not the run itself
+                print(f"  ⚠️  Could not persist {node_name} output: {e}")
+        return state
+
+    run_node.__name__ = node_fn.__name__
+    run_node.__doc__ = node_fn.__doc__
+    return run_node
+
+
+def _chunk_node_name(topics: List[Dict[str, Any]]) -> str:
+    """Run-record node name of an Agent 2 chunk (one entry per chunk of topic ids)"""
+    return "agent2_chunk:" + ",".join(str(topic.get("topic_id", topic.get("id"))) for topic in topics)
 
 
 def create_path_node(state: WorkflowState) -> WorkflowState:
     """
-    Initial node: Create path in database
+    Initial node: Create path in database (and its workflow run record)
     """
     try:
+        if state.get("path_id"):
+            # Resumed run - the path already exists
+            return state
+
         form_data = state["form_data"]
         path_id = database.create_path(
             user_id=state["user_id"],
@@ -41,6 +149,7 @@ def create_path_node(state: WorkflowState) -> WorkflowState:
             topics=[]
         )
         state["path_id"] = path_id
+        database.create_workflow_run(path_id, state["user_id"], form_data)
         print(f"  Path created: {path_id}")
     except Exception as e:
         state["error"] = f"Path creation failed: {e}"
@@ -78,8 +187,7 @@ def agent2_assess_topics(state: WorkflowState) -> WorkflowState:
             return state
 
         # Build current job context for mastery estimation
-        form_data = state["form_data"]
-        current_context = f"{form_data['current_seniority']} {form_data['current_job_title']}: {form_data['current_description']}"
+        current_context = _current_job_context(state["form_data"])
 
         assessed_topics = assess_topics(
             state["user_id"],
@@ -102,6 +210,131 @@ def agent2_assess_topics(state: WorkflowState) -> WorkflowState:
     return state
 
 
+def fan_out_assessment(state: WorkflowState):
+    """
+    Conditional edge after Agent 1: one Send per chunk of topics
+
+    Returns:
+        List of Send("agent2_assess_chunk", ...) or "agent2_merge" when there is
+        nothing to assess (error upstream / no topics)
+    """
+    if state.get("error") or not state.get("topics"):
+        return "agent2_merge"
+
+    chunk_size = get_parallel_assessment_settings()["chunk_size"]
+    topics = state["topics"]
+    return [
+        Send("agent2_assess_chunk", {
+            "path_id": state["path_id"],
+            "user_id": state["user_id"],
+            "form_data": state["form_data"],
+            "topics": topics[i:i + chunk_size]
+        })
+        for i in range(0, len(topics), chunk_size)
+    ]
+
+
+def _assess_chunk(user_id: int, topics: List[Dict[str, Any]], current_context: str) -> List[Dict[str, Any]]:
+    """Assess a chunk; if the batch fails, retry topics one by one so one bad object only loses itself"""
+    try:
+        return assess_topics(user_id, topics, current_context)
+    except Exception as e:
+        if len(topics) == 1:
+            raise
+        print(f"  ⚠️  Agent 2 chunk failed ({e}), retrying {len(topics)} topics individually")
+
+    assessed = []
+    for topic in topics:
+        try:
+            assessed.extend(assess_topics(user_id, [topic], current_context))
+        except Exception as e:
+            print(f"  ❌ Agent 2 failed for topic {topic.get('topic_id', topic.get('id'))}: {e}")
+    return assessed
+
+
+def agent2_assess_chunk(chunk: dict) -> dict:
+    """
+    Agent 2 (parallel mode): assess one chunk of topics
+
+    Receives the Send payload (path_id, user_id, form_data, topics) and returns only
+    assessed_chunks/error so parallel branches never write the same plain key.
+    Assessed topics are persisted with the ids of the topics that failed, so a
+    resumed run only re-assesses those (agent2_merge fails the run while any are missing).
+    """
+    try:
+        path_id = chunk.get("path_id")
+        node_name = _chunk_node_name(chunk["topics"])
+        topics = chunk["topics"]
+        restored = []
+        if path_id:
+            output = database.get_workflow_node_output(path_id, node_name)
+            if output is not None:
+                restored = output["assessed_chunks"]
+                print(f"  ⏭️  Agent 2 (chunk): {len(restored)} topics restored from previous run")
+                missing_ids = set(output.get("missing_topic_ids", []))
+                if not missing_ids:
+                    return {"assessed_chunks": restored}
+                topics = [topic for topic in topics if topic.get("topic_id", topic.get("id")) in missing_ids]
+
+        assessed = restored + _assess_chunk(chunk["user_id"], topics, _current_job_context(chunk["form_data"]))
+        print(f"  Agent 2 (chunk): {len(assessed)}/{len(chunk['topics'])} topics assessed")
+        if path_id:
+            assessed_ids = {topic["topic_id"] for topic in assessed}
+            missing_ids = [
+                topic_id for topic_id in (topic.get("topic_id", topic.get("id")) for topic in chunk["topics"])
+                if topic_id not in assessed_ids
+            ]
+            database.save_workflow_node_output(
+                path_id, node_name, {"assessed_chunks": assessed, "missing_topic_ids": missing_ids}
+            )
+        return {"assessed_chunks": assessed}
+    except Exception as e:
+        print(f"  ❌ Agent 2 chunk error: {e}")
+        return {"error": f"Agent 2 failed: {e}"}
+
+
+def agent2_merge(state: WorkflowState) -> WorkflowState:
+    """
+    Agent 2 (parallel mode): merge chunk results in Agent 1 topic order
+    """
+    try:
+        if state.get("error"):
+            return state
+
+        assessed_by_id = {topic["topic_id"]: topic for topic in state.get("assessed_chunks", [])}
+        topic_ids = [topic.get("topic_id", topic.get("id")) for topic in state["topics"]]
+
+        # Topics Agent 2 returned in Agent 1 order, then any extra ids it produced
+        assessed_topics = [assessed_by_id.pop(topic_id) for topic_id in topic_ids if topic_id in assessed_by_id]
+        assessed_topics.extend(assessed_by_id.values())
+
+        missing = [topic_id for topic_id in topic_ids if topic_id not in {t["topic_id"] for t in assessed_topics}]
+        if missing:
+            # Not recorded as completed: resume_workflow re-assesses just these topics
+            state["error"] = f"Agent 2 failed: {len(missing)} topics not assessed ({', '.join(missing)})"
+            print(f"  ❌ Agent 2 error: {len(missing)} topics not assessed: {', '.join(missing)}")
+            return state
+
+        if not assessed_topics:
+            state["error"] = "Agent 2 failed: no topics assessed"
+            print(f"  ❌ Agent 2 error: no topics assessed")
+            return state
+
+        global_readiness = calculate_global_readiness(assessed_topics)
+
+        state["assessed_topics"] = assessed_topics
+        state["global_readiness"] = global_readiness
+
+        print(f"  Agent 2 (Topic Assessor): {len(assessed_topics)} topics assessed in parallel")
+        print(f"  Global readiness: {global_readiness}%")
+
+    except Exception as e:
+        state["error"] = f"Agent 2 failed: {e}"
+        print(f"  ❌ Agent 2 error: {e}")
+
+    return state
+
+
 def save_to_database(state: WorkflowState) -> WorkflowState:
     """
     Final node: Save assessed topics to database
@@ -116,18 +349,8 @@ def save_to_database(state: WorkflowState) -> WorkflowState:
         assessed_topics = state["assessed_topics"]
         global_readiness = state["global_readiness"]
 
-        # Update paths table with global_readiness
-        database.update_path_readiness(path_id, global_readiness, assessed_topics)
-
-        # Insert/update user_skills for each topic
-        for topic in assessed_topics:
-            database.upsert_user_skill(
-                user_id=user_id,
-                topic_id=topic["topic_id"],
-                mastery_percent=topic["mastery"],
-                modules_complete=topic["modules_complete"],
-                estimated_hours=topic["estimated_hours"]
-            )
+        # Update paths table with global_readiness and upsert user_skills (one transaction)
+        database.save_path_assessment(user_id, path_id, global_readiness, assessed_topics)
 
         print(f"  Database: {len(assessed_topics)} topics saved to paths + user_skills")
 
@@ -138,31 +361,128 @@ def save_to_database(state: WorkflowState) -> WorkflowState:
     return state
 
 
-def build_workflow() -> StateGraph:
+def build_workflow(parallel: bool = None) -> StateGraph:
     """
     Build LangGraph workflow: CreatePath → Agent1 → Agent2 → Database
 
+    Args:
+        parallel: Assess topics in parallel chunks (Send fan-out → merge).
+            None → parallel_assessment.enabled from agent2 config
+
     Returns:
         Compiled StateGraph ready for execution
     """
+    if parallel is None:
+        parallel = get_parallel_assessment_settings()["enabled"]
+
     workflow = StateGraph(WorkflowState)
 
     # Add nodes
     workflow.add_node("create_path", create_path_node)
-    workflow.add_node("agent1_parse_jobs", agent1_parse_jobs)
-    workflow.add_node("agent2_assess_topics", agent2_assess_topics)
-    workflow.add_node("save_to_database", save_to_database)
+    workflow.add_node("agent1_parse_jobs", resumable("agent1_parse_jobs", agent1_parse_jobs))
+    workflow.add_node("save_to_database", resumable("save_to_database", save_to_database))
 
-    # Define edges (linear flow)
     workflow.set_entry_point("create_path")
     workflow.add_edge("create_path", "agent1_parse_jobs")
-    workflow.add_edge("agent1_parse_jobs", "agent2_assess_topics")
-    workflow.add_edge("agent2_assess_topics", "save_to_database")
+
+    if parallel:
+        # Agent1 → N x agent2_assess_chunk (parallel) → agent2_merge → Database
+        workflow.add_node("agent2_assess_chunk", agent2_assess_chunk)
+        workflow.add_node("agent2_merge", resumable("agent2_merge", agent2_merge))
+        workflow.add_conditional_edges(
+            "agent1_parse_jobs", fan_out_assessment, ["agent2_assess_chunk", "agent2_merge"]
+        )
+        workflow.add_edge("agent2_assess_chunk", "agent2_merge")
+        workflow.add_edge("agent2_merge", "save_to_database")
+    else:
+        # Linear flow: one Agent 2 call for all topics
+        workflow.add_node("agent2_assess_topics", resumable("agent2_assess_topics", agent2_assess_topics))
+        workflow.add_edge("agent1_parse_jobs", "agent2_assess_topics")
+        workflow.add_edge("agent2_assess_topics", "save_to_database")
+
     workflow.add_edge("save_to_database", END)
 
     return workflow.compile()
 
 
+# =============================================================================
+# COMPILED GRAPH CACHE
+# =============================================================================
+
+_workflows: Dict[bool, Any] = {}
+_workflows_lock = threading.Lock()
+
+
+def get_workflow(parallel: bool = None) -> Any:
+    """
+    Get the compiled workflow, built once per process and mode
+
+    Failed runs are resumed from their persisted run record (resume_workflow),
+    so the graph keeps no checkpoints in memory.
+
+    Args:
+        parallel: See build_workflow (None → agent2 config)
+
+    Returns:
+        Compiled StateGraph (shared across runs)
+    """
+    if parallel is None:
+        parallel = get_parallel_assessment_settings()["enabled"]
+
+    with _workflows_lock:
+        if parallel not in _workflows:
+            _workflows[parallel] = build_workflow(parallel=parallel)
+        return _workflows[parallel]
+
+
+def clear_workflow_cache() -> None:
+    """Drop compiled workflows (tests, config reload)"""
+    with _workflows_lock:
+        _workflows.clear()
+
+
+def _run_config() -> Dict[str, Any]:
+    """Invoke config: bound on parallel Agent 2 chunk calls"""
+    return {"max_concurrency": get_parallel_assessment_settings()["max_concurrency"]}
+
+
+def _finish_run(final_state: dict) -> None:
+    """Record the run status for the path"""
+    error = final_state.get("error")
+    if final_state.get("path_id"):
+        try:
+            database.update_workflow_run_status(final_state["path_id"], "failed" if error else "completed", error or None)
+        except Exception as e:
+            print(f"  ⚠️  Could not update workflow run status: {e}")
+
+
+def _workflow_result(user_id: int, final_state: dict) -> dict:
+    """Shape the final state into the run_full_workflow result dict"""
+    if final_state.get("error"):
+        print(f"\n❌ Workflow failed: {final_state['error']}")
+        return {
+            "user_id": user_id,
+            "path_id": final_state.get("path_id", ""),  # pass to resume_workflow()
+            "topics_count": 0,
+            "global_readiness": 0.0,
+            "assessed_topics": [],
+            "error": final_state["error"]
+        }
+
+    print(f"\n✅ Workflow complete")
+    print(f"   Path ID: {final_state['path_id']}")
+    print(f"   {len(final_state['assessed_topics'])} topics → {final_state['global_readiness']}% readiness")
+
+    return {
+        "user_id": user_id,
+        "path_id": final_state["path_id"],
+        "topics_count": len(final_state["assessed_topics"]),
+        "global_readiness": final_state["global_readiness"],
+        "assessed_topics": final_state["assessed_topics"],
+        "error": None
+    }
+
+
 def run_full_workflow(user_id: int, form_data: dict) -> dict:
     """
     Execute full learning path generation workflow
@@ -174,7 +494,7 @@ def run_full_workflow(user_id: int, form_data: dict) -> dict:
     Returns:
         {
             "user_id": int,
-            "path_id": str,
+            "path_id": str,        # also set on failure - pass to resume_workflow()
             "topics_count": int,
             "global_readiness": float,
             "assessed_topics": list,
@@ -193,40 +513,59 @@ def run_full_workflow(user_id: int, form_data: dict) -> dict:
         "form_data": form_data,
         "path_id": "",
         "topics": [],
+        "assessed_chunks": [],
         "assessed_topics": [],
         "global_readiness": 0.0,
         "error": None
     }
 
-    # Build and run workflow
-    workflow = build_workflow()
-    final_state = workflow.invoke(initial_state)
+    # Run the cached compiled workflow
+    final_state = get_workflow().invoke(initial_state, _run_config())
 
-    # Return results
-    if final_state.get("error"):
-        print(f"\n❌ Workflow failed: {final_state['error']}")
-        return {
-            "user_id": user_id,
-            "path_id": "",
-            "topics_count": 0,
-            "global_readiness": 0.0,
-            "assessed_topics": [],
-            "error": final_state["error"]
-        }
+    _finish_run(final_state)
+    return _workflow_result(user_id, final_state)
 
-    print(f"\n✅ Workflow complete")
-    print(f"   Path ID: {final_state['path_id']}")
-    print(f"   {len(final_state['assessed_topics'])} topics → {final_state['global_readiness']}% readiness")
 
-    return {
-        "user_id": user_id,
-        "path_id": final_state["path_id"],
-        "topics_count": len(final_state["assessed_topics"]),
-        "global_readiness": final_state["global_readiness"],
-        "assessed_topics": final_state["assessed_topics"],
+def resume_workflow(path_id: str) -> dict:
+    """
+    Resume a path generation from its persisted run record
+
+    Also works after a restart: nodes whose output was recorded for the path
+    are skipped and their output restored, so only the failed/unfinished steps
+    call the LLM again.
+
+    Args:
+        path_id: path_id returned by run_full_workflow (also set on failure)
+
+    Returns:
+        Same dict as run_full_workflow
+
+    Raises:
+        ValueError: If no workflow run is recorded for the path
+    """
+    run = database.get_workflow_run(path_id)
+    if run is None:
+        raise ValueError(f"No workflow run recorded for path {path_id}")
+
+    print(f"\n🔁 Resuming workflow for path {path_id} ({len(run['nodes'])} steps recorded)")
+
+    initial_state = {
+        "user_id": run["user_id"],
+        "form_data": run["form_data"],
+        "path_id": path_id,
+        "topics": [],
+        "assessed_chunks": [],
+        "assessed_topics": [],
+        "global_readiness": 0.0,
         "error": None
     }
 
+    database.update_workflow_run_status(path_id, "running")
+    final_state = get_workflow().invoke(initial_state, _run_config())
+
+    _finish_run(final_state)
+    return _workflow_result(run["user_id"], final_state)
+
 
 if __name__ == "__main__":
     print("LangGraph Workflow ready.")
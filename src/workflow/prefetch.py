@@ -0,0 +1,310 @@
+#!/usr/bin/env python3
+"""
+Background Module Prefetch for learn_flow
+Generates the next module(s) of a topic on a worker pool while the user reads
+
+- Look-ahead: the prefetch.lookahead modules after the open one are generated
+  (default: the rest of the topic, so every "Next module" is ready). Modules
+  the user never opens are still paid for; lower the setting to trade
+  readiness for tokens
+- Global cap: size of the shared worker pool (prefetch.max_workers)
+- Per-user cap: at most prefetch.max_per_user generations running per user,
+  the rest wait in that user's queue (one busy session cannot starve others)
+- Prefetch LLM calls run at background priority in the rate limiter, behind
+  waiting foreground requests
+- Results go to src.core.module_store (persisted), where the UI picks them up
+"""
+import threading
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from typing import Any, Callable, Deque, Dict, Hashable, Optional, Tuple
+
+from src.agents.content_generator import generate_content, load_prompt_template
+from src.core import load_agent_config, calculate_depth_score
+from src.core import module_store
+from src.core import llm_metrics
+from src.core import rate_limiter
+
+
+def _get_prefetch_settings() -> Dict[str, Any]:
+    """Prefetch settings from agent3 config with safe defaults"""
+    try:
+        settings = load_agent_config("agent3_content_generator").get("prefetch", {})
+    except (FileNotFoundError, ValueError):
+        settings = {}
+    return {
+        "enabled": settings.get("enabled", True),
+        "lookahead": settings.get("lookahead", 8),
+        "max_workers": settings.get("max_workers", 4),
+        "max_per_user": settings.get("max_per_user", 2),
+        "wait_seconds": settings.get("wait_seconds", 30)
+    }
+
+
+class PrefetchScheduler:
+    """
+    Worker pool with a global and a per-user concurrency cap
+
+    Jobs are deduplicated by key: scheduling a key that is queued or running is a no-op.
+    """
+
+    def __init__(self, max_workers: int = 4, max_per_user: int = 2):
+        self.max_per_user = max(1, max_per_user)
+        self._executor = ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix="prefetch")
+        self._lock = threading.Lock()
+        self._pending: Dict[Any, Deque[Tuple[Hashable, Callable[[], Any]]]] = {}
+        self._queued: set = set()
+        self._active: Dict[Any, int] = {}
+        self._running: Dict[Hashable, Future] = {}
+        self._closed = False
+
+    def schedule(self, user_id: Any, key: Hashable, job: Callable[[], Any]) -> bool:
+        """
+        Queue a job for a user
+
+        Returns:
+            True if queued, False if the key is already queued/running or the scheduler is shut down
+        """
+        with self._lock:
+            if self._closed or key in self._queued or key in self._running:
+                return False
+            self._pending.setdefault(user_id, deque()).append((key, job))
+            self._queued.add(key)
+            self._pump(user_id)
+            return True
+
+    def _pump(self, user_id: Any) -> None:
+        """Submit queued jobs while the user is under its cap (lock held)"""
+        queue = self._pending.get(user_id)
+        while not self._closed and queue and self._active.get(user_id, 0) < self.max_per_user:
+            key, job = queue.popleft()
+            self._queued.discard(key)
+            self._active[user_id] = self._active.get(user_id, 0) + 1
+            self._running[key] = self._executor.submit(self._run, user_id, key, job)
+        if not queue:
+            self._pending.pop(user_id, None)
+
+    def _run(self, user_id: Any, key: Hashable, job: Callable[[], Any]) -> Any:
+        try:
+            return job()
+        except Exception as e:
+            # Prefetch is best-effort: the foreground click regenerates on failure
+            print(f"⚠️  Prefetch failed for {key}: {e}")
+            return None
+        finally:
+            with self._lock:
+                self._running.pop(key, None)
+                self._active[user_id] -= 1
+                if not self._active[user_id]:
+                    del self._active[user_id]
+                self._pump(user_id)
+
+    def wait_for(self, key: Hashable, timeout: Optional[float] = None) -> Optional[Any]:
+        """
+        Wait for a running job's result
+
+        Returns:
+            Job result, or None if the key is not running (queued, unknown, finished)
+            or did not finish within timeout
+        """
+        with self._lock:
+            future = self._running.get(key)
+        if future is None:
+            return None
+        try:
+            return future.result(timeout=timeout)
+        except FutureTimeoutError:
+            return None
+
+    def cancel(self, key: Hashable) -> bool:
+        """Drop a queued (not yet running) job, e.g. when the foreground generates it"""
+        with self._lock:
+            if key not in self._queued:
+                return False
+            self._queued.discard(key)
+            for user_id, queue in list(self._pending.items()):
+                remaining = deque(item for item in queue if item[0] != key)
+                if remaining:
+                    self._pending[user_id] = remaining
+                else:
+                    del self._pending[user_id]
+            return True
+
+    def cancel_pending(self, user_id: Any) -> int:
+        """Drop a user's queued (not yet running) jobs, e.g. on topic change"""
+        with self._lock:
+            queue = self._pending.pop(user_id, deque())
+            for key, _ in queue:
+                self._queued.discard(key)
+            return len(queue)
+
+    def shutdown(self, wait: bool = True) -> None:
+        with self._lock:
+            self._closed = True
+            self._pending.clear()
+            self._queued.clear()
+        self._executor.shutdown(wait=wait)
+
+
+_scheduler: Optional[PrefetchScheduler] = None
+_scheduler_lock = threading.Lock()
+
+
+def get_prefetch_scheduler() -> PrefetchScheduler:
+    """Get the process-wide prefetch scheduler (caps from agent3 config)"""
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            settings = _get_prefetch_settings()
+            _scheduler = PrefetchScheduler(
+                max_workers=settings["max_workers"],
+                max_per_user=settings["max_per_user"]
+            )
+        return _scheduler
+
+
+def build_user_context(path_record: Optional[Dict[str, Any]], mastery: int) -> Optional[Dict[str, Any]]:
+    """
+    Build the user_context dict generate_content expects from a path record
+
+    Returns:
+        user_context dict, or None when there is no path record
+    """
+    if not path_record:
+        return None
+    return {
+        "current_seniority": path_record.get('current_seniority', 'Intermediate'),
+        "current_job_title": path_record.get('current_job_title', 'Professional'),
+        "current_description": path_record.get('current_description', 'General background'),
+        "target_seniority": path_record.get('target_seniority', 'Advanced'),
+        "target_job_title": path_record.get('target_job_title', 'Senior Professional'),
+        "target_description": path_record.get('target_description', 'Advanced skills required'),
+        "target_company": path_record.get('target_company', 'Industry'),
+        "mastery": mastery
+    }
+
+
+def module_prompt_hash(
+    topic_id: str,
+    module_id: int,
+    module_name: str,
+    depth_score: float,
+    user_context: Optional[Dict[str, Any]],
+    all_module_names: Dict[int, str]
+) -> str:
+    """Prompt hash stored with generated content (template + generate_content inputs)"""
+    return module_store.make_prompt_hash(
+        load_prompt_template(), topic_id, module_id, module_name,
+        depth_score, user_context, all_module_names
+    )
+
+
+def _module_key(path_id: str, topic_id: str, module_id: int) -> Tuple[str, str, int]:
+    return (path_id, topic_id, module_id)
+
+
+def prefetch_topic_modules(
+    user_id: int,
+    path_id: str,
+    topic_id: str,
+    path_record: Optional[Dict[str, Any]],
+    mastery: int,
+    module_names: Dict[int, str],
+    start_module: int = 1,
+    lookahead: Optional[int] = None
+) -> int:
+    """
+    Queue background generation of the `lookahead` modules from start_module on
+
+    Modules already in the module store (or already queued/running) are skipped,
+    so this is safe to call on every Streamlit rerun.
+
+    Args:
+        user_id: User the work is accounted to (per-user cap)
+        path_id: Learning path ID
+        topic_id: Topic identifier
+        path_record: Path row from database.get_path (seniority, job titles, ...)
+        mastery: Initial mastery of the topic (0-100)
+        module_names: All 8 module names from generate_module_names
+        start_module: First module to prefetch
+        lookahead: Number of modules to prefetch (None → prefetch.lookahead)
+
+    Returns:
+        Number of modules newly queued
+    """
+    settings = _get_prefetch_settings()
+    if not settings["enabled"]:
+        return 0
+    if lookahead is None:
+        lookahead = settings["lookahead"]
+
+    scheduler = get_prefetch_scheduler()
+    target_seniority = path_record.get('target_seniority', 'Intermediate') if path_record else 'Intermediate'
+    user_context = build_user_context(path_record, mastery)
+    names = dict(module_names)
+
+    def make_job(module_id: int) -> Callable[[], Dict[str, Any]]:
+        def job() -> Dict[str, Any]:
+            existing = module_store.get_module_content(path_id, topic_id, module_id)
+            if existing is not None:
+                # Generated in the foreground while this job was queued
+                return existing
+            module_name = names.get(module_id, f"Module {module_id}")
+            depth_score = calculate_depth_score(
+                target_seniority=target_seniority,
+                initial_mastery=mastery,
+                module_id=module_id
+            )
+            with llm_metrics.call_context(user_id=user_id), rate_limiter.background():
+                content_data = generate_content(
+                    topic_id=topic_id,
+                    module_id=module_id,
+                    module_name=module_name,
+                    depth_score=depth_score,
+                    user_context=user_context,
+                    all_module_names=names
+                )
+            if not content_data.get("quota_fallback"):
+                module_store.save_module_content(
+                    path_id, topic_id, module_id, content_data,
+                    prompt_hash=module_prompt_hash(topic_id, module_id, module_name, depth_score, user_context, names)
+                )
+            return content_data
+        return job
+
+    queued = 0
+    start_module = max(1, start_module)
+    for module_id in range(start_module, min(start_module + lookahead, 9)):
+        if module_store.get_module_content(path_id, topic_id, module_id) is not None:
+            continue
+        if scheduler.schedule(user_id, _module_key(path_id, topic_id, module_id), make_job(module_id)):
+            queued += 1
+    return queued
+
+
+def wait_for_module(path_id: str, topic_id: str, module_id: int,
+                    timeout: Optional[float] = None) -> Optional[Dict[str, Any]]:
+    """
+    Get a module from the store, waiting for an in-flight prefetch if one is running
+
+    Args:
+        timeout: Max seconds to wait (None → prefetch.wait_seconds)
+
+    Returns:
+        content_data, or None if the module must be generated in the foreground
+    """
+    content_data = module_store.get_module_content(path_id, topic_id, module_id)
+    if content_data is not None:
+        return content_data
+
+    if timeout is None:
+        timeout = _get_prefetch_settings()["wait_seconds"]
+    scheduler = get_prefetch_scheduler()
+    key = _module_key(path_id, topic_id, module_id)
+    content_data = scheduler.wait_for(key, timeout)
+    if content_data is not None:
+        return content_data
+    # The caller generates it now: a queued prefetch would only pay for it a second time
+    scheduler.cancel(key)
+    # The job may have finished between the store check and wait_for
+    return module_store.get_module_content(path_id, topic_id, module_id)
@@ -0,0 +1,32 @@
+#!/usr/bin/env python3
+"""
+Shared database setup for unit tests
+"""
+import tempfile
+from pathlib import Path
+
+from src.core import database
+
+
+def with_temp_db(test):
+    """
+    Run a test (or a test helper: arguments and return value are passed
+    through) against a fresh, initialized database file
+
+    Afterwards the test's pooled connections and cached reads are dropped and
+    DB_NAME is restored.
+    """
+    def wrapper(*args, **kwargs):
+        original_db = database.DB_NAME
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            database.DB_NAME = str(Path(tmp_dir) / "test.db")
+            try:
+                database.init_db()
+                return test(*args, **kwargs)
+            finally:
+                database.close_db_connections()
+                database.clear_read_cache()
+                database.DB_NAME = original_db
+    wrapper.__name__ = test.__name__
+    wrapper.__doc__ = test.__doc__
+    return wrapper
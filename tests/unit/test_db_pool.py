@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the pooled SQLite connection manager
+Verify thread-local reuse, WAL pragmas, outermost-only commits and savepoints
+"""
+import sys
+import tempfile
+import threading
+from pathlib import Path
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from src.core import database
+from tests.unit.db_helpers import with_temp_db
+
+
+
+@with_temp_db
+def test_connection_reuse_and_pragmas():
+    """Test one connection per thread, with WAL and busy timeout set"""
+    print("\n1. Testing connection reuse and pragmas...")
+
+    with database.get_db_connection() as conn:
+        first = conn
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+        assert conn.execute("PRAGMA synchronous").fetchone()[0] == 1, "synchronous should be NORMAL"
+        assert conn.execute("PRAGMA busy_timeout").fetchone()[0] == int(database.BUSY_TIMEOUT_SECONDS * 1000)
+        assert conn.execute("PRAGMA foreign_keys").fetchone()[0] == 1
+    with database.get_db_connection() as conn:
+        assert conn is first, "Same thread should reuse its connection"
+
+    other = []
+
+    def worker():
+        with database.get_db_connection() as conn:
+            other.append(conn)
+
+    thread = threading.Thread(target=worker)
+    thread.start()
+    thread.join()
+    assert other[0] is not first, "Threads should not share connections"
+    print("   ✅ Connections pooled per thread")
+
+
+@with_temp_db
+def test_nested_transaction():
+    """Test nested blocks share one transaction committed by the outermost block"""
+    print("\n2. Testing nested transactions...")
+
+    try:
+        with database.get_db_connection():
+            database.create_user("Nested User", "nested@example.com", "password123")
+            raise RuntimeError("abort")
+    except RuntimeError:
+        pass
+    assert database.get_user_by_email("nested@example.com") is None, "Outer rollback should undo inner writes"
+
+    with database.get_db_connection():
+        database.create_user("Nested User", "nested@example.com", "password123")
+        try:
+            with database.get_db_connection():
+                database.create_user("Inner User", "inner@example.com", "password123")
+                raise RuntimeError("abort inner")
+        except RuntimeError:
+            pass
+    assert database.get_user_by_email("nested@example.com") is not None
+    assert database.get_user_by_email("inner@example.com") is None, \
+        "A caught inner failure should roll back only its own writes"
+    print("   ✅ Outermost block owns the transaction, inner blocks use savepoints")
+
+
+def test_db_name_switch():
+    """Test changing DB_NAME opens a connection to the new file"""
+    print("\n3. Testing DB_NAME switch...")
+
+    original_db = database.DB_NAME
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        try:
+            names = []
+            for name in ("a.db", "b.db"):
+                database.DB_NAME = str(Path(tmp_dir) / name)
+                with database.get_db_connection() as conn:
+                    names.append(conn.execute("PRAGMA database_list").fetchone()["file"])
+            assert names[0].endswith("a.db") and names[1].endswith("b.db")
+        finally:
+            database.close_db_connections()
+            database.DB_NAME = original_db
+    print("   ✅ DB_NAME switch handled")
+
+
+def main():
+    """Run all tests"""
+    print("="*80)
+    print("DATABASE CONNECTION POOL UNIT TESTS")
+    print("="*80)
+
+    try:
+        test_connection_reuse_and_pragmas()
+        test_nested_transaction()
+        test_db_name_switch()
+
+        print("\n" + "="*80)
+        print("✅ ALL TESTS PASSED")
+        print("="*80)
+        return True
+
+    except AssertionError as e:
+        print(f"\n❌ TEST FAILED: {e}")
+        return False
+
+
+if __name__ == "__main__":
+    success = main()
+    exit(0 if success else 1)
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the shared LLM JSON extractor
+Verify strategies, string-aware bracket matching and repair-on-demand
+"""
+import sys
+from pathlib import Path
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from src.agents.content_generator import clean_json_string as reexported_clean
+from src.core.json_extractor import (
+    JSONExtractionError, clean_json_string, extract_json, find_json_span,
+    get_extraction_stats, reset_extraction_stats
+)
+
+
+def test_strategies():
+    """Test direct, fenced, prose-wrapped and repaired responses"""
+    print("\n1. Testing extraction strategies...")
+
+    reset_extraction_stats()
+    assert extract_json('  [{"id": "python"}]\n', expect="array") == ([{"id": "python"}], "direct")
+
+    fenced = 'Here you go:\n```json\n{"content": "Use ```python``` blocks and a[0] {x}"}\n```\nDone.'
+    value, strategy = extract_json(fenced)
+    assert value == {"content": "Use ```python``` blocks and a[0] {x}"} and strategy == "scan"
+
+    value, strategy = extract_json('Sure! [note] The topics: ["a]", "b"] hope this helps', expect="array")
+    assert value == ["a]", "b"] and strategy == "scan", "Unparseable asides should be skipped"
+
+    value, strategy = extract_json('{"content": "Volatility \\sigma and cost \\$5\nnext line"}')
+    assert strategy == "direct+repair" and value["content"] == "Volatility \\sigma and cost \\$5 next line"
+
+    value, strategy = extract_json('{"a": 1} trailing prose {"b": 2}')
+    assert value == {"a": 1} and strategy == "scan", "Trailing text should fall back to the scanner"
+
+    stats = get_extraction_stats()
+    assert stats["direct"] == 1 and stats["scan"] == 3 and stats["direct+repair"] == 1, stats
+    assert reexported_clean is clean_json_string, "clean_json_string should stay importable from the agent"
+    print("   ✅ Strategies work")
+
+
+def test_scanner_and_failures():
+    """Test the scanner ignores brackets in strings and reports truncation"""
+    print("\n2. Testing scanner and failures...")
+
+    text = 'x {"q": "what is {a}?", "nested": [1, {"b": "]"}], "esc": "quote \\" }"} tail'
+    start, end = find_json_span(text)
+    assert text[start:end].endswith('"}') and text[end:] == " tail"
+
+    assert find_json_span('{"a": [1, 2}') is None, "Mismatched closer should not match"
+    assert find_json_span('{"a": "unterminated') is None
+
+    for bad, message in [("no json here", "no JSON object"),
+                         ('{"content": "cut off by max_tokens', "Unmatched"),
+                         ("{'single': 'quotes'}", "invalid JSON")]:
+        try:
+            extract_json(bad)
+            raise AssertionError(f"Should fail: {bad}")
+        except JSONExtractionError as e:
+            assert message in str(e), f"{message!r} not in {e}"
+            assert isinstance(e, ValueError), "Callers catch ValueError"
+
+    long_content = "## Section [1]\n" * 20000
+    value, _ = extract_json('Result:\n' + '{"content": ' + __import__("json").dumps(long_content) + '}')
+    assert value["content"] == long_content
+    print("   ✅ Scanner handles strings and truncation")
+
+
+def main():
+    """Run all tests"""
+    print("="*80)
+    print("JSON EXTRACTOR UNIT TESTS")
+    print("="*80)
+
+    try:
+        test_strategies()
+        test_scanner_and_failures()
+
+        print("\n" + "="*80)
+        print("✅ ALL TESTS PASSED")
+        print("="*80)
+        return True
+
+    except AssertionError as e:
+        print(f"\n❌ TEST FAILED: {e}")
+        return False
+
+
+if __name__ == "__main__":
+    success = main()
+    exit(0 if success else 1)
@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+"""
+Unit tests for llm_cache.py
+Verify key stability, hit/miss, TTL expiry, LRU eviction and call_llm integration
+"""
+import json
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from src.core import llm_cache
+from src.core import llm_engine
+from src.core import llm_clients
+
+
+def _use_temp_cache(**overrides):
+    """Point the cache at a fresh temp database with optional setting overrides"""
+    settings = {
+        "enabled": True,
+        "path": str(Path(tempfile.mkdtemp()) / "llm_cache.db"),
+        "ttl_hours": 168,
+        "max_entries": 100,
+        "max_bytes": 1024 * 1024
+    }
+    settings.update(overrides)
+    llm_cache._get_settings = lambda: settings
+    llm_cache.reset_cache_stats()
+    return settings
+
+
+def test_cache_key():
+    """Test that keys depend on every request parameter"""
+    print("\n1. Testing make_cache_key()...")
+
+    key = llm_cache.make_cache_key("prompt", "model", 0.3, 100)
+    assert key == llm_cache.make_cache_key("prompt", "model", 0.3, 100), "Key should be stable"
+    assert key != llm_cache.make_cache_key("prompt!", "model", 0.3, 100), "Prompt should change key"
+    assert key != llm_cache.make_cache_key("prompt", "other", 0.3, 100), "Model should change key"
+    assert key != llm_cache.make_cache_key("prompt", "model", 0.5, 100), "Temperature should change key"
+    assert key != llm_cache.make_cache_key("prompt", "model", 0.3, 200), "max_tokens should change key"
+    print("   ✅ Keys are content-addressed")
+
+
+def test_hit_and_miss():
+    """Test store/lookup and counters"""
+    print("\n2. Testing hit/miss...")
+    _use_temp_cache()
+
+    key = llm_cache.make_cache_key("hello", "model", 0.1, 50)
+    assert llm_cache.get_cached_response(key) is None, "Empty cache should miss"
+
+    llm_cache.store_response(key, "world", 42)
+    assert llm_cache.get_cached_response(key) == ("world", 42), "Stored response should hit"
+
+    stats = llm_cache.get_cache_stats()
+    assert stats["hits"] == 1 and stats["misses"] == 1, f"Unexpected counters: {stats}"
+    assert stats["bytes_written"] == 5 and stats["bytes_read"] == 5, f"Unexpected byte counters: {stats}"
+    assert stats["entries"] == 1, "Should have one entry"
+    print("   ✅ Hit/miss and counters work")
+
+
+def test_ttl_expiry():
+    """Test that expired entries are treated as misses"""
+    print("\n3. Testing TTL expiry...")
+    settings = _use_temp_cache()
+
+    key = llm_cache.make_cache_key("old", "model", 0.1, 50)
+    llm_cache.store_response(key, "stale", 1)
+
+    settings["ttl_hours"] = 1 / 3600 / 100  # 10 ms
+    time.sleep(0.05)
+    assert llm_cache.get_cached_response(key) is None, "Expired entry should miss"
+    assert llm_cache.get_cache_stats()["entries"] == 0, "Expired entry should be deleted"
+    print("   ✅ TTL expiry works")
+
+
+def test_lru_eviction():
+    """Test entry and byte bounds evict least-recently-used first"""
+    print("\n4. Testing LRU eviction...")
+    _use_temp_cache(max_entries=2)
+
+    keys = [llm_cache.make_cache_key(f"p{i}", "model", 0.1, 50) for i in range(3)]
+    llm_cache.store_response(keys[0], "a", 1)
+    time.sleep(0.01)
+    llm_cache.store_response(keys[1], "b", 1)
+    time.sleep(0.01)
+    llm_cache.get_cached_response(keys[0])  # Touch 0 → 1 is now LRU
+    time.sleep(0.01)
+    llm_cache.store_response(keys[2], "c", 1)
+
+    assert llm_cache.get_cached_response(keys[1]) is None, "LRU entry should be evicted"
+    assert llm_cache.get_cached_response(keys[0]) is not None, "Recently used entry should survive"
+    assert llm_cache.get_cached_response(keys[2]) is not None, "Newest entry should survive"
+
+    _use_temp_cache(max_bytes=10)
+    big_keys = [llm_cache.make_cache_key(f"b{i}", "model", 0.1, 50) for i in range(3)]
+    for key in big_keys:
+        llm_cache.store_response(key, "x" * 4, 1)
+        time.sleep(0.01)
+    assert llm_cache.get_cache_stats()["total_bytes"] <= 10, "Byte bound should hold"
+    assert llm_cache.get_cached_response(big_keys[0]) is None, "Oldest entry should be evicted for bytes"
+    print("   ✅ LRU eviction works")
+
+
+def test_call_llm_uses_cache():
+    """Test call_llm skips the provider on a repeated request"""
+    print("\n5. Testing call_llm integration...")
+    _use_temp_cache()
+
+    calls = []
+
+    def fake_groq(prompt, model, temperature, max_tokens, api_key, json_schema=None, timeout=None):
+        calls.append(prompt)
+        return f"answer to {prompt}", 17
+
+    original_groq = llm_engine._call_groq
+    original_settings = llm_clients.get_provider_settings
+    llm_engine._call_groq = fake_groq
+    llm_clients.get_provider_settings = lambda: {"provider": "groq", "api_key": "test-key", "ollama_host": None}
+    try:
+        first = llm_engine.call_llm("question", temperature=0.2, max_tokens=10)
+        second = llm_engine.call_llm("question", temperature=0.2, max_tokens=10)
+        uncached = llm_engine.call_llm("question", temperature=0.2, max_tokens=10, use_cache=False)
+    finally:
+        llm_engine._call_groq = original_groq
+        llm_clients.get_provider_settings = original_settings
+
+    assert first == ("answer to question", 17), f"Unexpected first response: {first}"
+    assert second == ("answer to question", 0), "Cache hit should report 0 tokens used"
+    assert uncached == ("answer to question", 17), "use_cache=False should call provider"
+    assert len(calls) == 2, f"Provider should be called twice, got {len(calls)}"
+    print("   ✅ call_llm serves repeats from cache")
+
+
+def test_rejected_responses_not_cached():
+    """Test call_llm_checked caches only accepted responses and drops rejected hits"""
+    print("\n6. Testing validation before caching...")
+    _use_temp_cache()
+
+    calls = []
+
+    def fake_groq(prompt, model, temperature, max_tokens, api_key, json_schema=None, timeout=None):
+        calls.append(prompt)
+        # First answer to each prompt is malformed, later ones are valid JSON
+        return ("not json" if calls.count(prompt) == 1 else '{"ok": true}'), 17
+
+    original_groq = llm_engine._call_groq
+    original_settings = llm_clients.get_provider_settings
+    llm_engine._call_groq = fake_groq
+    llm_clients.get_provider_settings = lambda: {"provider": "groq", "api_key": "test-key", "ollama_host": None}
+    try:
+        try:
+            llm_engine.call_llm_checked("checked", json.loads, max_tokens=10)
+            raise AssertionError("Rejected response should raise")
+        except ValueError:
+            pass
+        assert llm_engine.call_llm_checked("checked", json.loads, max_tokens=10) == ({"ok": True}, 17), \
+            "Retry should reach the provider, not a cached rejected response"
+        assert llm_engine.call_llm_checked("checked", json.loads, max_tokens=10) == ({"ok": True}, 0)
+
+        # A bad answer cached by plain call_llm is deleted once a checked caller rejects it
+        llm_engine.call_llm("unchecked", max_tokens=10)
+        try:
+            llm_engine.call_llm_checked("unchecked", json.loads, max_tokens=10)
+            raise AssertionError("Rejected cache hit should raise")
+        except ValueError:
+            pass
+        assert llm_engine.call_llm_checked("unchecked", json.loads, max_tokens=10) == ({"ok": True}, 17)
+
+        llm_engine.call_llm("streamed", max_tokens=10)
+        llm_engine.discard_cached_response("streamed", max_tokens=10)
+        llm_engine.call_llm("streamed", max_tokens=10)
+    finally:
+        llm_engine._call_groq = original_groq
+        llm_clients.get_provider_settings = original_settings
+
+    assert calls == ["checked"] * 2 + ["unchecked"] * 2 + ["streamed"] * 2, f"Unexpected provider calls: {calls}"
+    print("   ✅ Only validated responses are cached")
+
+
+def main():
+    """Run all tests"""
+    print("="*80)
+    print("LLM RESPONSE CACHE UNIT TESTS")
+    print("="*80)
+
+    try:
+        test_cache_key()
+        test_hit_and_miss()
+        test_ttl_expiry()
+        test_lru_eviction()
+        test_call_llm_uses_cache()
+        test_rejected_responses_not_cached()
+
+        print("\n" + "="*80)
+        print("✅ ALL TESTS PASSED")
+        print("="*80)
+        return True
+
+    except AssertionError as e:
+        print(f"\n❌ TEST FAILED: {e}")
+        return False
+
+
+if __name__ == "__main__":
+    success = main()
+    exit(0 if success else 1)
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Unit tests for llm_clients.py
+Verify clients are shared per credential and settings are re-read only on change
+"""
+import os
+import sys
+from pathlib import Path
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from src.core import llm_clients
+
+
+def test_groq_client_reuse():
+    """Test one pooled client per credential, replaced when the key rotates"""
+    print("\n1. Testing get_groq_client() reuse...")
+    llm_clients.close_clients()
+
+    first = llm_clients.get_groq_client("gsk_test_one")
+    again = llm_clients.get_groq_client("gsk_test_one")
+    assert first is again, "Same credential should reuse client"
+
+    rotated = llm_clients.get_groq_client("gsk_test_two")
+    assert rotated is not first, "New credential should get its own client"
+    assert len(llm_clients._clients) == 1, "Stale credential client should be dropped"
+
+    llm_clients.close_clients()
+    print("   ✅ Groq client shared per credential")
+
+
+def test_settings_reread_on_change():
+    """Test provider settings follow env changes without re-reading otherwise"""
+    print("\n2. Testing get_provider_settings() change detection...")
+    llm_clients.close_clients()
+
+    reads = []
+    original_read = llm_clients._read_provider_settings
+
+    def counting_read():
+        reads.append(1)
+        return original_read()
+
+    llm_clients._read_provider_settings = counting_read
+    old_key = os.environ.get("GROQ_API_KEY")
+    try:
+        os.environ["GROQ_API_KEY"] = "gsk_before"
+        llm_clients.get_provider_settings()
+        llm_clients.get_provider_settings()
+        assert len(reads) == 1, f"Unchanged settings should be read once, got {len(reads)}"
+
+        os.environ["GROQ_API_KEY"] = "gsk_after"
+        llm_clients.get_provider_settings()
+        assert len(reads) == 2, "Changed env should trigger a re-read"
+    finally:
+        llm_clients._read_provider_settings = original_read
+        if old_key is None:
+            os.environ.pop("GROQ_API_KEY", None)
+        else:
+            os.environ["GROQ_API_KEY"] = old_key
+        llm_clients.close_clients()
+
+    print("   ✅ Settings re-read only on change")
+
+
+def main():
+    """Run all tests"""
+    print("="*80)
+    print("LLM CLIENT REGISTRY UNIT TESTS")
+    print("="*80)
+
+    try:
+        test_groq_client_reuse()
+        test_settings_reread_on_change()
+
+        print("\n" + "="*80)
+        print("✅ ALL TESTS PASSED")
+        print("="*80)
+        return True
+
+    except AssertionError as e:
+        print(f"\n❌ TEST FAILED: {e}")
+        return False
+
+
+if __name__ == "__main__":
+    success = main()
+    exit(0 if success else 1)
@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+Unit tests for llm_metrics.py
+Verify call records, context attribution, aggregates and the Prometheus dump
+"""
+import asyncio
+import sys
+import tempfile
+from pathlib import Path
+from types import SimpleNamespace
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from src.core import llm_cache
+from src.core import llm_clients
+from src.core import llm_engine
+from src.core import llm_metrics
+from src.core import quota
+
+
+class _FakeGroq:
+    """Groq client stand-in returning exact usage (or raising)"""
+
+    def __init__(self, error=None):
+        self.error = error
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+    def _create(self, **kwargs):
+        if self.error:
+            raise self.error
+        if kwargs.get("stream"):
+            return iter([
+                SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content="Hel"))], usage=None),
+                SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content="lo"))], usage=None),
+                SimpleNamespace(choices=[], usage=SimpleNamespace(total_tokens=9))
+            ])
+        return SimpleNamespace(
+            usage=SimpleNamespace(total_tokens=30, prompt_tokens=20, completion_tokens=10),
+            choices=[SimpleNamespace(message=SimpleNamespace(content="answer"))]
+        )
+
+
+def _with_fake_groq(test):
+    """Route call_llm to a fake Groq client with a fresh response cache and metrics"""
+    def wrapper():
+        client = _FakeGroq()
+        original_settings = llm_clients.get_provider_settings
+        original_groq = llm_clients.get_groq_client
+        original_cache_settings = llm_cache._get_settings
+        llm_clients.get_provider_settings = lambda: {"provider": "groq", "api_key": "test-key", "ollama_host": None}
+        llm_clients.get_groq_client = lambda api_key=None: client
+        cache_settings = {
+            "enabled": True,
+            "path": str(Path(tempfile.mkdtemp()) / "llm_cache.db"),
+            "ttl_hours": 1,
+            "max_entries": 100,
+            "max_bytes": 1024 * 1024
+        }
+        llm_cache._get_settings = lambda: cache_settings
+        original_service = quota._service
+        quota._service = quota.QuotaService({"enabled": False})
+        llm_metrics.reset_metrics()
+        try:
+            test(client)
+        finally:
+            llm_clients.get_provider_settings = original_settings
+            llm_clients.get_groq_client = original_groq
+            llm_cache._get_settings = original_cache_settings
+            quota._service = original_service
+            llm_metrics.reset_metrics()
+    wrapper.__name__ = test.__name__
+    wrapper.__doc__ = test.__doc__
+    return wrapper
+
+
+@_with_fake_groq
+def test_call_records(client):
+    """Test provider calls, cache hits and errors are recorded with their context"""
+    print("\n1. Testing call records...")
+
+    with llm_metrics.call_context(user_id=7):
+        with llm_metrics.call_context(agent="agent1_job_parser"):
+            llm_engine.call_llm("metrics prompt one")
+            llm_engine.call_llm("metrics prompt one")
+        llm_engine.call_llm("metrics prompt two", use_cache=False)
+
+    client.error = ConnectionError("down")
+    try:
+        llm_engine.call_llm("metrics prompt three", use_cache=False)
+        raise AssertionError("Provider error should propagate")
+    except ConnectionError:
+        pass
+
+    calls = llm_metrics.get_recent_calls()
+    assert [c["agent"] for c in calls] == ["agent1_job_parser", "agent1_job_parser", "unknown", "unknown"]
+    assert [c["user_id"] for c in calls] == [7, 7, 7, None], "Context should reset after the block"
+    assert (calls[0]["prompt_tokens"], calls[0]["completion_tokens"]) == (20, 10), "Exact usage should be kept"
+    assert calls[1]["cache_hit"] and calls[1]["prompt_tokens"] == 0
+    assert calls[3]["error"] == "ConnectionError"
+    assert all(c["latency_ms"] is not None for c in calls)
+    print("   ✅ Calls recorded")
+
+
+@_with_fake_groq
+def test_stream_and_async(client):
+    """Test streams record TTFT and async calls keep their context"""
+    print("\n2. Testing stream and async calls...")
+
+    with llm_metrics.call_context(agent="agent3_content_generator", task="content_generation", user_id=3):
+        text = "".join(llm_engine.stream_llm("metrics stream prompt", use_cache=False))
+    assert text == "Hello"
+
+    async def fan_out():
+        with llm_metrics.call_context(agent="agent2_topic_assessor", user_id=4):
+            return await asyncio.gather(*[
+                llm_engine.acall_llm(f"metrics async {i}", use_cache=False) for i in range(2)
+            ])
+    asyncio.run(fan_out())
+
+    stream_call, *async_calls = llm_metrics.get_recent_calls()
+    assert stream_call["ttft_ms"] is not None and stream_call["task"] == "content_generation"
+    assert stream_call["prompt_tokens"] + stream_call["completion_tokens"] == 9
+    assert [c["agent"] for c in async_calls] == ["agent2_topic_assessor"] * 2
+    assert all(c["completion_tokens"] == 10 for c in async_calls), "Usage should reach async calls"
+    print("   ✅ Stream and async calls recorded")
+
+
+@_with_fake_groq
+def test_aggregates_and_prometheus(client):
+    """Test per-user/per-agent aggregates and the text dump"""
+    print("\n3. Testing aggregates and Prometheus dump...")
+
+    with llm_metrics.call_context(agent="agent1_job_parser", user_id=1):
+        llm_engine.call_llm("metrics aggregate")
+        llm_engine.call_llm("metrics aggregate")
+    with llm_metrics.call_context(agent="agent2_topic_assessor", user_id=2):
+        llm_engine.call_llm("metrics other", use_cache=False)
+
+    by_agent = llm_metrics.get_aggregates("agent")
+    parser = by_agent["agent1_job_parser"]
+    assert parser["calls"] == 2 and parser["cache_hits"] == 1 and parser["cache_hit_rate"] == 0.5
+    assert parser["total_tokens"] == 30 and parser["latency_p95_ms"] is not None
+    assert llm_metrics.get_aggregates("user_id")[2]["completion_tokens"] == 10
+    assert llm_metrics.latency_percentile(95, provider="groq") is not None
+
+    dump = llm_metrics.render_prometheus()
+    labels = 'agent="agent1_job_parser",provider="groq",model="llama-3.3-70b-versatile"'
+    assert f"learnflow_llm_calls_total{{{labels}}} 2" in dump
+    assert f"learnflow_llm_cache_hits_total{{{labels}}} 1" in dump
+    assert f'learnflow_llm_tokens_total{{{labels},kind="prompt"}} 20' in dump
+    assert f'learnflow_llm_latency_seconds_bucket{{{labels},le="+Inf"}} 2' in dump
+    print("   ✅ Aggregates and dump work")
+
+
+def main():
+    """Run all tests"""
+    print("="*80)
+    print("LLM METRICS UNIT TESTS")
+    print("="*80)
+
+    try:
+        test_call_records()
+        test_stream_and_async()
+        test_aggregates_and_prometheus()
+
+        print("\n" + "="*80)
+        print("✅ ALL TESTS PASSED")
+        print("="*80)
+        return True
+
+    except AssertionError as e:
+        print(f"\n❌ TEST FAILED: {e}")
+        return False
+
+
+if __name__ == "__main__":
+    success = main()
+    exit(0 if success else 1)
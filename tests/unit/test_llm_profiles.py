@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""
+Unit tests for llm_profiles.py
+Verify per-agent profiles from the YAMLs, that call_llm enforces them and the
+small-model quality gate
+"""
+import json
+import sys
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from src.agents import content_generator
+from src.core import llm_cache
+from src.core import llm_clients
+from src.core import llm_engine
+from src.core import llm_metrics
+from src.core import llm_profiles
+from src.core import llm_router
+from src.core import quota
+from src.core import rate_limiter
+from src.core.llm_router import ProviderRouter
+
+SMALL_MODEL = "llama-3.1-8b-instant"
+
+
+def test_profiles_from_yaml():
+    """Test profiles come from the agent llm_config (per task for agent3)"""
+    print("\n1. Testing profile resolution...")
+
+    parser = llm_profiles.get_call_profile("agent1_job_parser")
+    assert parser == {"task_class": "large", "model": llm_profiles.GROQ_MODEL, "fallback_model": SMALL_MODEL,
+                      "timeout_seconds": 30, "max_retries": 1}, f"Unexpected profile: {parser}"
+
+    reframing = llm_profiles.get_call_profile("agent3_content_generator", "module_reframing")
+    assert reframing["model"] == SMALL_MODEL and reframing["fallback_model"] == llm_profiles.GROQ_MODEL
+    assert reframing["timeout_seconds"] == 10 and reframing["max_retries"] == 0
+    content = llm_profiles.get_call_profile("agent3_content_generator", "content_generation")
+    assert content["task_class"] == "large" and content["timeout_seconds"] == 120
+    assert llm_profiles.get_call_profile("agent3_content_generator", "module_naming")["model"] == SMALL_MODEL
+
+    with llm_profiles.escalate():
+        escalated = llm_profiles.get_call_profile("agent3_content_generator", "module_reframing")
+        assert escalated["model"] == llm_profiles.GROQ_MODEL and escalated["timeout_seconds"] == 10
+        assert llm_profiles.get_call_profile("agent1_job_parser") == parser, "Large profiles don't change"
+
+    default = llm_profiles.get_call_profile(None)
+    assert default["model"] == llm_profiles.GROQ_MODEL and default["fallback_model"] is None
+    assert default["timeout_seconds"] == 60, "Calls outside an agent should still time out"
+    assert llm_profiles.get_call_profile("no_such_agent") == default
+
+    assert llm_profiles.provider_model("groq", SMALL_MODEL) == SMALL_MODEL
+    assert llm_profiles.provider_model("ollama", llm_profiles.GROQ_MODEL) == llm_profiles.OLLAMA_MODEL
+    print("   ✅ Profiles resolved")
+
+
+def _with_fake_groq(fake_groq, test):
+    """Run test() with call_llm on a fake Groq, no response cache and no fallback providers"""
+    original_limiters = rate_limiter._limiters
+    original_groq = llm_engine._call_groq
+    original_settings = llm_clients.get_provider_settings
+    original_cache_settings = llm_cache._get_settings
+    original_router = llm_router._router
+    original_service = quota._service
+    rate_limiter._limiters = {}  # Don't spend the shared limiter's budget
+    llm_engine._call_groq = fake_groq
+    llm_clients.get_provider_settings = lambda: {"provider": "groq", "api_key": "test-key", "ollama_host": None}
+    llm_cache._get_settings = lambda: {"enabled": False}
+    llm_router._router = ProviderRouter({"fallback_providers": [], "hedging_enabled": False}, sleep=lambda _: None)
+    quota._service = quota.QuotaService({"enabled": False})
+    try:
+        test()
+    finally:
+        rate_limiter._limiters = original_limiters
+        llm_engine._call_groq = original_groq
+        llm_clients.get_provider_settings = original_settings
+        llm_cache._get_settings = original_cache_settings
+        llm_router._router = original_router
+        quota._service = original_service
+
+
+def test_engine_uses_profile():
+    """Test call_llm sends the profile model and timeout, then the fallback model"""
+    print("\n2. Testing profile enforcement in call_llm...")
+
+    requests = []
+
+    def fake_groq(prompt, model, temperature, max_tokens, api_key, json_schema=None, timeout=None):
+        requests.append((model, timeout))
+        if model == SMALL_MODEL and prompt == "overloaded":
+            raise ConnectionError("8B down")
+        return f"{model} answer", 10
+
+    def run():
+        with llm_metrics.call_context(agent="agent3_content_generator", task="module_reframing"):
+            assert llm_engine.call_llm("reframe", use_cache=False)[0] == f"{SMALL_MODEL} answer"
+            assert llm_engine.call_llm("overloaded", use_cache=False)[0] == f"{llm_profiles.GROQ_MODEL} answer"
+        with llm_metrics.call_context(agent="agent1_job_parser"):
+            llm_engine.call_llm("parse", use_cache=False)
+
+    _with_fake_groq(fake_groq, run)
+    assert requests == [
+        (SMALL_MODEL, 10),
+        (SMALL_MODEL, 10), (llm_profiles.GROQ_MODEL, 10),  # max_retries 0: straight to the fallback model
+        (llm_profiles.GROQ_MODEL, 30)
+    ], f"Unexpected requests: {requests}"
+    print("   ✅ Model, timeout and fallback model enforced")
+
+
+def test_quality_gate():
+    """Test rejected small-model output is regenerated on the large model"""
+    print("\n3. Testing small-model quality gate...")
+
+    names = {str(i): f"Module Name {i}" for i in range(1, 9)}
+    requests = []
+
+    def fake_groq(prompt, model, temperature, max_tokens, api_key, json_schema=None, timeout=None):
+        requests.append(model)
+        if model == SMALL_MODEL:
+            # 8B: names JSON missing modules, reframed name too long
+            return (json.dumps({"1": "Only One"}) if json_schema else "A " * 20), 10
+        return (json.dumps(names) if json_schema else "Market Data Analysis"), 20
+
+    def run():
+        assert content_generator.generate_module_names("gate_topic") == {i: f"Module Name {i}" for i in range(1, 9)}
+        context = {"depth_score": 0.8, "mastery": 70, "current_job_title": "Analyst",
+                   "target_job_title": "Quant Trader", "target_company": "Citadel"}
+        assert content_generator.reframe_module_for_user("Data Analysis", context) == "Market Data Analysis"
+        with llm_metrics.call_context(agent="agent1_job_parser"):
+            try:
+                llm_engine.call_llm_checked("large task", json.loads, use_cache=False)
+                raise AssertionError("Large-class validation errors should propagate")
+            except ValueError:
+                pass
+
+    _with_fake_groq(fake_groq, run)
+    assert requests == [SMALL_MODEL, llm_profiles.GROQ_MODEL] * 2 + [llm_profiles.GROQ_MODEL], \
+        f"Unexpected requests: {requests}"
+    print("   ✅ Quality gate escalates to the large model")
+
+
+def test_ollama_deadline():
+    """Test a hung Ollama request releases the caller after the timeout"""
+    print("\n4. Testing Ollama timeout...")
+
+    def hung_chat(**kwargs):
+        time.sleep(1)
+        return {"message": {"content": "late"}}
+
+    original_client = llm_clients.get_ollama_client
+    llm_clients.get_ollama_client = lambda host=None: SimpleNamespace(chat=hung_chat)
+    started = time.perf_counter()
+    try:
+        llm_engine._call_ollama("prompt", llm_profiles.OLLAMA_MODEL, 0.1, 10, timeout=0.1)
+        raise AssertionError("Hung request should time out")
+    except TimeoutError:
+        pass
+    finally:
+        llm_clients.get_ollama_client = original_client
+    assert time.perf_counter() - started < 0.5
+    print("   ✅ Ollama requests time out")
+
+
+def main():
+    """Run all tests"""
+    print("="*80)
+    print("LLM CALL PROFILE UNIT TESTS")
+    print("="*80)
+
+    try:
+        test_profiles_from_yaml()
+        test_engine_uses_profile()
+        test_quality_gate()
+        test_ollama_deadline()
+
+        print("\n" + "="*80)
+        print("✅ ALL TESTS PASSED")
+        print("="*80)
+        return True
+
+    except AssertionError as e:
+        print(f"\n❌ TEST FAILED: {e}")
+        return False
+
+
+if __name__ == "__main__":
+    success = main()
+    exit(0 if success else 1)
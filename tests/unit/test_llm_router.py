@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+"""
+Unit tests for llm_router.py
+Verify retries, failover, circuit breakers, hedging and the engine wiring
+"""
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from src.core import llm_cache
+from src.core import llm_clients
+from src.core import llm_engine
+from src.core import llm_metrics
+from src.core import llm_router
+from src.core import quota
+from src.core import rate_limiter
+from src.core.llm_router import CircuitBreaker, ProviderRouter
+
+
+class _HTTPError(Exception):
+    def __init__(self, status_code):
+        self.status_code = status_code
+        super().__init__(f"HTTP {status_code}")
+
+
+GROQ = ("groq", "llama-3.3-70b-versatile")
+OLLAMA = ("ollama", "llama3.1:8b")
+
+
+def _router(**settings):
+    """Router with no real sleeping (backoff delays are collected instead)"""
+    delays = []
+    defaults = {"max_retries": 1, "failure_threshold": 5, "reset_timeout_seconds": 30, "hedging_enabled": False}
+    router = ProviderRouter({**defaults, **settings}, sleep=delays.append)
+    return router, delays
+
+
+def test_retries_and_failover():
+    """Test transient errors are retried, then the next provider is used"""
+    print("\n1. Testing retries and failover...")
+
+    calls = []
+
+    def attempt(route):
+        calls.append(route)
+        if route == GROQ:
+            raise ConnectionError("groq down")
+        return "local answer"
+
+    router, delays = _router(max_retries=2)
+    assert router.route([GROQ, OLLAMA], attempt) == ("local answer", OLLAMA)
+    assert calls == [GROQ, GROQ, GROQ, OLLAMA], f"Unexpected attempts: {calls}"
+    assert len(delays) == 2 and delays[0] <= delays[1] * 2, "Backoff should grow between retries"
+
+    assert llm_router.is_retryable(_HTTPError(429)) and llm_router.is_retryable(_HTTPError(503))
+    assert not llm_router.is_retryable(_HTTPError(401)) and not llm_router.is_retryable(ValueError("no key"))
+
+    calls.clear()
+    router, delays = _router(max_retries=2)
+
+    def bad_request(route):
+        calls.append(route)
+        raise _HTTPError(400)
+
+    try:
+        router.route([GROQ, OLLAMA], bad_request)
+        raise AssertionError("All providers failing should raise")
+    except _HTTPError:
+        pass
+    assert calls == [GROQ, OLLAMA] and not delays, "Permanent errors should not be retried"
+    assert router.breaker(GROQ)._failures == 0, "Permanent errors should not count against the breaker"
+    print("   ✅ Retries and failover work")
+
+
+def test_circuit_breaker():
+    """Test a failing provider is skipped until its reset timeout"""
+    print("\n2. Testing circuit breaker...")
+
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=0.05)
+    breaker.record_failure()
+    assert breaker.state == "closed"
+    breaker.record_failure()
+    assert breaker.state == "open" and not breaker.allow()
+    time.sleep(0.06)
+    assert breaker.state == "half_open" and breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == "open", "A half-open failure should reopen immediately"
+    time.sleep(0.06)
+    breaker.record_success()
+    assert breaker.state == "closed"
+
+    calls = []
+
+    def attempt(route):
+        calls.append(route)
+        if route == GROQ:
+            raise ConnectionError("groq down")
+        return "local answer"
+
+    router, _ = _router(max_retries=0, failure_threshold=2)
+    for _ in range(3):
+        router.route([GROQ, OLLAMA], attempt)
+    assert calls == [GROQ, OLLAMA, GROQ, OLLAMA, OLLAMA], f"Open breaker should skip groq: {calls}"
+
+    router.breaker(OLLAMA).record_failure()
+    router.breaker(OLLAMA).record_failure()
+    calls.clear()
+    assert router.route([GROQ, OLLAMA], attempt) == ("local answer", OLLAMA)
+    assert calls == [GROQ, OLLAMA], "With every breaker open the providers are still tried in order"
+    print("   ✅ Circuit breaker works")
+
+
+def test_hedging():
+    """Test a slow primary is hedged and the faster answer wins"""
+    print("\n3. Testing hedged requests...")
+
+    def attempt(route):
+        if route == GROQ:
+            time.sleep(0.5)
+            return "slow answer"
+        return "fast answer"
+
+    router, _ = _router(
+        hedging_enabled=True, hedge_min_delay_seconds=0.01,
+        hedge_max_delay_seconds=0.05, hedge_default_delay_seconds=0.05
+    )
+    started = time.perf_counter()
+    assert router.route([GROQ, OLLAMA], attempt) == ("fast answer", OLLAMA)
+    assert time.perf_counter() - started < 0.4, "Hedge should not wait for the slow primary"
+
+    def quick(route):
+        return f"{route[0]} answer"
+
+    assert router.route([GROQ, OLLAMA], quick) == ("groq answer", GROQ), "Fast primary needs no hedge"
+
+    def primary_fails(route):
+        if route == GROQ:
+            raise ConnectionError("groq down")
+        return "fallback answer"
+
+    assert router.route([GROQ, OLLAMA], primary_fails) == ("fallback answer", OLLAMA)
+    print("   ✅ Hedging works")
+
+
+def test_hedged_tokens_metered():
+    """Test the losing request of a hedge is charged to the user's quota"""
+    print("\n4. Testing hedged request accounting...")
+
+    def slow_groq(prompt, model, temperature, max_tokens, api_key, json_schema=None, timeout=None):
+        time.sleep(0.3)
+        return "slow answer", 30
+
+    def fast_ollama(prompt, model, temperature, max_tokens, host=None, json_schema=None, timeout=None):
+        return "fast answer", 12
+
+    originals = (llm_engine._call_groq, llm_engine._call_ollama, llm_clients.get_provider_settings,
+                 llm_cache._get_settings, llm_router._router, quota._service, rate_limiter._limiters)
+    llm_engine._call_groq = slow_groq
+    llm_engine._call_ollama = fast_ollama
+    llm_clients.get_provider_settings = lambda: {"provider": "groq", "api_key": "test-key", "ollama_host": None}
+    llm_cache._get_settings = lambda: {"enabled": False}
+    llm_router._router = _router(
+        max_retries=0, fallback_providers=["groq", "ollama"], hedging_enabled=True,
+        hedge_min_delay_seconds=0.01, hedge_max_delay_seconds=0.05, hedge_default_delay_seconds=0.05
+    )[0]
+    service = quota._service = quota.QuotaService({
+        "enabled": True, "daily_tokens": 10000, "monthly_tokens": None, "flush_interval_seconds": 3600
+    })
+    service._persisted[1] = {"day": quota._today(), "daily": 0, "monthly": 0}
+    rate_limiter._limiters = {}  # Don't spend the shared limiter's budget
+    try:
+        with llm_metrics.call_context(user_id=1):
+            assert llm_engine.call_llm("hedged prompt") == ("fast answer", 12)
+        assert service.get_usage(1)["daily"] == 12
+        time.sleep(0.5)  # Let the slow primary finish in the background
+        assert service.get_usage(1)["daily"] == 42, "The hedged loser's tokens should be metered too"
+    finally:
+        (llm_engine._call_groq, llm_engine._call_ollama, llm_clients.get_provider_settings,
+         llm_cache._get_settings, llm_router._router, quota._service, rate_limiter._limiters) = originals
+    print("   ✅ Both hedged requests are metered")
+
+
+def test_engine_failover():
+    """Test call_llm and stream_llm fail over to the fallback provider"""
+    print("\n5. Testing engine failover...")
+
+    def failing_groq(prompt, model, temperature, max_tokens, api_key, json_schema=None, timeout=None):
+        raise ConnectionError("groq down")
+
+    def fake_ollama(prompt, model, temperature, max_tokens, host=None, json_schema=None, timeout=None):
+        return f"local: {prompt}", 12
+
+    def failing_stream(prompt, model, temperature, max_tokens, api_key, timeout=None):
+        raise ConnectionError("groq down")
+        yield  # pragma: no cover - makes this a generator
+
+    def fake_ollama_stream(prompt, model, temperature, max_tokens, host=None):
+        yield "local "
+        yield "stream"
+        return 7
+
+    originals = (llm_engine._call_groq, llm_engine._call_ollama, llm_engine._stream_groq,
+                 llm_engine._stream_ollama, llm_clients.get_provider_settings, llm_cache._get_settings,
+                 llm_router._router, quota._service, rate_limiter._limiters)
+    cache_settings = {
+        "enabled": True, "path": str(Path(tempfile.mkdtemp()) / "llm_cache.db"),
+        "ttl_hours": 1, "max_entries": 100, "max_bytes": 1024 * 1024
+    }
+    llm_engine._call_groq = failing_groq
+    llm_engine._call_ollama = fake_ollama
+    llm_engine._stream_groq = failing_stream
+    llm_engine._stream_ollama = fake_ollama_stream
+    llm_clients.get_provider_settings = lambda: {"provider": "groq", "api_key": "test-key", "ollama_host": None}
+    llm_cache._get_settings = lambda: cache_settings
+    llm_router._router = _router(max_retries=0, fallback_providers=["groq", "ollama"])[0]
+    quota._service = quota.QuotaService({"enabled": False})
+    rate_limiter._limiters = {}  # Don't spend the shared limiter's budget
+    llm_metrics.reset_metrics()
+    try:
+        assert llm_engine.call_llm("router prompt") == ("local: router prompt", 12)
+        assert llm_engine.call_llm("router prompt") == ("local: router prompt", 12), \
+            "Fallback answers should not be cached under the primary model"
+        assert "".join(llm_engine.stream_llm("router stream")) == "local stream"
+
+        calls = llm_metrics.get_recent_calls()
+        assert [c["provider"] for c in calls] == ["ollama"] * 3
+        assert all(c["model"] == llm_engine.OLLAMA_MODEL and not c["cache_hit"] for c in calls)
+    finally:
+        (llm_engine._call_groq, llm_engine._call_ollama, llm_engine._stream_groq,
+         llm_engine._stream_ollama, llm_clients.get_provider_settings, llm_cache._get_settings,
+         llm_router._router, quota._service, rate_limiter._limiters) = originals
+        llm_metrics.reset_metrics()
+    print("   ✅ Engine fails over")
+
+
+def main():
+    """Run all tests"""
+    print("="*80)
+    print("LLM ROUTER UNIT TESTS")
+    print("="*80)
+
+    try:
+        test_retries_and_failover()
+        test_circuit_breaker()
+        test_hedging()
+        test_hedged_tokens_metered()
+        test_engine_failover()
+
+        print("\n" + "="*80)
+        print("✅ ALL TESTS PASSED")
+        print("="*80)
+        return True
+
+    except AssertionError as e:
+        print(f"\n❌ TEST FAILED: {e}")
+        return False
+
+
+if __name__ == "__main__":
+    success = main()
+    exit(0 if success else 1)
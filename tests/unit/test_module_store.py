@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the persistent module store
+Verify generated modules/names survive a process restart, are versioned and
+are deleted with their user
+"""
+import sqlite3
+import sys
+from pathlib import Path
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from src.core import database, module_store
+from tests.unit.db_helpers import with_temp_db
+
+
+
+@with_temp_db
+def test_module_content_persists():
+    """Test content is read back from the database after memory is dropped"""
+    print("\n1. Testing module content persistence...")
+
+    content = {"module_name": "Delta Hedging", "content": "## 1. Delta", "questions": []}
+    module_store.save_module_content("p1", "greeks", 2, content, prompt_hash="abc")
+    module_store.clear_module_store()  # Simulates app restart / new replica
+
+    assert module_store.get_module_content("p1", "greeks", 2) == content
+    assert module_store.get_module_content("p1", "greeks", 3) is None
+    assert module_store.get_module_content("p2", "greeks", 2) is None, "Content is per path"
+    print("   ✅ Module content persists")
+
+
+@with_temp_db
+def test_versions_and_prompt_hash():
+    """Test regeneration stores a new version and readers get the latest"""
+    print("\n2. Testing versions...")
+
+    assert database.save_generated_module("p1", "greeks", 1, {"content": "v1"}, "h1") == 1
+    assert database.save_generated_module("p1", "greeks", 1, {"content": "v2"}, "h2") == 2
+    assert module_store.get_module_content("p1", "greeks", 1) == {"content": "v2"}
+
+    conn = sqlite3.connect(database.DB_NAME)
+    hashes = [row[0] for row in conn.execute(
+        "SELECT prompt_hash FROM generated_modules ORDER BY version")]
+    conn.close()
+    assert hashes == ["h1", "h2"], f"Prompt hashes should be stored per version, got {hashes}"
+    print("   ✅ Versions and prompt hashes stored")
+
+
+@with_temp_db
+def test_module_names_persist():
+    """Test module names round-trip with int module ids"""
+    print("\n3. Testing module names persistence...")
+
+    names = {i: f"Module name {i}" for i in range(1, 9)}
+    module_store.save_module_names("p1", "greeks", names)
+    module_store.clear_module_store()
+
+    assert module_store.get_module_names("p1", "greeks") == names
+    assert module_store.get_module_names("p1", "vega") is None
+    assert module_store.make_prompt_hash("a", 1) == module_store.make_prompt_hash("a", 1)
+    assert module_store.make_prompt_hash("a", 1) != module_store.make_prompt_hash("a", 2)
+    print("   ✅ Module names persist")
+
+
+@with_temp_db
+def test_deleted_with_user():
+    """Test deleting a user removes their paths' generated content and cached reads"""
+    print("\n4. Testing cleanup on user deletion...")
+
+    user_id = database.create_user("Test User", "store@example.com", "password123")
+    path_id = database.create_path(
+        user_id=user_id, current_job_title="Analyst", current_description="SQL",
+        current_seniority="Junior", target_job_title="Quant", target_description="Models",
+        target_seniority="Intermediate", target_company="", target_industry="", topics=[]
+    )
+    module_store.save_module_content(path_id, "greeks", 1, {"content": "delta"})
+    module_store.save_module_names(path_id, "greeks", {i: f"Module name {i}" for i in range(1, 9)})
+    module_store.save_module_content("p1", "greeks", 1, {"content": "other path"})
+    assert module_store.get_module_content(path_id, "greeks", 1) == {"content": "delta"}  # now cached
+    assert module_store.get_module_names(path_id, "greeks") is not None
+
+    assert database.delete_user(user_id)
+    assert module_store.get_module_content(path_id, "greeks", 1) is None, "Cached content should be invalidated"
+    assert module_store.get_module_names(path_id, "greeks") is None
+    conn = sqlite3.connect(database.DB_NAME)
+    remaining = [row[0] for row in conn.execute("SELECT path_id FROM generated_modules")]
+    remaining += [row[0] for row in conn.execute("SELECT path_id FROM generated_module_names")]
+    conn.close()
+    assert remaining == ["p1"], f"Only other paths' content should remain, got {remaining}"
+    print("   ✅ Generated content deleted with the user")
+
+
+def main():
+    """Run all tests"""
+    print("="*80)
+    print("MODULE STORE UNIT TESTS")
+    print("="*80)
+
+    try:
+        test_module_content_persists()
+        test_versions_and_prompt_hash()
+        test_module_names_persist()
+        test_deleted_with_user()
+
+        print("\n" + "="*80)
+        print("✅ ALL TESTS PASSED")
+        print("="*80)
+        return True
+
+    except AssertionError as e:
+        print(f"\n❌ TEST FAILED: {e}")
+        return False
+
+
+if __name__ == "__main__":
+    success = main()
+    exit(0 if success else 1)
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the cross-user module template cache
+Verify users in the same topic/module/role/tier/depth bucket share one generation
+"""
+import json
+import sys
+from pathlib import Path
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from src.agents import content_generator
+from src.agents.content_generator import generate_content, get_depth_bucket, make_template_key
+from tests.unit.db_helpers import with_temp_db
+
+FAKE_RESPONSE = json.dumps({
+    "module_name": "Eigenvalues in Risk Models",
+    "content": "## 1. Eigenvalues\\n\\n**Eigenvalues** describe variance along principal directions.",
+    "key_concepts": ["eigenvalue", "eigenvector", "PCA"],
+    "questions": [
+        {"id": f"q{i}", "text": f"Question {i}", "correct_answer": "A", "explanation": "Because"}
+        for i in range(1, 4)
+    ],
+    "references": [
+        {"text": "MIT 18.06", "url": "https://ocw.mit.edu/courses/18-06-linear-algebra-spring-2010/"},
+        {"text": "3Blue1Brown", "url": "https://www.3blue1brown.com/topics/linear-algebra"}
+    ]
+})
+
+
+def _user(job_title: str, company: str):
+    return {
+        "current_job_title": job_title,
+        "target_job_title": "Quant Researcher",
+        "target_seniority": "Intermediate",
+        "target_company": company,
+        "mastery": 0
+    }
+
+
+def test_depth_bucket_and_key():
+    """Test depth quantization and key normalization"""
+    print("\n1. Testing depth buckets and keys...")
+
+    assert get_depth_bucket(0.47, 0.1) == 0.4
+    assert get_depth_bucket(0.5, 0.1) == 0.5, "Bucket lower bound should be inclusive"
+    assert get_depth_bucket(1.0, 0.25) == 1.0
+    assert make_template_key("linear_algebra", 2, "Eigenvalues  Basics", "Quant Researcher", 2, 0.4) == \
+        make_template_key("linear_algebra", 2, "eigenvalues basics", "quant researcher ", 2, 0.4)
+    assert make_template_key("linear_algebra", 2, "Eigenvalues", "Quant Researcher", 2, 0.4) != \
+        make_template_key("linear_algebra", 2, "Eigenvalues", "Quant Researcher", 3, 0.4)
+    print("   ✅ Buckets and keys work")
+
+
+@with_temp_db
+def test_template_shared_across_users():
+    """Test second user in the same bucket is served without an LLM call"""
+    print("\n2. Testing template reuse...")
+
+    calls = []
+
+    def fake_call_llm(prompt, check, temperature=0.1, max_tokens=2000, use_cache=True, json_schema=None):
+        calls.append(prompt)
+        return check(FAKE_RESPONSE), 100
+
+    original_call = content_generator.call_llm_checked
+    content_generator.call_llm_checked = fake_call_llm
+    try:
+        first = generate_content("linear_algebra", 2, "Eigenvalues Basics", 0.41,
+                                 user_context=_user("Data Analyst", "Citadel"))
+        second = generate_content("linear_algebra", 2, "Eigenvalues Basics", 0.48,
+                                  user_context=_user("Software Engineer", "Jane Street"))
+        assert len(calls) == 1, f"Same bucket should reuse the template, got {len(calls)} LLM calls"
+        assert second["content"] == first["content"] and second["questions"] == first["questions"]
+        assert len(second["references"]) >= 2, "References should be present on a template hit"
+
+        second["questions"].clear()
+        third = generate_content("linear_algebra", 2, "Eigenvalues Basics", 0.45,
+                                 user_context=_user("Student", "Two Sigma"))
+        assert len(third["questions"]) == 3, "Template hits should return independent copies"
+
+        generate_content("linear_algebra", 2, "Eigenvalues Basics", 0.75,
+                         user_context=_user("Data Analyst", "Citadel"))
+        assert len(calls) == 2, "A different depth bucket should generate again"
+    finally:
+        content_generator.call_llm_checked = original_call
+    print("   ✅ Template shared across users")
+
+
+def main():
+    """Run all tests"""
+    print("="*80)
+    print("MODULE TEMPLATE CACHE UNIT TESTS")
+    print("="*80)
+
+    try:
+        test_depth_bucket_and_key()
+        test_template_shared_across_users()
+
+        print("\n" + "="*80)
+        print("✅ ALL TESTS PASSED")
+        print("="*80)
+        return True
+
+    except AssertionError as e:
+        print(f"\n❌ TEST FAILED: {e}")
+        return False
+
+
+if __name__ == "__main__":
+    success = main()
+    exit(0 if success else 1)
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the aggregated My Paths summaries
+Verify get_path_summaries matches the per-path calculations
+"""
+import sys
+from pathlib import Path
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from src.core import database
+from tests.unit.db_helpers import with_temp_db
+
+
+def _create_path(user_id: int, topics):
+    return database.create_path(
+        user_id=user_id, current_job_title="Analyst", current_description="SQL",
+        current_seniority="Junior", target_job_title="Quant", target_description="Models",
+        target_seniority="Intermediate", target_company="", target_industry="", topics=topics
+    )
+
+
+@with_temp_db
+def test_path_summaries_match_per_path_queries():
+    """Test summaries equal calculate_path_mastery and get_total_completed_modules"""
+    print("\n1. Testing get_path_summaries...")
+
+    user_id = database.create_user("Test User", "summary@example.com", "password123")
+    path_a = _create_path(user_id, [
+        {"topic_id": "python", "mastery": 40},
+        {"topic_id": "statistics", "mastery": 10}
+    ])
+    path_b = _create_path(user_id, [{"topic_id": "sql", "mastery": 0}])
+    for module_id in (1, 2, 3):
+        database.complete_module(user_id, path_a, "python", module_id)
+    database.complete_module(user_id, path_a, "statistics", 1)
+
+    paths = database.get_paths_by_user(user_id)
+    summaries = database.get_path_summaries(user_id, paths)
+    for path in paths:
+        summary = summaries[path["id"]]
+        assert summary["mastery"] == database.calculate_path_mastery(path)
+        assert summary["completed_modules"] == database.get_total_completed_modules(user_id, path["id"])
+
+    assert summaries[path_a]["completed_modules"] == 4
+    assert sum(summaries[path_a]["activity"].values()) == 4, "Today's completions should be in the window"
+    assert summaries[path_b] == {"mastery": 0.0, "completed_modules": 0, "activity": {}}
+    print("   ✅ Summaries match per-path queries")
+
+
+def main():
+    """Run all tests"""
+    print("="*80)
+    print("PATH SUMMARIES UNIT TESTS")
+    print("="*80)
+
+    try:
+        test_path_summaries_match_per_path_queries()
+
+        print("\n" + "="*80)
+        print("✅ ALL TESTS PASSED")
+        print("="*80)
+        return True
+
+    except AssertionError as e:
+        print(f"\n❌ TEST FAILED: {e}")
+        return False
+
+
+if __name__ == "__main__":
+    success = main()
+    exit(0 if success else 1)
@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+Unit tests for background module prefetch
+Verify per-user/global caps, deduplication and that prefetched modules land in the module store
+"""
+import sys
+import threading
+import time
+from pathlib import Path
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from src.core import module_store
+from src.workflow import prefetch
+from src.workflow.prefetch import PrefetchScheduler
+from tests.unit.db_helpers import with_temp_db
+
+
+def _tracking_job(state, lock, user_id, delay=0.05):
+    def job():
+        with lock:
+            state["active"][user_id] = state["active"].get(user_id, 0) + 1
+            state["total"] += 1
+            state["peak_user"] = max(state["peak_user"], state["active"][user_id])
+            state["peak_total"] = max(state["peak_total"], state["total"])
+        time.sleep(delay)
+        with lock:
+            state["active"][user_id] -= 1
+            state["total"] -= 1
+        return user_id
+    return job
+
+
+def test_scheduler_caps():
+    """Test per-user and global concurrency caps"""
+    print("\n1. Testing concurrency caps...")
+
+    state = {"active": {}, "total": 0, "peak_user": 0, "peak_total": 0}
+    lock = threading.Lock()
+    scheduler = PrefetchScheduler(max_workers=3, max_per_user=2)
+    try:
+        for user_id in (1, 2):
+            for i in range(5):
+                assert scheduler.schedule(user_id, (user_id, i), _tracking_job(state, lock, user_id))
+    finally:
+        scheduler.shutdown(wait=True)
+
+    assert state["peak_user"] == 2, f"Per-user peak should be 2, got {state['peak_user']}"
+    assert state["peak_total"] == 3, f"Global peak should be 3, got {state['peak_total']}"
+    print("   ✅ Caps respected")
+
+
+def test_scheduler_dedup_and_wait():
+    """Test duplicate keys are ignored and wait_for returns running results"""
+    print("\n2. Testing dedup and wait_for...")
+
+    release = threading.Event()
+    calls = []
+    scheduler = PrefetchScheduler(max_workers=1, max_per_user=1)
+
+    def job():
+        calls.append(1)
+        release.wait(2)
+        return "done"
+
+    try:
+        assert scheduler.schedule(1, "a", job)
+        assert not scheduler.schedule(1, "a", job), "Running key should not be scheduled again"
+        assert scheduler.schedule(1, "b", job)
+        assert not scheduler.schedule(1, "b", job), "Queued key should not be scheduled again"
+        assert scheduler.schedule(1, "c", job)
+        assert scheduler.cancel("b") and not scheduler.cancel("a"), "Only queued jobs can be cancelled"
+        assert scheduler.cancel_pending(1) == 1, "Queued job should be cancellable"
+
+        assert scheduler.wait_for("a", timeout=0.01) is None, "Timeout should return None"
+        release.set()
+        assert scheduler.wait_for("a", timeout=2) == "done"
+    finally:
+        scheduler.shutdown(wait=True)
+
+    assert len(calls) == 1, f"Only the first job should run, got {len(calls)}"
+    print("   ✅ Dedup and wait_for work")
+
+
+@with_temp_db
+def test_prefetch_topic_modules():
+    """Test the look-ahead modules are generated into the module store"""
+    print("\n3. Testing prefetch_topic_modules...")
+
+    generated = []
+
+    def fake_generate(topic_id, module_id, module_name, depth_score, user_context, all_module_names):
+        generated.append(module_id)
+        return {"module_name": module_name, "content": f"content {module_id}"}
+
+    names = {i: f"Name {i}" for i in range(1, 9)}
+    original_generate = prefetch.generate_content
+    original_scheduler = prefetch._scheduler
+    prefetch.generate_content = fake_generate
+    prefetch._scheduler = PrefetchScheduler(max_workers=2, max_per_user=8)
+    try:
+        module_store.save_module_content("p1", "greeks", 4, {"content": "foreground"})
+        queued = prefetch.prefetch_topic_modules(
+            user_id=1, path_id="p1", topic_id="greeks", path_record=None,
+            mastery=20, module_names=names, start_module=3, lookahead=3
+        )
+        queued += prefetch.prefetch_topic_modules(
+            user_id=1, path_id="p1", topic_id="greeks", path_record=None,
+            mastery=20, module_names=names, start_module=8, lookahead=3
+        )
+        queued_default = prefetch.prefetch_topic_modules(
+            user_id=1, path_id="p1", topic_id="greeks", path_record=None,
+            mastery=20, module_names=names, start_module=6
+        )
+        prefetch._scheduler.shutdown(wait=True)
+        module_8 = prefetch.wait_for_module("p1", "greeks", 8, timeout=0)
+        module_4 = module_store.get_module_content("p1", "greeks", 4)
+    finally:
+        prefetch.generate_content = original_generate
+        prefetch._scheduler = original_scheduler
+
+    assert queued == 3, f"Modules 3,5 and 8 should be queued, got {queued}"
+    assert queued_default == 2, "Default look-ahead should queue the rest of the topic (6 and 7)"
+    assert sorted(generated) == [3, 5, 6, 7, 8], f"Unexpected modules generated: {generated}"
+    assert module_8["content"] == "content 8", "Prefetched module should be in the store"
+    assert module_4["content"] == "foreground", "Stored module should not be regenerated"
+    print("   ✅ Look-ahead modules prefetched")
+
+
+def main():
+    """Run all tests"""
+    print("="*80)
+    print("PREFETCH UNIT TESTS")
+    print("="*80)
+
+    try:
+        test_scheduler_caps()
+        test_scheduler_dedup_and_wait()
+        test_prefetch_topic_modules()
+
+        print("\n" + "="*80)
+        print("✅ ALL TESTS PASSED")
+        print("="*80)
+        return True
+
+    except AssertionError as e:
+        print(f"\n❌ TEST FAILED: {e}")
+        return False
+
+
+if __name__ == "__main__":
+    success = main()
+    exit(0 if success else 1)
@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+"""
+Unit tests for per-user token quotas
+Verify accounting and flush, enforcement in call_llm and the template fallback
+"""
+import sys
+from pathlib import Path
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from src.agents import content_generator
+from src.core import database
+from src.core import llm_cache
+from src.core import llm_clients
+from src.core import llm_engine
+from src.core import llm_metrics
+from src.core import quota
+from src.core.quota import QuotaExceededError, QuotaService
+from tests.unit.db_helpers import with_temp_db
+from tests.unit.test_module_templates import FAKE_RESPONSE, _user
+
+
+
+def _service(**overrides):
+    settings = {"enabled": True, "daily_tokens": 100, "monthly_tokens": 1000, "flush_interval_seconds": 3600}
+    settings.update(overrides)
+    return QuotaService(settings)
+
+
+@with_temp_db
+def test_accounting_and_flush():
+    """Test reservations, flushed totals and budget enforcement"""
+    print("\n1. Testing quota accounting...")
+
+    user_id = database.create_user("Test User", "quota@example.com", "password123")
+    service = _service()
+
+    reserved = service.check_and_reserve(user_id, 40)
+    assert service.get_usage(user_id)["daily"] == 40, "In-flight reservations should count"
+    service.commit(user_id, reserved, 60)
+    assert service.get_usage(user_id) == {"daily": 60, "monthly": 60}
+    assert database.get_user(user_id)["tokens_used"] == 0, "Counters should stay in memory until flushed"
+
+    assert service.flush() == 1
+    assert database.get_user(user_id)["tokens_used"] == 60, "Flush should update users.tokens_used"
+    assert database.get_token_usage(user_id, quota._today()) == {"daily": 60, "monthly": 60}
+    assert service.get_usage(user_id)["daily"] == 60, "Flushed tokens should not be counted twice"
+
+    service.commit(user_id, service.check_and_reserve(user_id, 10), 45)
+    try:
+        service.check_and_reserve(user_id, 10)
+        raise AssertionError("Over-budget user should be rejected")
+    except QuotaExceededError as e:
+        assert e.period == "daily" and e.used == 105
+
+    assert service.check_and_reserve(None, 10) == 0, "Calls without a user are not metered"
+
+    other_id = database.create_user("Other User", "quota2@example.com", "password123")
+    service = _service()
+    assert service.check_and_reserve(other_id, 100) == 100
+    try:
+        service.check_and_reserve(other_id, 100)
+        raise AssertionError("The first reservation should count against the next check")
+    except QuotaExceededError:
+        pass
+
+    original_today = quota._today
+    try:
+        quota._today = lambda: "2026-01-31"
+        service.commit(other_id, 100, 30)
+        quota._today = lambda: "2026-02-01"
+        service.flush()
+    finally:
+        quota._today = original_today
+    assert database.get_token_usage(other_id, "2026-01-31")["daily"] == 30, \
+        "Tokens should be flushed under the day they were used"
+    assert database.get_token_usage(other_id, "2026-02-01")["daily"] == 0
+    assert _service(enabled=False).check_and_reserve(user_id, 10) == 0
+    assert database.add_token_usage([{"user_id": 999, "day": "2026-01-01", "tokens": 5, "calls": 1}]) == 0
+    print("   ✅ Accounting works")
+
+
+@with_temp_db
+def test_call_llm_enforcement():
+    """Test call_llm rejects over-budget users but still serves cache hits"""
+    print("\n2. Testing call_llm enforcement...")
+
+    user_id = database.create_user("Test User", "heavy@example.com", "password123")
+    calls = []
+
+    def fake_groq(prompt, model, temperature, max_tokens, api_key, json_schema=None, timeout=None):
+        calls.append(prompt)
+        return "answer", 80
+
+    cache_settings = {
+        "enabled": True, "path": str(Path(database.DB_NAME).parent / "llm_cache.db"),
+        "ttl_hours": 1, "max_entries": 100, "max_bytes": 1024 * 1024
+    }
+    original_groq = llm_engine._call_groq
+    original_settings = llm_clients.get_provider_settings
+    original_cache_settings = llm_cache._get_settings
+    original_service = quota._service
+    llm_engine._call_groq = fake_groq
+    llm_clients.get_provider_settings = lambda: {"provider": "groq", "api_key": "test-key", "ollama_host": None}
+    llm_cache._get_settings = lambda: cache_settings
+    quota._service = _service()
+    try:
+        with llm_metrics.call_context(user_id=user_id):
+            llm_engine.call_llm("quota prompt", max_tokens=10)
+            llm_engine.call_llm("quota prompt", max_tokens=10)
+            llm_engine.call_llm("another prompt", max_tokens=10)
+            try:
+                llm_engine.call_llm("third prompt", max_tokens=10)
+                raise AssertionError("Over-budget call should raise")
+            except QuotaExceededError:
+                pass
+            assert llm_engine.call_llm("quota prompt", max_tokens=10) == ("answer", 0), "Cache hits stay free"
+        llm_engine.call_llm("system prompt", max_tokens=10)
+    finally:
+        llm_engine._call_groq = original_groq
+        llm_clients.get_provider_settings = original_settings
+        llm_cache._get_settings = original_cache_settings
+        quota._service = original_service
+
+    assert calls == ["quota prompt", "another prompt", "system prompt"], f"Unexpected provider calls: {calls}"
+    print("   ✅ call_llm enforces budgets")
+
+
+@with_temp_db
+def test_template_fallback():
+    """Test an over-budget user gets the closest shared template"""
+    print("\n3. Testing template fallback...")
+
+    def fake_call_llm(prompt, check, temperature=0.1, max_tokens=2000, use_cache=True, json_schema=None):
+        return check(FAKE_RESPONSE), 100
+
+    def over_budget(prompt, check, temperature=0.1, max_tokens=2000, use_cache=True, json_schema=None):
+        raise QuotaExceededError(1, "daily", 200, 100)
+
+    original_call = content_generator.call_llm_checked
+    try:
+        content_generator.call_llm_checked = fake_call_llm
+        generated = content_generator.generate_content("linear_algebra", 2, "Eigenvalues Basics", 0.41,
+                                                       user_context=_user("Data Analyst", "Citadel"))
+        content_generator.call_llm_checked = over_budget
+        fallback = content_generator.generate_content("linear_algebra", 2, "Eigenvalues Basics", 0.75,
+                                                      user_context=_user("Data Analyst", "Citadel"))
+        assert fallback["quota_fallback"] and fallback["content"] == generated["content"]
+        try:
+            content_generator.generate_content("linear_algebra", 3, "Eigenvectors", 0.75,
+                                               user_context=_user("Data Analyst", "Citadel"))
+            raise AssertionError("No template should re-raise the quota error")
+        except QuotaExceededError:
+            pass
+    finally:
+        content_generator.call_llm_checked = original_call
+    print("   ✅ Template fallback works")
+
+
+def test_module_names_fallback():
+    """Test quota errors reach callers that opt out of placeholder module names"""
+    print("\n4. Testing module name fallback...")
+
+    def over_budget(prompt, check, temperature=0.1, max_tokens=2000, use_cache=True, json_schema=None):
+        raise QuotaExceededError(1, "daily", 200, 100)
+
+    original_call = content_generator.call_llm_checked
+    content_generator.call_llm_checked = over_budget
+    try:
+        assert content_generator.generate_module_names("python") == content_generator.generic_module_names()
+        try:
+            content_generator.generate_module_names("python", fallback=False)
+            raise AssertionError("fallback=False should raise instead of returning placeholders")
+        except QuotaExceededError:
+            pass
+    finally:
+        content_generator.call_llm_checked = original_call
+    print("   ✅ Placeholder names are reported")
+
+
+def main():
+    """Run all tests"""
+    print("="*80)
+    print("TOKEN QUOTA UNIT TESTS")
+    print("="*80)
+
+    try:
+        test_accounting_and_flush()
+        test_call_llm_enforcement()
+        test_template_fallback()
+        test_module_names_fallback()
+
+        print("\n" + "="*80)
+        print("✅ ALL TESTS PASSED")
+        print("="*80)
+        return True
+
+    except AssertionError as e:
+        print(f"\n❌ TEST FAILED: {e}")
+        return False
+
+
+if __name__ == "__main__":
+    success = main()
+    exit(0 if success else 1)
@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+"""
+Unit tests for rate_limiter.py and acall_llm
+Verify token buckets queue instead of failing, foreground requests go first,
+async fan-out respects max_in_flight and cancelled calls release what they hold
+"""
+import asyncio
+import sys
+import threading
+import time
+from pathlib import Path
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from src.core import rate_limiter
+from src.core.rate_limiter import RateLimiter
+from src.core import llm_engine
+from src.core import llm_clients
+from src.core import llm_metrics
+from src.core import quota
+
+
+def test_request_bucket():
+    """Test requests-per-minute bucket blocks once the burst is used"""
+    print("\n1. Testing requests-per-minute bucket...")
+
+    limiter = RateLimiter(requests_per_minute=120)  # 2 per second refill
+    for _ in range(120):
+        assert limiter.try_acquire() == 0, "Burst up to capacity should be immediate"
+
+    wait = limiter.try_acquire()
+    assert 0 < wait <= 0.5, f"Next request should wait ~0.5s, got {wait}"
+
+    start = time.monotonic()
+    limiter.acquire()
+    assert time.monotonic() - start >= 0.3, "acquire() should have queued"
+    print("   ✅ Request bucket queues")
+
+
+def test_token_bucket_and_refund():
+    """Test tokens-per-minute bucket, clamping and refunds"""
+    print("\n2. Testing tokens-per-minute bucket...")
+
+    limiter = RateLimiter(tokens_per_minute=600)  # 10 tokens per second
+    assert limiter.try_acquire(500) == 0, "Within budget should be immediate"
+    assert limiter.try_acquire(500) > 0, "Over budget should wait"
+
+    limiter.refund(400)
+    assert limiter.try_acquire(450) == 0, "Refunded tokens should be usable"
+
+    huge = RateLimiter(tokens_per_minute=100)
+    assert huge.try_acquire(10_000) == 0, "Oversized request should be clamped to capacity"
+    print("   ✅ Token bucket works")
+
+
+def test_foreground_priority():
+    """Test background requests wait while a foreground request is queued"""
+    print("\n3. Testing foreground priority...")
+
+    limiter = RateLimiter(requests_per_minute=600)  # 10 per second refill
+    while limiter.try_acquire() == 0:
+        pass
+    order = []
+
+    def background_request():
+        with rate_limiter.background():
+            limiter.acquire()
+        order.append("background")
+
+    def foreground_request():
+        limiter.acquire()
+        order.append("foreground")
+
+    threads = [threading.Thread(target=background_request), threading.Thread(target=foreground_request)]
+    threads[0].start()
+    time.sleep(0.02)
+    threads[1].start()
+    for thread in threads:
+        thread.join(timeout=2)
+    assert order == ["foreground", "background"], f"Foreground should be served first: {order}"
+    assert limiter._foreground_waiting == 0
+    print("   ✅ Foreground requests go first")
+
+
+def test_acall_llm_fan_out():
+    """Test acall_llm runs prompts concurrently but never above max_in_flight"""
+    print("\n4. Testing acall_llm fan-out...")
+
+    state = {"active": 0, "peak": 0}
+    state_lock = threading.Lock()
+
+    def fake_groq(prompt, model, temperature, max_tokens, api_key, json_schema=None, timeout=None):
+        with state_lock:
+            state["active"] += 1
+            state["peak"] = max(state["peak"], state["active"])
+        time.sleep(0.05)
+        with state_lock:
+            state["active"] -= 1
+        return f"answer {prompt}", 5
+
+    async def fan_out():
+        prompts = [f"p{i}" for i in range(6)]
+        return await asyncio.gather(*[
+            llm_engine.acall_llm(p, max_tokens=10, use_cache=False) for p in prompts
+        ])
+
+    original_groq = llm_engine._call_groq
+    original_settings = llm_clients.get_provider_settings
+    original_semaphore = llm_engine._in_flight
+    llm_engine._call_groq = fake_groq
+    llm_clients.get_provider_settings = lambda: {"provider": "groq", "api_key": "test-key", "ollama_host": None}
+    llm_engine._in_flight = threading.BoundedSemaphore(2)
+    try:
+        results = asyncio.run(fan_out())
+    finally:
+        llm_engine._call_groq = original_groq
+        llm_clients.get_provider_settings = original_settings
+        llm_engine._in_flight = original_semaphore
+
+    assert [r[0] for r in results] == [f"answer p{i}" for i in range(6)], "Results should keep order"
+    assert state["peak"] == 2, f"Peak concurrency should be 2, got {state['peak']}"
+    print("   ✅ acall_llm fan-out bounded by max_in_flight")
+
+
+def test_acall_llm_cancelled():
+    """Test a cancelled acall_llm releases its quota reservation and limiter tokens"""
+    print("\n5. Testing acall_llm cancellation...")
+
+    def slow_groq(prompt, model, temperature, max_tokens, api_key, json_schema=None, timeout=None):
+        time.sleep(0.2)
+        return "answer", 5
+
+    async def cancel_waiting_call():
+        with llm_metrics.call_context(user_id=1):
+            running = asyncio.ensure_future(llm_engine.acall_llm("first", max_tokens=1000, use_cache=False))
+            waiting = asyncio.ensure_future(llm_engine.acall_llm("second", max_tokens=1000, use_cache=False))
+            await asyncio.sleep(0.05)  # second call now waits for the only in-flight slot
+            waiting.cancel()
+            try:
+                await waiting
+                raise AssertionError("Cancelled call should raise CancelledError")
+            except asyncio.CancelledError:
+                pass
+            return await running
+
+    limiter = RateLimiter(tokens_per_minute=6000)  # 100 tokens per second
+    service = quota.QuotaService({
+        "enabled": True, "daily_tokens": 100000, "monthly_tokens": None, "flush_interval_seconds": 3600
+    })
+    service._persisted[1] = {"day": quota._today(), "daily": 0, "monthly": 0}
+    originals = (llm_engine._call_groq, llm_clients.get_provider_settings, llm_engine._in_flight,
+                 llm_engine._max_in_flight, rate_limiter._limiters, quota._service)
+    llm_engine._call_groq = slow_groq
+    llm_clients.get_provider_settings = lambda: {"provider": "groq", "api_key": "test-key", "ollama_host": None}
+    llm_engine._in_flight = threading.BoundedSemaphore(1)
+    llm_engine._max_in_flight = lambda: 1
+    rate_limiter._limiters = {"groq": limiter}
+    quota._service = service
+    try:
+        assert asyncio.run(cancel_waiting_call()) == ("answer", 5)
+    finally:
+        (llm_engine._call_groq, llm_clients.get_provider_settings, llm_engine._in_flight,
+         llm_engine._max_in_flight, rate_limiter._limiters, quota._service) = originals
+
+    assert not service._reserved, f"Cancelled call left a reservation: {service._reserved}"
+    assert service.get_usage(1)["daily"] == 5, "Only the finished call's tokens should be counted"
+    limiter._tokens.refill(time.monotonic())
+    assert limiter._tokens.tokens >= 6000 - 100, "Cancelled call's prepaid limiter tokens should be refunded"
+    print("   ✅ Cancelled calls release quota and limiter tokens")
+
+
+def main():
+    """Run all tests"""
+    print("="*80)
+    print("RATE LIMITER / ASYNC LLM UNIT TESTS")
+    print("="*80)
+
+    try:
+        test_request_bucket()
+        test_token_bucket_and_refund()
+        test_foreground_priority()
+        test_acall_llm_fan_out()
+        test_acall_llm_cancelled()
+
+        print("\n" + "="*80)
+        print("✅ ALL TESTS PASSED")
+        print("="*80)
+        return True
+
+    except AssertionError as e:
+        print(f"\n❌ TEST FAILED: {e}")
+        return False
+
+
+if __name__ == "__main__":
+    success = main()
+    exit(0 if success else 1)
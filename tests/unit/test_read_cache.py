@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the read-through cache over users and paths
+Verify reads are served from memory and writes invalidate them
+"""
+import sys
+from pathlib import Path
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from src.core import database
+from tests.unit.db_helpers import with_temp_db
+
+
+
+def _create_path(user_id: int) -> str:
+    return database.create_path(
+        user_id=user_id, current_job_title="Analyst", current_description="SQL",
+        current_seniority="Junior", target_job_title="Quant", target_description="Models",
+        target_seniority="Intermediate", target_company="", target_industry="",
+        topics=[{"topic_id": "python", "mastery": 20}]
+    )
+
+
+@with_temp_db
+def test_reads_served_from_cache():
+    """Test repeated reads skip the database and return independent copies"""
+    print("\n1. Testing cached reads...")
+
+    user_id = database.create_user("Test User", "cache@example.com", "password123")
+    path_id = _create_path(user_id)
+    assert database.get_path(path_id)["topics"][0]["topic_id"] == "python"
+
+    # A raw write bypasses invalidation, so a cached read still returns the old value
+    with database.get_db_connection() as conn:
+        conn.execute("UPDATE paths SET global_readiness = 99 WHERE id = ?", (path_id,))
+    path = database.get_path(path_id)
+    assert path["global_readiness"] != 99, "Second read should come from the cache"
+
+    path["topics"].clear()
+    assert database.get_path(path_id)["topics"], "Mutating a result must not change the cache"
+
+    database.clear_read_cache()
+    assert database.get_path(path_id)["global_readiness"] == 99
+    print("   ✅ Reads cached")
+
+
+@with_temp_db
+def test_writes_invalidate():
+    """Test writes bump versions for the affected user and path"""
+    print("\n2. Testing write invalidation...")
+
+    user_id = database.create_user("Test User", "invalidate@example.com", "password123")
+    assert database.get_path_count(user_id) == 0
+    assert database.get_paths_by_user(user_id) == []
+
+    path_id = _create_path(user_id)
+    assert database.get_path_count(user_id) == 1, "create_path should invalidate the path count"
+    assert len(database.get_paths_by_user(user_id)) == 1
+
+    database.update_path_readiness(path_id, 55.0, [{"topic_id": "sql", "mastery": 55}])
+    assert database.get_path(path_id)["global_readiness"] == 55.0
+    assert database.get_paths_by_user(user_id)[0]["topics"][0]["topic_id"] == "sql"
+
+    # Nested transaction: invalidation waits for the outer commit
+    with database.get_db_connection():
+        database.update_path_readiness(path_id, 70.0, [])
+    assert database.get_path(path_id)["global_readiness"] == 70.0
+
+    assert database.get_user(user_id + 1) is None
+    other_id = database.create_user("Other User", "other@example.com", "password123")
+    assert database.get_user(other_id)["name"] == "Other User", "create_user should invalidate a cached miss"
+
+    database.delete_user(user_id)
+    assert database.get_user(user_id) is None
+    assert database.get_path(path_id) is None and database.get_path_count(user_id) == 0
+    print("   ✅ Writes invalidate cached reads")
+
+
+def main():
+    """Run all tests"""
+    print("="*80)
+    print("READ CACHE UNIT TESTS")
+    print("="*80)
+
+    try:
+        test_reads_served_from_cache()
+        test_writes_invalidate()
+
+        print("\n" + "="*80)
+        print("✅ ALL TESTS PASSED")
+        print("="*80)
+        return True
+
+    except AssertionError as e:
+        print(f"\n❌ TEST FAILED: {e}")
+        return False
+
+
+if __name__ == "__main__":
+    success = main()
+    exit(0 if success else 1)
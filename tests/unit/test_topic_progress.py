@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Unit tests for batched topic progress
+Verify get_completed_modules_by_topic and the vectorized mastery calculator
+"""
+import sys
+from pathlib import Path
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from src.core import database
+from src.core.calculators import calculate_topic_progress, PROGRESS_BUCKETS
+from tests.unit.db_helpers import with_temp_db
+
+
+def test_topic_progress_matches_scalar_formula():
+    """Test vectorized mastery equals the per-topic dashboard formula"""
+    print("\n1. Testing calculate_topic_progress...")
+
+    topics = [{"topic_id": f"t{mastery}", "mastery": mastery} for mastery in (0, 13, 25, 37, 60, 99, 100)]
+    completed = {topic["topic_id"]: list(range(1, (i % 9) + 1)) for i, topic in enumerate(topics)}
+    completed["t0"] = list(range(1, 9))
+
+    progress = calculate_topic_progress(topics, completed)
+    for i, topic in enumerate(topics):
+        done = len(completed[topic["topic_id"]])
+        expected = min(int(topic["mastery"] + done * (100 - topic["mastery"]) / 8.0), 100)
+        assert progress["mastery"][i] == expected, f"{topic['topic_id']}: {progress['mastery'][i]} != {expected}"
+        assert progress["gap"][i] == 100 - expected
+        assert progress["modules_done"][i] == done
+
+    buckets = [PROGRESS_BUCKETS[b] for b in calculate_topic_progress(
+        [{"topic_id": "a", "mastery": m} for m in (25, 26, 75, 76, 100)], {}
+    )["bucket"]]
+    assert buckets == ["to_start", "in_progress", "in_progress", "nearly_done", "mastered"]
+    assert len(calculate_topic_progress([], {})["mastery"]) == 0
+    print("   ✅ Vectorized mastery matches")
+
+
+@with_temp_db
+def test_completed_modules_by_topic():
+    """Test one query returns the same modules as per-topic lookups"""
+    print("\n2. Testing get_completed_modules_by_topic...")
+
+    user_id = database.create_user("Test User", "progress@example.com", "password123")
+    for topic_id, module_id in [("python", 3), ("python", 1), ("sql", 2), ("python", 2)]:
+        database.complete_module(user_id, "path-1", topic_id, module_id)
+    database.complete_module(user_id, "path-2", "python", 5)
+
+    by_topic = database.get_completed_modules_by_topic(user_id, "path-1")
+    assert by_topic == {"python": [1, 2, 3], "sql": [2]}, by_topic
+    for topic_id, modules in by_topic.items():
+        assert modules == database.get_completed_modules(user_id, "path-1", topic_id)
+    assert database.get_completed_modules_by_topic(user_id, "path-3") == {}
+    print("   ✅ Batched lookup works")
+
+
+def main():
+    """Run all tests"""
+    print("="*80)
+    print("TOPIC PROGRESS UNIT TESTS")
+    print("="*80)
+
+    try:
+        test_topic_progress_matches_scalar_formula()
+        test_completed_modules_by_topic()
+
+        print("\n" + "="*80)
+        print("✅ ALL TESTS PASSED")
+        print("="*80)
+        return True
+
+    except AssertionError as e:
+        print(f"\n❌ TEST FAILED: {e}")
+        return False
+
+
+if __name__ == "__main__":
+    success = main()
+    exit(0 if success else 1)
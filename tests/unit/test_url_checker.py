@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the concurrent, cached URL checker
+Runs against a local stand-in HTTP server (no internet access needed)
+"""
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from src.agents import content_generator
+from src.core import database, url_checker
+from src.core.url_checker import URLChecker
+
+
+class _Handler(BaseHTTPRequestHandler):
+    """Stand-in for reference hosts; records request counts and concurrency"""
+    stats = {"requests": 0, "active": 0, "peak": 0, "body_bytes": 0}
+    lock = threading.Lock()
+
+    def log_message(self, *args):
+        pass
+
+    def _respond(self, send_body: bool):
+        with self.lock:
+            self.stats["requests"] += 1
+            self.stats["active"] += 1
+            self.stats["peak"] = max(self.stats["peak"], self.stats["active"])
+        try:
+            path = self.path
+            if path.startswith("/slow"):
+                time.sleep(0.2)
+            if path.startswith("/missing"):
+                status, body = 404, b"not found"
+            elif path.startswith("/nohead") and not send_body:
+                status, body = 405, b""
+            elif path.startswith("/youtube.com/playlist?list=empty"):
+                status, body = 200, b'<html>{"videoCount":0}</html>'
+            elif path.startswith("/youtube.com/playlist?list=big"):
+                # Problem marker far beyond the read limit: must never be downloaded
+                status, body = 200, b"<html>" + b"x" * (4 * 1024 * 1024) + b"0 videos</html>"
+            else:
+                status, body = 200, b"ok"
+            self.send_response(status)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            if send_body:
+                try:
+                    self.wfile.write(body)
+                except (BrokenPipeError, ConnectionResetError):
+                    pass
+        finally:
+            with self.lock:
+                self.stats["active"] -= 1
+
+    def do_HEAD(self):
+        self._respond(send_body=False)
+
+    def do_GET(self):
+        self._respond(send_body=True)
+
+
+def _with_server(test):
+    """Run a test with a local HTTP server and a fresh database file"""
+    def wrapper():
+        server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        _Handler.stats.update(requests=0, active=0, peak=0)
+        original_db = database.DB_NAME
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            database.DB_NAME = str(Path(tmp_dir) / "test.db")
+            database.init_db()
+            try:
+                test(f"http://127.0.0.1:{server.server_address[1]}")
+            finally:
+                database.close_db_connections()
+                database.DB_NAME = original_db
+                server.shutdown()
+                server.server_close()
+    wrapper.__name__ = test.__name__
+    wrapper.__doc__ = test.__doc__
+    return wrapper
+
+
+@_with_server
+def test_status_checks(base_url):
+    """Test HEAD/GET fallback, error statuses and bounded playlist reads"""
+    print("\n1. Testing URL status checks...")
+
+    checker = URLChecker({"youtube_max_bytes": 64 * 1024})
+    try:
+        assert checker.check(f"{base_url}/ok") == (True, 200)
+        assert checker.check(f"{base_url}/missing") == (False, 404)
+        assert checker.check(f"{base_url}/nohead") == (True, 200), "405 on HEAD should retry with GET"
+        assert checker.check(f"{base_url}/youtube.com/playlist?list=empty") == (False, 404)
+        assert checker.check(f"{base_url}/youtube.com/playlist?list=big") == (True, 200), \
+            "Only the first youtube_max_bytes should be inspected"
+        assert checker.check("http://127.0.0.1:1/closed") == (False, 0)
+    finally:
+        checker.close()
+    print("   ✅ Status checks work")
+
+
+@_with_server
+def test_concurrency_and_cache(base_url):
+    """Test checks run in parallel within the per-host limit and results are cached"""
+    print("\n2. Testing concurrency and cache...")
+
+    checker = URLChecker({"max_workers": 6, "per_host_limit": 2})
+    try:
+        urls = [f"{base_url}/slow/{i}" for i in range(6)]
+        started = time.time()
+        results = checker.check_many(urls + urls[:2])
+        elapsed = time.time() - started
+        assert all(results[url] == (True, 200) for url in urls)
+        assert _Handler.stats["peak"] == 2, f"Per-host limit should cap concurrency, peak {_Handler.stats['peak']}"
+        assert elapsed < 1.0, f"Checks should overlap, took {elapsed:.2f}s"
+        assert _Handler.stats["requests"] == 6, "Duplicate URLs should be checked once"
+
+        checker.check_many(urls)
+        assert _Handler.stats["requests"] == 6, "Fresh results should come from url_status"
+        assert database.get_url_statuses(urls)[urls[0]]["ok"] is True
+
+        expired = URLChecker({"ttl_hours": 0})
+        try:
+            expired.check_many(urls[:1])
+        finally:
+            expired.close()
+        assert _Handler.stats["requests"] == 7, "Expired results should be re-checked"
+    finally:
+        checker.close()
+    print("   ✅ Concurrent checks cached")
+
+
+@_with_server
+def test_validate_references_batch(base_url):
+    """Test validate_and_fix_references keeps order and replaces broken URLs"""
+    print("\n3. Testing validate_and_fix_references...")
+
+    original_checker = url_checker._checker
+    url_checker._checker = URLChecker({"live_checks": True})
+    try:
+        references = [
+            {"text": "Good", "url": f"{base_url}/ok"},
+            {"text": "Khan", "url": "https://www.khanacademy.org/math"},
+            {"text": "Broken", "url": f"{base_url}/missing"}
+        ]
+        validated = content_generator.validate_and_fix_references(references, "machine_learning", "Regression")
+        fallbacks = content_generator.get_fallback_references("machine_learning", "Regression")
+        assert validated[0] == references[0]
+        assert validated[1] == fallbacks[0] and validated[2] == fallbacks[1]
+    finally:
+        url_checker._checker.close()
+        url_checker._checker = original_checker
+    print("   ✅ References validated in one batch")
+
+
+@_with_server
+def test_request_path_reads_cache_only(base_url):
+    """Test references are validated from url_status without waiting on the network"""
+    print("\n4. Testing cached-only validation...")
+
+    database.save_url_statuses([
+        {"url": f"{base_url}/dead", "ok": False, "status_code": 404, "checked_at": 0},
+        {"url": f"{base_url}/alive", "ok": True, "status_code": 200, "checked_at": 0}
+    ])
+    original_checker = url_checker._checker
+    url_checker._checker = URLChecker({"live_checks": False})
+    try:
+        references = [
+            {"text": "Alive", "url": f"{base_url}/alive"},
+            {"text": "Dead", "url": f"{base_url}/dead"},
+            {"text": "New", "url": f"{base_url}/new"}
+        ]
+        validated = content_generator.validate_and_fix_references(references, "machine_learning", "Regression")
+        assert validated[0] == references[0], "Stale but OK results should still be used"
+        assert validated[1] != references[1], "Known dead links should be replaced"
+        assert validated[2] == references[2], "Unchecked URLs should be kept"
+
+        url_checker._checker._background.shutdown(wait=True)
+        assert _Handler.stats["requests"] == 1, "Only the unchecked URL should be checked, in the background"
+        assert database.get_url_statuses([f"{base_url}/new"])[f"{base_url}/new"]["ok"] is True
+    finally:
+        url_checker._checker.close()
+        url_checker._checker = original_checker
+    print("   ✅ Request path reads url_status only")
+
+
+def main():
+    """Run all tests"""
+    print("="*80)
+    print("URL CHECKER UNIT TESTS")
+    print("="*80)
+
+    try:
+        test_status_checks()
+        test_concurrency_and_cache()
+        test_validate_references_batch()
+        test_request_path_reads_cache_only()
+
+        print("\n" + "="*80)
+        print("✅ ALL TESTS PASSED")
+        print("="*80)
+        return True
+
+    except AssertionError as e:
+        print(f"\n❌ TEST FAILED: {e}")
+        return False
+
+
+if __name__ == "__main__":
+    success = main()
+    exit(0 if success else 1)
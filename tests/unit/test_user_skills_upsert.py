@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Unit tests for bulk user_skills upserts
+Verify the UNIQUE(user_id, topic_id) migration, ON CONFLICT updates and the combined path save
+"""
+import sqlite3
+import sys
+from pathlib import Path
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from src.core import database
+from tests.unit.db_helpers import with_temp_db
+
+
+
+@with_temp_db
+def test_migration_dedupes_skills():
+    """Test init_db keeps the latest duplicate row and adds the unique index"""
+    print("\n1. Testing user_skills migration...")
+
+    # Replace the current table with the pre-migration schema (no unique index)
+    conn = sqlite3.connect(database.DB_NAME)
+    conn.execute("DROP TABLE user_skills")
+    conn.execute("""
+        CREATE TABLE user_skills (
+            id INTEGER PRIMARY KEY AUTOINCREMENT, user_id INTEGER, topic_id TEXT,
+            mastery_percent INTEGER, last_completed TIMESTAMP, modules_complete TEXT
+        )
+    """)
+    conn.executemany(
+        "INSERT INTO user_skills (user_id, topic_id, mastery_percent) VALUES (?, ?, ?)",
+        [(1, "python", 10), (1, "python", 40), (1, "sql", 30)]
+    )
+    conn.commit()
+    conn.close()
+
+    database.init_db()
+    skills = {s["topic_id"]: s["mastery_percent"] for s in database.get_user_skills(1)}
+    assert skills == {"python": 40, "sql": 30}, f"Latest duplicate should be kept, got {skills}"
+    print("   ✅ Duplicates removed")
+
+
+@with_temp_db
+def test_bulk_upsert():
+    """Test rows are inserted, then updated in place"""
+    print("\n2. Testing upsert_user_skills...")
+
+    user_id = database.create_user("Test User", "skills@example.com", "password123")
+
+    written = database.upsert_user_skills(user_id, [
+        {"topic_id": "python", "mastery_percent": 20, "modules_complete": "1/8"},
+        {"topic_id": "sql", "mastery_percent": 50}
+    ])
+    assert written == 2
+    database.upsert_user_skills(user_id, [{"topic_id": "python", "mastery_percent": 70, "modules_complete": "5/8"}])
+
+    skills = {s["topic_id"]: s for s in database.get_user_skills(user_id)}
+    assert len(skills) == 2, "Upsert should not duplicate rows"
+    assert skills["python"]["mastery_percent"] == 70 and skills["python"]["modules_complete"] == "5/8"
+    assert skills["sql"]["modules_complete"] == "0/8"
+
+    try:
+        database.upsert_user_skills(user_id, [
+            {"topic_id": "ml", "mastery_percent": 10},
+            {"topic_id": "bad", "mastery_percent": 140}
+        ])
+        raise AssertionError("Out-of-range mastery should raise")
+    except ValueError:
+        pass
+    assert len(database.get_user_skills(user_id)) == 2, "Nothing should be written when a row is invalid"
+    print("   ✅ Bulk upsert works")
+
+
+@with_temp_db
+def test_save_path_assessment():
+    """Test readiness and skills are saved together"""
+    print("\n3. Testing save_path_assessment...")
+
+    user_id = database.create_user("Test User", "assess@example.com", "password123")
+    path_id = database.create_path(
+        user_id=user_id, current_job_title="Analyst", current_description="SQL",
+        current_seniority="Junior", target_job_title="Quant", target_description="Models",
+        target_seniority="Intermediate", target_company="", target_industry="", topics=[]
+    )
+    topics = [
+        {"topic_id": "python", "mastery": 60, "modules_complete": "4/8", "estimated_hours": 8, "subtopics": []},
+        {"topic_id": "statistics", "mastery": 20, "modules_complete": "1/8", "estimated_hours": 16, "subtopics": []}
+    ]
+
+    assert database.save_path_assessment(user_id, path_id, 40.0, topics) == 2
+    path = database.get_path(path_id)
+    assert path["global_readiness"] == 40.0
+    assert len(database.get_user_skills(user_id)) == 2
+    print("   ✅ Path assessment saved in one transaction")
+
+
+def main():
+    """Run all tests"""
+    print("="*80)
+    print("USER SKILLS UPSERT UNIT TESTS")
+    print("="*80)
+
+    try:
+        test_migration_dedupes_skills()
+        test_bulk_upsert()
+        test_save_path_assessment()
+
+        print("\n" + "="*80)
+        print("✅ ALL TESTS PASSED")
+        print("="*80)
+        return True
+
+    except AssertionError as e:
+        print(f"\n❌ TEST FAILED: {e}")
+        return False
+
+
+if __name__ == "__main__":
+    success = main()
+    exit(0 if success else 1)
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Unit tests for resumable workflow runs (persisted node outputs per path)
+Agents are replaced by fakes; the workflow runs against a temporary database
+"""
+import sys
+from pathlib import Path
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from src.core import database
+from src.workflow import orchestrator
+from tests.unit.db_helpers import with_temp_db
+from tests.unit.test_workflow_parallel import FORM_DATA
+
+TOPIC_IDS = ["probability", "statistics", "python"]
+
+
+@with_temp_db
+def _run_and_resume(parallel: bool):
+    calls = {"parse": 0, "assessed": [], "down": {"statistics"}}
+
+    def fake_parse_jobs(user_id, form_data):
+        calls["parse"] += 1
+        return [{"id": topic_id, "prereq": None} for topic_id in TOPIC_IDS]
+
+    def fake_assess_topics(user_id, topics, current_job_context=""):
+        calls["assessed"].extend(t["id"] for t in topics)
+        if any(t["id"] in calls["down"] for t in topics):
+            raise ConnectionError("Groq 503")
+        return [{"topic_id": t["id"], "mastery": 20, "modules_complete": "1/8",
+                 "estimated_hours": 16, "subtopics": []} for t in topics]
+
+    original_parse = orchestrator.parse_jobs
+    original_assess = orchestrator.assess_topics
+    original_settings = orchestrator.get_parallel_assessment_settings
+    user_id = database.create_user("Test User", "resume@example.com", "password123")
+    orchestrator.parse_jobs = fake_parse_jobs
+    orchestrator.assess_topics = fake_assess_topics
+    orchestrator.get_parallel_assessment_settings = lambda: {
+        "enabled": parallel, "chunk_size": 1, "max_concurrency": 3
+    }
+    orchestrator.clear_workflow_cache()
+    try:
+        failed = orchestrator.run_full_workflow(user_id, FORM_DATA)
+        failed_run = database.get_workflow_run(failed["path_id"])
+
+        # Simulate an app restart: compiled graphs and in-memory checkpoints are gone
+        orchestrator.clear_workflow_cache()
+        calls["down"].clear()
+        calls["assessed"].clear()
+        resumed = orchestrator.resume_workflow(failed["path_id"])
+        resumed_run = database.get_workflow_run(failed["path_id"])
+        paths = database.get_paths_by_user(user_id)
+    finally:
+        orchestrator.parse_jobs = original_parse
+        orchestrator.assess_topics = original_assess
+        orchestrator.get_parallel_assessment_settings = original_settings
+        orchestrator.clear_workflow_cache()
+    return calls, failed, failed_run, resumed, resumed_run, paths
+
+
+def test_resume_sequential():
+    """Test a run failing in Agent 2 resumes from the persisted Agent 1 topics"""
+    print("\n1. Testing sequential resume...")
+
+    calls, failed, failed_run, resumed, resumed_run, paths = _run_and_resume(parallel=False)
+    assert failed["error"] and failed["path_id"], "Failed run should still return its path_id"
+    assert failed_run["status"] == "failed" and "agent1_parse_jobs" in failed_run["nodes"]
+    assert resumed["error"] is None, f"Resume should succeed, got {resumed['error']}"
+    assert calls["parse"] == 1, "Agent 1 should not run again"
+    assert resumed_run["status"] == "completed"
+    assert len(paths) == 1 and paths[0]["global_readiness"] == 20.0
+    print("   ✅ Sequential run resumed")
+
+
+def test_resume_parallel_only_failed_chunk():
+    """Test only the failed Agent 2 chunk is re-assessed on resume"""
+    print("\n2. Testing parallel resume...")
+
+    calls, failed, failed_run, resumed, resumed_run, paths = _run_and_resume(parallel=True)
+    assert failed["error"], "Run with a failed chunk should fail"
+    assert resumed["error"] is None, f"Resume should succeed, got {resumed['error']}"
+    assert calls["parse"] == 1, "Agent 1 should not run again"
+    assert calls["assessed"] == ["statistics"], f"Only the failed chunk should re-run, got {calls['assessed']}"
+    assert [t["topic_id"] for t in resumed["assessed_topics"]] == TOPIC_IDS
+    print("   ✅ Parallel run resumed")
+
+
+def main():
+    """Run all tests"""
+    print("="*80)
+    print("WORKFLOW RESUME UNIT TESTS")
+    print("="*80)
+
+    try:
+        test_resume_sequential()
+        test_resume_parallel_only_failed_chunk()
+
+        print("\n" + "="*80)
+        print("✅ ALL TESTS PASSED")
+        print("="*80)
+        return True
+
+    except AssertionError as e:
+        print(f"\n❌ TEST FAILED: {e}")
+        return False
+
+
+if __name__ == "__main__":
+    success = main()
+    exit(0 if success else 1)